@@ -0,0 +1,264 @@
+from datetime import datetime
+
+from metrics import ordered_label_names
+
+# EWMA : poids de la nouvelle tranche
+ALPHA = 0.1
+# écart absolu moyen -> écart-type (loi normale) : sigma ~ 1.2533 x MAD moyen
+MAD_TO_SIGMA = 1.2533
+# CUSUM (en écarts-types, z borné au seuil) : tolérance k et seuil de décision h ;
+# h = 20 : ~6 tranches consécutives au seuil, un pic bref ne suffit pas
+CUSUM_K = 0.5
+CUSUM_H = 20.0
+# taux d'erreur minimal (%) pour signaler un pic d'erreurs
+MIN_ERROR_PCT = 5.0
+# débit moyen minimal (échantillons / tranche) pour signaler un arrêt
+MIN_STALL_RATE = 3.0
+
+
+def _fmt(ts_ms):
+    return datetime.fromtimestamp(ts_ms / 1000.0).strftime("%d/%m/%y %H:%M:%S")
+
+
+class _Ewma:
+    """
+    Moyenne et dispersion exponentielles (écart absolu moyen, plus robuste
+    que la variance aux valeurs extrêmes) ; score z d'une nouvelle valeur.
+    """
+
+    def __init__(self):
+        self.mean = None
+        self.mad = 0.0
+        self.n = 0
+
+    def score(self, x, floor):
+        if self.mean is None:
+            return 0.0
+        sigma = max(self.mad * MAD_TO_SIGMA, floor)
+        return (x - self.mean) / sigma
+
+    def update(self, x):
+        self.n += 1
+        if self.mean is None:
+            self.mean = x
+            return
+        self.mad += ALPHA * (abs(x - self.mean) - self.mad)
+        self.mean += ALPHA * (x - self.mean)
+
+    def reset(self, x):
+        self.mean = x
+        self.mad = 0.0
+        self.n = 1
+
+
+class _LabelState:
+    def __init__(self, bucket):
+        self.bucket = bucket        # tranche en cours
+        self.count = 0
+        self.elapsed = 0.0
+        self.errors = 0
+        self.latency = _Ewma()
+        self.rate = _Ewma()
+        self.error_pct = _Ewma()
+        self.cusum_up = 0.0
+        self.cusum_down = 0.0
+        self.open = {}              # type -> événement en cours (tranches consécutives)
+        self.mix = {}               # TOTAL : label -> échantillons de la tranche en cours
+
+
+class AnomalyDetector:
+    """
+    Collecteur pour compute_recap : détection en ligne, par label (et
+    TOTAL), sur des tranches de `bucket_s` secondes :
+      - latency spike / throughput drop / error spike : score z robuste
+        (EWMA + écart absolu moyen) au-delà de `z_threshold` ;
+      - stall : aucune requête dans une tranche alors que le débit attendu
+        est significatif et que le label reprend ensuite (arrêt total
+        masqué par les moyennes ; un label qui se termine n'est pas un arrêt) ;
+      - level shift : CUSUM sur la latence standardisée (changement durable).
+    Le débit de TOTAL est comparé au débit attendu des labels présents dans
+    la tranche : un changement de mix (label terminé) n'est pas une chute.
+    Les `warmup` premières tranches servent de référence. Les valeurs
+    anormales ne mettent pas à jour la référence. Les tranches consécutives
+    d'un même type sont regroupées en un événement.
+    Mémoire : état constant par label + au plus `max_events` événements.
+    """
+
+    def __init__(self, bucket_s=5, z_threshold=4.0, warmup=6, max_events=500):
+        self.bucket_ms = max(int(bucket_s * 1000), 1)
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.max_events = max_events
+        self.states = {}     # label -> _LabelState
+        self.events = []
+        self.dropped = 0
+
+    def add(self, label, ts, elapsed, success, row):
+        bucket = ts // self.bucket_ms
+        for name in (label, "TOTAL"):
+            state = self.states.get(name)
+            if state is None:
+                state = self.states[name] = _LabelState(bucket)
+            # tranche suivante : on clôt la tranche en cours, puis d'un bloc
+            # les tranches vides intermédiaires (l'échantillon prouve la reprise)
+            if bucket > state.bucket:
+                self._close_bucket(name, state)
+                if bucket > state.bucket:
+                    self._close_empty(name, state, bucket)
+            # léger désordre (tranche passée) : compté dans la tranche en cours
+            state.count += 1
+            state.elapsed += elapsed
+            if not success:
+                state.errors += 1
+        # state : TOTAL (dernier de la boucle)
+        state.mix[label] = state.mix.get(label, 0) + 1
+
+    def _emit(self, name, state, kind, bucket, value, baseline, score):
+        event = state.open.get(kind)
+        if event is not None and event["last_bucket"] == bucket - 1:
+            event["last_bucket"] = bucket
+            if abs(score) > abs(event["score"]):
+                event.update(value=value, score=score)
+            return
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        event = {"label": name, "type": kind, "first_bucket": bucket, "last_bucket": bucket,
+                 "value": value, "baseline": baseline, "score": score}
+        state.open[kind] = event
+        self.events.append(event)
+
+    def _emit_shift(self, name, state, kind, bucket, value, score):
+        """
+        Changement de niveau confirmé : les tranches « latency spike »
+        contiguës qui le précèdent en étaient le début et sont absorbées.
+        """
+        baseline = state.latency.mean
+        first = bucket
+        spike = state.open.get("latency spike")
+        if spike is not None and spike["last_bucket"] == bucket - 1 and spike in self.events:
+            self.events.remove(spike)
+            del state.open["latency spike"]
+            first = spike["first_bucket"]
+            baseline = spike["baseline"]
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        event = {"label": name, "type": kind, "first_bucket": first, "last_bucket": bucket,
+                 "value": value, "baseline": baseline, "score": score}
+        state.open[kind] = event
+        self.events.append(event)
+
+    def _close_empty(self, name, state, bucket):
+        """
+        Tranches vides [state.bucket, bucket[ : un seul événement stall,
+        sans parcourir les tranches une à une.
+        """
+        if state.rate.n >= self.warmup and (state.rate.mean or 0) >= MIN_STALL_RATE:
+            self._emit(name, state, "stall", state.bucket, 0, state.rate.mean, -float("inf"))
+            event = state.open.get("stall")
+            if event is not None and event["last_bucket"] == state.bucket:
+                event["last_bucket"] = bucket - 1
+        state.bucket = bucket
+
+    def _expected_rate(self, state):
+        """
+        TOTAL : débit attendu des seuls labels présents dans la tranche
+        (référence propre de chaque label, ou son compte s'il n'en a pas).
+        """
+        expected = 0.0
+        for label, count in state.mix.items():
+            rate = self.states[label].rate.mean
+            expected += count if rate is None else rate
+        return expected
+
+    def _close_bucket(self, name, state, partial=False):
+        """
+        Clôt la tranche en cours. `partial` : dernière tranche du label
+        (incomplète), exclue des tests de débit.
+        """
+        bucket = state.bucket
+        count = state.count
+        warm = state.rate.n >= self.warmup
+
+        if count == 0:
+            if warm and not partial and state.rate.mean >= MIN_STALL_RATE:
+                self._emit(name, state, "stall", bucket, 0, state.rate.mean, -float("inf"))
+        else:
+            latency = state.elapsed / count
+            error_pct = state.errors / count * 100.0
+            rate_floor = max(1.0, 0.1 * (state.rate.mean or 0))
+            rate_baseline = state.rate.mean
+            z_rate = state.rate.score(count, rate_floor)
+            if name == "TOTAL" and state.rate.mean is not None:
+                rate_baseline = self._expected_rate(state)
+                z_rate = (count - rate_baseline) / max(state.rate.mad * MAD_TO_SIGMA, rate_floor)
+            z_lat = state.latency.score(latency, max(1.0, 0.05 * (state.latency.mean or 0)))
+            z_err = state.error_pct.score(error_pct, 1.0)
+
+            anomalous = False
+            shifted = False
+            if warm:
+                # CUSUM bilatéral sur la latence standardisée (z borné : un pic isolé ne suffit pas)
+                z = max(min(z_lat, self.z_threshold), -self.z_threshold)
+                state.cusum_up = max(0.0, state.cusum_up + z - CUSUM_K)
+                state.cusum_down = max(0.0, state.cusum_down - z - CUSUM_K)
+                if state.cusum_up > CUSUM_H or state.cusum_down > CUSUM_H:
+                    direction = "up" if state.cusum_up > CUSUM_H else "down"
+                    score = state.cusum_up if direction == "up" else -state.cusum_down
+                    self._emit_shift(name, state, f"level shift {direction}", bucket, latency, score)
+                    # nouvelle référence au niveau atteint
+                    state.latency.reset(latency)
+                    state.cusum_up = state.cusum_down = 0.0
+                    shifted = True
+
+                if z_lat >= self.z_threshold and not shifted:
+                    self._emit(name, state, "latency spike", bucket, latency, state.latency.mean, z_lat)
+                    anomalous = True
+                if z_rate <= -self.z_threshold and not partial:
+                    self._emit(name, state, "throughput drop", bucket, count, rate_baseline, z_rate)
+                    anomalous = True
+                if z_err >= self.z_threshold and error_pct >= MIN_ERROR_PCT:
+                    self._emit(name, state, "error spike", bucket, error_pct, state.error_pct.mean, z_err)
+                    anomalous = True
+
+            if not anomalous and not shifted:
+                state.latency.update(latency)
+                state.error_pct.update(error_pct)
+            if not partial and (not anomalous or z_rate > -self.z_threshold):
+                state.rate.update(count)
+
+        state.bucket += 1
+        state.count = 0
+        state.elapsed = 0.0
+        state.errors = 0
+        state.mix = {}
+
+    def results(self):
+        """
+        Liste de dicts (un par événement), par label puis ordre chronologique :
+        Label, Type, Start, End, Duration (s), Value, Baseline, Score.
+        """
+        # chaque label s'arrête à sa dernière tranche : pas d'arrêt après la fin
+        for name, state in self.states.items():
+            if state.count:
+                self._close_bucket(name, state, partial=True)
+
+        order = {label: i for i, label in enumerate(ordered_label_names(self.states))}
+        order["TOTAL"] = len(order)
+        rows = []
+        for e in sorted(self.events, key=lambda e: (order.get(e["label"], 0), e["first_bucket"])):
+            start = e["first_bucket"] * self.bucket_ms
+            end = (e["last_bucket"] + 1) * self.bucket_ms
+            score = e["score"]
+            rows.append({
+                "Label": e["label"],
+                "Type": e["type"],
+                "Start": _fmt(start),
+                "End": _fmt(end),
+                "Duration (s)": round((end - start) / 1000.0, 1),
+                "Value": round(e["value"], 2),
+                "Baseline": round(e["baseline"], 2) if e["baseline"] is not None else "",
+                "Score": round(score, 1) if score != -float("inf") else "",
+            })
+        return rows
@@ -0,0 +1,159 @@
+import os
+import glob
+import time
+import hashlib
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config_loader import setup_logging
+from pipeline import run_campaign
+from word_template import load_compiled_template
+
+
+def find_campaign_folders(manifest=None, pattern=None):
+    """
+    Dossiers de campagne à traiter :
+      - manifest : fichier texte, un dossier par ligne (# = commentaire),
+                   chemins relatifs au manifest ;
+      - pattern  : glob de dossiers (ex : C:/Results/release-*/).
+    """
+    folders = []
+    if manifest:
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                folders.append(os.path.normpath(os.path.join(base_dir, line)))
+    if pattern:
+        folders.extend(os.path.normpath(p) for p in sorted(glob.glob(pattern)) if os.path.isdir(p))
+
+    unique = []
+    for folder in folders:
+        if folder not in unique:
+            unique.append(folder)
+
+    if not unique:
+        raise FileNotFoundError(f"Aucun dossier de campagne trouvé (manifest={manifest}, glob={pattern})")
+
+    logging.info("Mode batch : %d dossiers de campagne", len(unique))
+    return unique
+
+
+def _job_names(folders):
+    """
+    Nom de sortie unique par dossier : le nom du dossier, suffixé d'un hash
+    du chemin complet quand deux campagnes portent le même nom
+    (ex : release-42/run et release-43/run).
+    """
+    bases = [os.path.basename(folder.rstrip("/\\")) or "campaign" for folder in folders]
+    counts = Counter(bases)
+    names = []
+    for folder, base in zip(folders, bases):
+        if counts[base] > 1:
+            digest = hashlib.sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()[:8]
+            base = f"{base}-{digest}"
+        names.append(base)
+    return names
+
+
+def plan_jobs(folders, output_dir=None, doc_template=None, options=None):
+    """
+    Un job par dossier. Les sorties sont nommées d'après le dossier, dans
+    `output_dir` si défini, sinon dans le dossier de campagne lui-même.
+    Chaque job a ses propres sorties HTML / Parquet / profil (`options`) :
+    les jobs concurrents n'écrivent jamais le même fichier.
+    """
+    options = options or {}
+    jobs = []
+    for index, (folder, name) in enumerate(zip(folders, _job_names(folders))):
+        target_dir = output_dir or folder
+        overrides = {}
+        if options.get("html_output"):
+            overrides["html_output"] = os.path.join(target_dir, f"{name}-{os.path.basename(options['html_output'])}")
+        if options.get("parquet_output"):
+            overrides["parquet_output"] = os.path.join(options["parquet_output"], name)
+        if options.get("run_profile"):
+            overrides["run_profile"] = os.path.join(target_dir, f"{name}-{os.path.basename(options['run_profile'])}")
+        jobs.append({
+            "index": index,
+            "name": name,
+            "results_folder": folder,
+            "output_file": os.path.join(target_dir, f"{name}-recap_scenarios.xlsx"),
+            "doc_template": doc_template,
+            "doc_output": os.path.join(target_dir, f"{name}-report.docx") if doc_template else None,
+            "options": overrides,
+        })
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    return jobs
+
+
+def _init_worker(doc_template, template_cache_dir):
+    """
+    Initialisation d'un processus du pool : logging, puis chargement unique du
+    template compilé depuis le cache disque (partagé par tous les jobs du processus).
+    """
+    setup_logging()
+    if doc_template and os.path.isfile(doc_template):
+        load_compiled_template(doc_template, template_cache_dir)
+
+
+def _run_job(job, options):
+    start = time.perf_counter()
+    try:
+        result = run_campaign(job["results_folder"], job["output_file"],
+                              job["doc_template"], job["doc_output"], dict(options, **job["options"]))
+        status = "OK"
+        message = f"{len(result['users'])} paliers"
+    except Exception as e:
+        logging.exception("Job %s en erreur", job["name"])
+        status = "ERREUR"
+        message = str(e)
+    return {
+        "index": job["index"],
+        "name": job["name"],
+        "status": status,
+        "message": message,
+        "duration_s": round(time.perf_counter() - start, 1),
+        "output_file": job["output_file"],
+    }
+
+
+def run_batch(jobs, options, workers=None):
+    """
+    Exécute les jobs sur un pool de processus (un par cœur par défaut).
+    Le template Word est compilé une seule fois ici ; les processus le relisent
+    depuis le cache disque. Retourne le statut de chaque job.
+    """
+    doc_template = jobs[0]["doc_template"] if jobs else None
+    if doc_template and os.path.isfile(doc_template):
+        load_compiled_template(doc_template, options["template_cache_dir"])
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+    logging.info("Mode batch : %d jobs sur %d processus", len(jobs), workers)
+
+    start = time.perf_counter()
+    statuses = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(doc_template, options["template_cache_dir"])) as pool:
+        futures = [pool.submit(_run_job, job, options) for job in jobs]
+        for future in as_completed(futures):
+            status = future.result()
+            logging.info("  [%s] %s (%.1f s) : %s", status["status"], status["name"],
+                         status["duration_s"], status["message"])
+            statuses.append(status)
+
+    statuses.sort(key=lambda s: s["index"])
+
+    failed = [s for s in statuses if s["status"] != "OK"]
+    logging.info("--------------------------------------------------")
+    logging.info("Résumé batch : %d OK, %d en erreur, %.1f s au total",
+                 len(statuses) - len(failed), len(failed), time.perf_counter() - start)
+    for s in statuses:
+        logging.info("  %-7s %-40s %6.1f s  %s", s["status"], s["name"], s["duration_s"], s["output_file"])
+
+    return statuses
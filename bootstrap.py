@@ -0,0 +1,154 @@
+import math
+import time
+import heapq
+import random
+import logging
+from array import array
+from operator import itemgetter
+
+# ré-échantillonnages par lot : un seul appel random.choices par lot
+BATCH = 25
+MIN_RESAMPLES = 50
+
+# percentile encadré (colonnes « 95% Line » / « 95% Line CI » des exports)
+PERCENTILE = 95
+
+
+class Reservoir:
+    """
+    Échantillon uniforme de taille fixe d'un flux (algorithme R) :
+    elapsed en entiers 32 bits, succès en octets. Mémoire bornée quel que
+    soit le nombre d'échantillons du label.
+    """
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.elapsed = array("i")
+        self.errors = bytearray()
+        self.seen = 0
+
+    def add(self, elapsed, success):
+        self.seen += 1
+        if len(self.elapsed) < self.size:
+            self.elapsed.append(int(round(elapsed)))
+            self.errors.append(0 if success else 1)
+            return
+        j = int(self.rng.random() * self.seen)
+        if j < self.size:
+            self.elapsed[j] = int(round(elapsed))
+            self.errors[j] = 0 if success else 1
+
+
+def _quantile(sorted_values, q):
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def bootstrap_reservoir(reservoir, percentile=PERCENTILE, resamples=1000, deadline=None, rng=None):
+    """
+    Bootstrap de la moyenne, du percentile et du % d'erreurs sur un
+    réservoir. Les tirages sont faits par lots (random.choices + itemgetter,
+    boucles en C) jusqu'à `resamples` ou jusqu'à `deadline`
+    (time.perf_counter), avec au moins MIN_RESAMPLES.
+    Retourne (estimations sur le réservoir, écarts bootstrap par statistique).
+    """
+    rng = rng or random.Random()
+    values = reservoir.elapsed.tolist()
+    errors = bytes(reservoir.errors)
+    m = len(values)
+    top = max(m - int(math.ceil(percentile / 100.0 * m)) + 1, 1)
+
+    point = {
+        "mean": sum(values) / m,
+        "pct": heapq.nlargest(top, values)[-1],
+        "err": errors.count(1) * 100.0 / m,
+    }
+    deltas = {"mean": [], "pct": [], "err": []}
+    indices = range(m)
+    done = 0
+    while done < resamples:
+        if deadline is not None and done >= MIN_RESAMPLES and time.perf_counter() > deadline:
+            break
+        batch = min(BATCH, resamples - done)
+        drawn = rng.choices(indices, k=m * batch)
+        for b in range(batch):
+            pick = itemgetter(*drawn[b * m:(b + 1) * m]) if m > 1 else (lambda seq: (seq[0],))
+            sample = pick(values)
+            deltas["mean"].append(sum(sample) / m - point["mean"])
+            deltas["pct"].append(heapq.nlargest(top, sample)[-1] - point["pct"])
+            deltas["err"].append(sum(pick(errors)) * 100.0 / m - point["err"])
+        done += batch
+    return point, deltas
+
+
+class BootstrapCollector:
+    """
+    Collecteur pour compute_recap : intervalles de confiance bootstrap de la
+    moyenne, du p95 et du % d'erreurs par label (et TOTAL).
+
+    Chaque label garde un réservoir de `sample_size` échantillons ; au-delà,
+    l'intervalle est celui d'un bootstrap « m parmi n » : les écarts au
+    réservoir sont réduits d'un facteur sqrt(m / n) puis centrés sur les
+    valeurs exactes du recap. `time_budget_s` borne le temps total de calcul
+    du scénario (partagé entre les labels).
+    """
+
+    def __init__(self, sample_size=5000, resamples=1000, time_budget_s=5.0, confidence=95.0, seed=None):
+        self.sample_size = max(int(sample_size), 1)
+        self.resamples = max(int(resamples), MIN_RESAMPLES)
+        self.time_budget_s = time_budget_s
+        self.confidence = confidence
+        self.rng = random.Random(seed)
+        self.reservoirs = {}  # label -> Reservoir
+        self.total = Reservoir(self.sample_size, self.rng)
+
+    def add(self, label, ts, elapsed, success, row):
+        reservoir = self.reservoirs.get(label)
+        if reservoir is None:
+            reservoir = self.reservoirs[label] = Reservoir(self.sample_size, self.rng)
+        reservoir.add(elapsed, success)
+        self.total.add(elapsed, success)
+
+    def _interval(self, point, deltas, scale):
+        deltas = sorted(deltas)
+        alpha = (100.0 - self.confidence) / 200.0
+        return point + _quantile(deltas, alpha) * scale, point + _quantile(deltas, 1 - alpha) * scale
+
+    def apply_to_recap(self, recap):
+        """
+        Ajoute Average CI (ms), 95% CI (ms) et Error % CI aux lignes du recap
+        (colonnes optionnelles des exports Excel / Word), et rien d'autre :
+        chaque intervalle est centré sur la valeur du recap si elle existe
+        (percentiles exacts / histogramme), sinon sur l'estimation du
+        réservoir, qui n'est jamais écrite dans les colonnes de valeurs.
+        """
+        rows = [r for r in recap if r["Label"] == "TOTAL" or r["Label"] in self.reservoirs]
+        started = time.perf_counter()
+        pct_key = f"{PERCENTILE}% Line (ms)"
+        ci_key = f"{PERCENTILE}% CI (ms)"
+        resamples_done = []
+
+        for i, row in enumerate(rows):
+            reservoir = self.total if row["Label"] == "TOTAL" else self.reservoirs[row["Label"]]
+            if not reservoir.seen:
+                continue
+            # budget restant réparti sur les labels restants
+            remaining = self.time_budget_s - (time.perf_counter() - started)
+            deadline = time.perf_counter() + max(remaining, 0.0) / (len(rows) - i)
+            point, deltas = bootstrap_reservoir(reservoir, PERCENTILE, self.resamples, deadline, self.rng)
+            resamples_done.append(len(deltas["mean"]))
+            scale = math.sqrt(len(reservoir.elapsed) / reservoir.seen)
+
+            lo, hi = self._interval(row.get("Average (ms)", point["mean"]), deltas["mean"], scale)
+            row["Average CI (ms)"] = f"{max(lo, 0):.1f}-{hi:.1f}"
+
+            lo, hi = self._interval(row.get(pct_key, point["pct"]), deltas["pct"], scale)
+            row[ci_key] = f"{int(round(max(lo, 0)))}-{int(round(hi))}"
+
+            lo, hi = self._interval(row.get("Error %", point["err"]), deltas["err"], scale)
+            row["Error % CI"] = f"{max(lo, 0.0):.2f}-{min(hi, 100.0):.2f}"
+
+        if resamples_done:
+            logging.info("  -> bootstrap : %d-%d ré-échantillonnages par label en %.2f s",
+                         min(resamples_done), max(resamples_done), time.perf_counter() - started)
+        return recap
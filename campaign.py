@@ -0,0 +1,251 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from collections import OrderedDict
+from datetime import datetime
+
+from jmeter_io import find_scenario_files, group_scenario_files, merge_jmeter_csv
+from metrics import compute_recap
+from exact_percentiles import ExactPercentileCollector
+from metric_graph import plan_metrics, ALL_COLUMNS
+from label_rules import load_label_rules, LabelMapper
+from time_index import resolve_time_window, merge_time_window
+
+CACHE_DIR_NAME = ".recap_cache"
+CACHE_VERSION = 1
+
+
+def _time_bound(value):
+    """
+    Borne de between() -> texte accepté par time_index.parse_time_bound.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return str(int(value.timestamp() * 1000))
+    if isinstance(value, (int, float)):
+        return str(int(value))
+    return str(value)
+
+
+class Campaign:
+    """
+    API de requête paresseuse sur un dossier de résultats, pour les notebooks :
+
+        from campaign import Campaign
+        c = Campaign.open("C:/Results/release-42")
+        c.users()                                   # [1, 4, 8]
+        c.where(users=8, label="Purchase").between("14:05", "14:10").recap()
+
+    where / between / select renvoient une nouvelle requête sans rien lire ;
+    le calcul a lieu à recap() / recaps(). Les filtres sont poussés vers la
+    lecture : seuls les fichiers des paliers demandés sont ouverts, la
+    fenêtre temporelle passe par l'index creux (time_index), les lignes des
+    autres labels sont écartées avant analyse, et les percentiles ne sont
+    calculés que si select() les demande. Les résultats sont mis en cache
+    sur disque (clé : fichiers, taille, date de modification et requête).
+    """
+
+    def __init__(self, folder, groups, users=None, labels=None, start=None, end=None,
+                 columns=None, label_rules=None, cache_dir=None):
+        self.folder = folder
+        self.groups = groups            # users -> chemins (group_scenario_files)
+        self._users = users
+        self._labels = labels
+        self._start = start
+        self._end = end
+        self._columns = columns
+        self._label_rules = label_rules
+        self._cache_dir = cache_dir
+        self._mapper = None
+
+    @classmethod
+    def open(cls, folder, label_rules=None, cache=True):
+        """
+        `label_rules` : fichier de règles (voir label_rules.load_label_rules).
+        `cache` : True (dossier .recap_cache de la campagne), chemin, ou False.
+        """
+        groups = group_scenario_files(find_scenario_files(folder))
+        if cache is True:
+            cache_dir = os.path.join(folder, CACHE_DIR_NAME)
+        else:
+            cache_dir = cache or None
+        return cls(folder, groups, label_rules=label_rules, cache_dir=cache_dir)
+
+    def _copy(self, **changes):
+        state = {
+            "users": self._users,
+            "labels": self._labels,
+            "start": self._start,
+            "end": self._end,
+            "columns": self._columns,
+            "label_rules": self._label_rules,
+            "cache_dir": self._cache_dir,
+        }
+        state.update(changes)
+        return Campaign(self.folder, self.groups, **state)
+
+    def where(self, users=None, label=None):
+        """
+        Filtre par palier(s) et/ou label(s) : valeur seule ou liste.
+        """
+        changes = {}
+        if users is not None:
+            changes["users"] = tuple(users) if isinstance(users, (list, tuple, set)) else (users,)
+        if label is not None:
+            changes["labels"] = tuple(label) if isinstance(label, (list, tuple, set)) else (label,)
+        return self._copy(**changes)
+
+    def between(self, t0=None, t1=None):
+        """
+        Fenêtre [t0, t1[ : epoch ms, datetime, "YYYY-MM-DD HH:MM[:SS]" ou
+        "HH:MM[:SS]" (jour du début du run).
+        """
+        return self._copy(start=_time_bound(t0), end=_time_bound(t1))
+
+    def select(self, *columns):
+        """
+        Colonnes du recap à garder (Label toujours inclus) : seules celles-ci
+        sont calculées (metric_graph). Les colonnes "90/95/99% Line (ms)"
+        activent le calcul des percentiles exacts. Colonne inconnue : ValueError.
+        """
+        plan_metrics(columns)
+        return self._copy(columns=tuple(columns))
+
+    def users(self):
+        """
+        Paliers disponibles (après filtre where), sans lecture des fichiers.
+        """
+        return [u for u in self.groups if self._users is None or u in self._users]
+
+    def _label_mapper(self):
+        if self._label_rules and self._mapper is None:
+            self._mapper = LabelMapper(load_label_rules(self._label_rules))
+        return self._mapper
+
+    def _cache_key(self, users, paths):
+        files = []
+        for path in paths + ([self._label_rules] if self._label_rules else []):
+            stat = os.stat(path)
+            files.append([os.path.abspath(path), stat.st_size, stat.st_mtime])
+        query = {
+            "version": CACHE_VERSION,
+            "files": files,
+            "users": users,
+            "labels": self._labels,
+            "start": self._start,
+            "end": self._end,
+            "columns": self._columns,
+        }
+        return hashlib.sha256(json.dumps(query, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _cache_read(self, key):
+        if not self._cache_dir:
+            return None
+        try:
+            with open(os.path.join(self._cache_dir, key + ".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _cache_write(self, key, recap):
+        if not self._cache_dir:
+            return
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            path = os.path.join(self._cache_dir, key + ".json")
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(recap, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # dossier de campagne en lecture seule : cache dans le dossier temporaire
+            fallback = os.path.join(tempfile.gettempdir(), "jmeter_recap_cache")
+            if self._cache_dir != fallback:
+                logging.warning("Cache non accessible (%s), repli sur %s", e, fallback)
+                self._cache_dir = fallback
+                self._cache_write(key, recap)
+
+    def _rows(self, paths):
+        if self._start is None and self._end is None:
+            rows = merge_jmeter_csv(paths)
+        else:
+            start_ms, end_ms = resolve_time_window(paths, self._start, self._end)
+            rows = merge_time_window(paths, start_ms, end_ms)
+        if self._labels is None or self._label_mapper() is not None:
+            return rows
+        # filtre sur label brut avant analyse (avec règles, filtre sur le label normalisé)
+        wanted = set(self._labels)
+        return (r for r in rows if r.get("label") in wanted)
+
+    def _compute(self, users, paths):
+        plan = plan_metrics(self._columns or ALL_COLUMNS)
+        collectors = []
+        if plan["percentiles"]:
+            collectors.append(ExactPercentileCollector(percentiles=plan["percentiles"]))
+
+        mapper = self._label_mapper()
+        if mapper is not None and self._labels is not None:
+            wanted = set(self._labels)
+            inner = mapper
+
+            def mapper(label):
+                mapped = inner(label)
+                return mapped if mapped in wanted else None
+
+        rows = self._rows(paths)
+        if mapper is not None:
+            rows = _mapped_rows(rows, mapper)
+        recap = compute_recap(rows, collectors=collectors, plan=plan)
+        for c in collectors:
+            c.apply_to_recap(recap)
+
+        if self._columns:
+            # ordre de select()
+            keep = ("Label",) + tuple(c for c in self._columns if c != "Label")
+            recap = [{k: r[k] for k in keep if k in r} for r in recap]
+        return recap
+
+    def recaps(self):
+        """
+        users -> recap (même structure que metrics.compute_recap), par palier
+        sélectionné ; calculé ou relu depuis le cache.
+        """
+        out = OrderedDict()
+        for users in self.users():
+            paths = self.groups[users]
+            key = self._cache_key(users, paths)
+            recap = self._cache_read(key)
+            if recap is None:
+                logging.info("Campaign : calcul du recap %d utilisateurs", users)
+                recap = self._compute(users, paths)
+                self._cache_write(key, recap)
+            else:
+                logging.info("Campaign : recap %d utilisateurs relu depuis le cache", users)
+            out[users] = recap
+        return out
+
+    def recap(self):
+        """
+        Recap d'un seul palier (where(users=...) si la campagne en a plusieurs).
+        """
+        users = self.users()
+        if len(users) != 1:
+            raise ValueError(f"recap() attend un seul palier (disponibles : {users}) : "
+                             f"utiliser where(users=...) ou recaps()")
+        return self.recaps()[users[0]]
+
+
+def _mapped_rows(rows, mapper):
+    """
+    Applique le label normalisé aux lignes ; None (label filtré) : ligne écartée.
+    """
+    for r in rows:
+        label = mapper(r.get("label"))
+        if label is None:
+            continue
+        if label != r.get("label"):
+            r = dict(r, label=label)
+        yield r
@@ -0,0 +1,170 @@
+import math
+import logging
+
+from metrics import LABEL_ORDER
+
+# points de la courbe ajustée au-delà du plus grand palier mesuré
+CURVE_POINTS = 24
+
+
+def _solve(matrix, vector):
+    """
+    Résolution d'un petit système linéaire (pivot de Gauss partiel).
+    """
+    n = len(vector)
+    a = [row[:] + [vector[i]] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+        if abs(a[pivot][col]) < 1e-12:
+            return None
+        a[col], a[pivot] = a[pivot], a[col]
+        for r in range(n):
+            if r != col:
+                factor = a[r][col] / a[col][col]
+                for c in range(col, n + 1):
+                    a[r][c] -= factor * a[col][c]
+    return [a[i][n] / a[i][i] for i in range(n)]
+
+
+def _least_squares(rows, ys):
+    """
+    Moindres carrés par équations normales : ys ~ rows . coefs
+    """
+    k = len(rows[0])
+    ata = [[sum(r[i] * r[j] for r in rows) for j in range(k)] for i in range(k)]
+    aty = [sum(r[i] * y for r, y in zip(rows, ys)) for i in range(k)]
+    return _solve(ata, aty)
+
+
+def usl_throughput(n, lam, sigma, kappa):
+    return lam * n / (1 + sigma * (n - 1) + kappa * n * (n - 1))
+
+
+def fit_usl(points):
+    """
+    Ajuste la Universal Scalability Law (Gunther) :
+      X(N) = λN / (1 + σ(N-1) + κN(N-1))
+    via la forme linéarisée N/X = a + b(N-1) + cN(N-1), avec λ = 1/a,
+    σ = b/a, κ = c/a. σ et κ sont contraints >= 0 (repli Amdahl puis linéaire).
+    points : [(N, X req/s)] avec X > 0. Retourne un dict ou None.
+    """
+    points = [(n, x) for n, x in points if n > 0 and x > 0]
+    if len(points) < 2:
+        return None
+
+    ys = [n / x for n, x in points]
+    designs = []
+    if len(points) >= 3:
+        designs.append(lambda n: [1.0, n - 1.0, n * (n - 1.0)])
+    designs.append(lambda n: [1.0, n - 1.0, 0.0])
+    designs.append(lambda n: [1.0, 0.0, 0.0])
+
+    coefs = None
+    for design in designs:
+        rows = [design(n) for n, _ in points]
+        used = [i for i in range(3) if any(r[i] for r in rows)]
+        sol = _least_squares([[r[i] for i in used] for r in rows], ys)
+        if sol is None:
+            continue
+        full = [0.0, 0.0, 0.0]
+        for i, v in zip(used, sol):
+            full[i] = v
+        if full[0] > 0 and full[1] >= 0 and full[2] >= 0:
+            coefs = full
+            break
+    if coefs is None:
+        return None
+
+    lam = 1.0 / coefs[0]
+    sigma = coefs[1] * lam
+    kappa = coefs[2] * lam
+
+    fitted = [usl_throughput(n, lam, sigma, kappa) for n, _ in points]
+    mean_x = sum(x for _, x in points) / len(points)
+    ss_res = sum((x - f) ** 2 for (_, x), f in zip(points, fitted))
+    ss_tot = sum((x - mean_x) ** 2 for _, x in points)
+    r2 = 1.0 - ss_res / ss_tot if ss_tot > 0 else 1.0
+
+    if kappa > 0 and sigma < 1:
+        knee = math.sqrt((1 - sigma) / kappa)
+        max_x = usl_throughput(knee, lam, sigma, kappa)
+    elif sigma > 0:
+        # Amdahl : pas de recul, débit asymptotique λ/σ
+        knee = None
+        max_x = lam / sigma
+    else:
+        knee = None
+        max_x = None
+
+    return {
+        "lambda": lam,
+        "sigma": sigma,
+        "kappa": kappa,
+        "r2": r2,
+        "knee": knee,
+        "max_x": max_x,
+    }
+
+
+def analyse_capacity(tp_matrix, rt_matrix):
+    """
+    tp_matrix : label -> {users: débit req/s}, rt_matrix : label -> {users: moyenne ms}.
+    Retourne (params, curve) :
+      params : une ligne par label (λ, σ, κ, R², genou, débit max soutenable) ;
+      curve  : par label et N, débit mesuré/ajusté, résidu et concurrence
+               effective de Little (N_eff = X . R) et temps de réflexion déduit.
+    """
+    params = []
+    curve = []
+    labels = [lbl for lbl in LABEL_ORDER if lbl in tp_matrix]
+    labels += [lbl for lbl in sorted(tp_matrix) if lbl not in labels]
+
+    for label in labels:
+        measured = sorted(tp_matrix[label].items())
+        fit = fit_usl(measured)
+        if fit is None:
+            logging.info("Capacité : ajustement USL impossible pour %s (%d paliers)", label, len(measured))
+            continue
+
+        params.append({
+            "Label": label,
+            "Lambda (req/s per user)": round(fit["lambda"], 4),
+            "Sigma (contention)": round(fit["sigma"], 5),
+            "Kappa (coherency)": round(fit["kappa"], 6),
+            "R2": round(fit["r2"], 4),
+            "Knee (users)": round(fit["knee"], 1) if fit["knee"] is not None else "",
+            "Max Throughput (req/s)": round(fit["max_x"], 2) if fit["max_x"] is not None else "",
+            "Max Throughput (/min)": round(fit["max_x"] * 60, 1) if fit["max_x"] is not None else "",
+        })
+
+        for n, x in measured:
+            fx = usl_throughput(n, fit["lambda"], fit["sigma"], fit["kappa"])
+            avg_ms = rt_matrix.get(label, {}).get(n)
+            row = {
+                "Label": label,
+                "Users": n,
+                "Measured (req/s)": round(x, 3),
+                "Fitted (req/s)": round(fx, 3),
+                "Residual (req/s)": round(x - fx, 3),
+            }
+            if avg_ms is not None:
+                r_s = avg_ms / 1000.0
+                row["Little N (X.R)"] = round(x * r_s, 2)
+                row["Think Time (s)"] = round(max(n / x - r_s, 0.0), 3)
+            curve.append(row)
+
+        max_n = max(n for n, _ in measured)
+        horizon = max(2 * max_n, int(math.ceil(fit["knee"] or 0)) + 1)
+        step = max(horizon / CURVE_POINTS, 1.0)
+        n = step
+        while n <= horizon:
+            if not any(abs(n - m) < 1e-9 for m, _ in measured):
+                curve.append({
+                    "Label": label,
+                    "Users": round(n, 1),
+                    "Fitted (req/s)": round(usl_throughput(n, fit["lambda"], fit["sigma"], fit["kappa"]), 3),
+                })
+            n += step
+
+    curve.sort(key=lambda r: (labels.index(r["Label"]), r["Users"]))
+    return params, curve
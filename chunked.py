@@ -0,0 +1,141 @@
+import os
+import csv
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from metrics import parse_sample, new_stats, add_sample, merge_stats, build_recap
+from histogram import LogHistogram
+from label_rules import LabelMapper
+
+
+def split_byte_ranges(path, chunk_mb=64):
+    """
+    Découpe un CSV en plages d'octets [début, fin[ d'environ `chunk_mb` Mo
+    (hors en-tête). Chaque plage traite les lignes qui y commencent.
+    Retourne (header, plages).
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        header_end = f.tell()
+    header = next(csv.reader([header_line.decode("utf-8-sig")]))
+
+    step = max(int(chunk_mb * 1024 * 1024), 1)
+    ranges = []
+    start = header_end
+    while start < size:
+        end = min(start + step, size)
+        ranges.append((start, end))
+        start = end
+    return header, ranges
+
+
+def _range_lines(f, start, end, header_end):
+    if start > header_end:
+        # fin de la ligne en cours : elle appartient à la plage précédente
+        f.seek(start - 1)
+        f.readline()
+    else:
+        f.seek(start)
+    while f.tell() < end:
+        line = f.readline()
+        if not line:
+            return
+        yield line.decode("utf-8", errors="replace")
+
+
+def _process_range(args):
+    """
+    Agrégats d'une plage (exécuté dans un processus du pool), transmis à
+    merge_part des collecteurs fusionnables :
+    {"labels": label -> stats, "histograms": label -> LogHistogram ou None,
+     "first_ts", "last_ts"}.
+    """
+    path, header, header_end, start, end, with_histograms, label_mapper = args
+    labels = {}
+    histograms = {} if with_histograms else None
+    first_ts = None
+    last_ts = None
+    with open(path, "rb") as f:
+        for values in csv.reader(_range_lines(f, start, end, header_end)):
+            if len(values) != len(header):
+                continue
+            sample = parse_sample(dict(zip(header, values)))
+            if sample is None:
+                continue
+            label, ts, elapsed, success, bytes_val, sent_bytes_val = sample
+            if label_mapper is not None:
+                label = label_mapper(label)
+            stats = labels.get(label)
+            if stats is None:
+                stats = labels[label] = new_stats()
+            add_sample(stats, ts, elapsed, success, bytes_val, sent_bytes_val)
+            if histograms is not None:
+                hist = histograms.get(label)
+                if hist is None:
+                    hist = histograms[label] = LogHistogram()
+                hist.record(elapsed)
+            if first_ts is None or ts < first_ts:
+                first_ts = ts
+            if last_ts is None or ts > last_ts:
+                last_ts = ts
+    return {"labels": labels, "histograms": histograms, "first_ts": first_ts, "last_ts": last_ts}
+
+
+def compute_recap_chunked(paths, workers=None, chunk_mb=64, collectors=(), label_mapper=None):
+    """
+    Recap (même structure que metrics.compute_recap) calculé en parallèle :
+    chaque plage d'octets des fichiers est agrégée dans un processus, puis
+    les agrégats sont fusionnés (Chan pour moyenne/variance, histogrammes
+    pour les percentiles). L'ordre des lignes n'importe pas.
+
+    `collectors` : collecteurs marqués `mergeable`, alimentés par
+    merge_part(agrégats de chaque plage) au lieu de add ; les histogrammes
+    ne sont calculés que si l'un d'eux les demande (`needs_histograms`).
+    Un collecteur non fusionnable : ValueError (voir planner.plan_scenario).
+    Limite : une valeur entre guillemets sur plusieurs lignes coupée par
+    une frontière de plage est ignorée (rare dans les JTL).
+
+    `label_mapper` : seules ses règles sont appliquées dans les processus
+    (sans état) ; les transactions obtenues sont enregistrées dans le
+    mapper parent (log_summary). Un plafond LABEL_MAX_DISTINCT dépend de
+    l'ordre d'arrivée des labels : ValueError, le planificateur
+    (planner.plan_scenario) n'autorise alors pas le mode parallèle.
+    """
+    collectors = list(collectors)
+    unmergeable = [type(c).__name__ for c in collectors if not getattr(c, "mergeable", False)]
+    if unmergeable:
+        raise ValueError(f"Collecteur(s) non fusionnable(s) en exécution parallèle : {', '.join(unmergeable)}")
+    with_histograms = any(getattr(c, "needs_histograms", False) for c in collectors)
+
+    worker_mapper = None
+    if label_mapper is not None:
+        if label_mapper.max_labels:
+            raise ValueError("LABEL_MAX_DISTINCT est incompatible avec l'exécution parallèle")
+        worker_mapper = LabelMapper(label_mapper.rules)
+
+    tasks = []
+    for path in paths:
+        header, ranges = split_byte_ranges(path, chunk_mb)
+        header_end = ranges[0][0] if ranges else 0
+        for start, end in ranges:
+            tasks.append((path, header, header_end, start, end, with_histograms, worker_mapper))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks) or 1))
+    logging.info("  -> exécution parallèle : %d plages sur %d processus", len(tasks), workers)
+
+    labels = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_process_range, tasks):
+            for label, stats in part["labels"].items():
+                if label_mapper is not None:
+                    label_mapper.targets.add(label)
+                into = labels.get(label)
+                if into is None:
+                    labels[label] = stats
+                else:
+                    merge_stats(into, stats)
+            for collector in collectors:
+                collector.merge_part(part)
+
+    return build_recap(labels)
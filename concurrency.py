@@ -0,0 +1,76 @@
+import logging
+from collections import OrderedDict
+
+from metrics import parse_sample, new_stats, add_sample, build_recap, active_threads
+
+
+def concurrency_level(threads, bucket_size=1):
+    """
+    Niveau de concurrence d'un échantillon : threads actifs arrondis à la
+    borne haute du bucket (bucket 4 : 1-4 -> 4, 5-8 -> 8).
+    """
+    return ((threads + bucket_size - 1) // bucket_size) * bucket_size
+
+
+def compute_recaps_by_concurrency(rows, bucket_size=1, make_collectors=None, min_samples=1,
+                                  label_mapper=None):
+    """
+    Recap par niveau de concurrence à partir d'un seul run en montée de
+    charge par paliers (allThreads/grpThreads), en une passe.
+
+    make_collectors(level) -> liste de collecteurs propres à ce niveau,
+    créés à la première apparition du niveau.
+    Le débit de chaque niveau est calculé sur le temps effectivement passé
+    à ce niveau (secondes distinctes), pas sur l'étendue first -> last.
+
+    Retourne OrderedDict level -> (recap, collecteurs), niveaux triés ; les
+    niveaux de moins de `min_samples` échantillons (transitions) sont ignorés.
+    `label_mapper` : voir metrics.compute_recap.
+    """
+    levels = {}
+    skipped = 0
+
+    for r in rows:
+        sample = parse_sample(r)
+        if sample is None:
+            continue
+        threads = active_threads(r)
+        if threads <= 0:
+            skipped += 1
+            continue
+        label, ts, elapsed, success, bytes_val, sent_bytes_val = sample
+        if label_mapper is not None:
+            label = label_mapper(label)
+
+        level = concurrency_level(threads, bucket_size)
+        entry = levels.get(level)
+        if entry is None:
+            entry = levels[level] = {
+                "labels": {},
+                "seconds": set(),
+                "collectors": make_collectors(level) if make_collectors else [],
+            }
+
+        stats = entry["labels"].get(label)
+        if stats is None:
+            stats = entry["labels"][label] = new_stats()
+        add_sample(stats, ts, elapsed, success, bytes_val, sent_bytes_val)
+        entry["seconds"].add(ts // 1000)
+
+        for c in entry["collectors"]:
+            c.add(label, ts, elapsed, success, r)
+
+    if skipped:
+        logging.warning("  -> %d échantillons sans allThreads/grpThreads ignorés", skipped)
+
+    result = OrderedDict()
+    for level in sorted(levels):
+        entry = levels[level]
+        samples = sum(stats["count"] for stats in entry["labels"].values())
+        if samples < min_samples:
+            logging.info("  -> niveau %d threads ignoré (%d échantillons < %d)", level, samples, min_samples)
+            continue
+        duration_ms = len(entry["seconds"]) * 1000
+        logging.info("  -> niveau %d threads : %d échantillons sur %d s", level, samples, len(entry["seconds"]))
+        result[level] = (build_recap(entry["labels"], duration_ms), entry["collectors"])
+    return result
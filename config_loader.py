@@ -27,9 +27,17 @@ def load_env():
     logging.info("DOC_TEMPLATE  = %s", doc_template)
     logging.info("DOC_OUTPUT    = %s", doc_output)
 
-    if not results_folder:
+    batch_mode = bool(os.getenv("BATCH_MANIFEST") or os.getenv("BATCH_GLOB"))
+    live_mode = _env_bool("LIVE_INGEST")
+
+    if batch_mode:
+        logging.info("Mode batch : RESULTS_FOLDER / OUTPUT_FILE ignorés.")
+        return results_folder, output_file, doc_template, doc_output
+    if live_mode:
+        logging.info("Mode live : RESULTS_FOLDER ignoré.")
+    elif not results_folder:
         raise ValueError("La variable RESULTS_FOLDER n'est pas définie dans le fichier .env")
-    if not os.path.isdir(results_folder):
+    elif not os.path.isdir(results_folder):
         raise ValueError(f"Le dossier RESULTS_FOLDER n'existe pas : {results_folder}")
 
     if os.path.isdir(output_file) or not os.path.splitext(output_file)[1]:
@@ -37,3 +45,139 @@ def load_env():
         logging.info("OUTPUT_FILE normalisé en : %s", output_file)
 
     return results_folder, output_file, doc_template, doc_output
+
+
+def _env_bool(name, default=False):
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("true", "1", "yes", "y")
+
+
+def _env_int(name, default=None):
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"La variable {name} doit être un entier : {value}")
+
+
+def _env_float(name, default=None):
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"La variable {name} doit être un nombre : {value}")
+
+
+def load_options():
+    """
+    Options facultatives du .env (à appeler après load_env).
+    """
+    options = {
+        # mode preview : recap approximatif sur échantillon
+        "preview_mode": _env_bool("PREVIEW_MODE"),
+        "preview_sample_size": _env_int("PREVIEW_SAMPLE_SIZE", 20000),
+        "preview_seed": _env_int("PREVIEW_SEED"),
+        # fenêtre de régime stable (hors montée/descente en charge)
+        "steady_state": _env_bool("STEADY_STATE"),
+        "steady_bucket_s": _env_float("STEADY_BUCKET_S", 10.0),
+        "steady_trim_start_s": _env_float("STEADY_TRIM_START_S"),
+        "steady_trim_end_s": _env_float("STEADY_TRIM_END_S"),
+        # décomposition connect / serveur / téléchargement (Latency, Connect)
+        "latency_breakdown": _env_bool("LATENCY_BREAKDOWN"),
+        # top-K des signatures d'erreur (code / message) par label
+        "error_analysis": _env_bool("ERROR_ANALYSIS"),
+        "error_top_k": _env_int("ERROR_TOP_K", 10),
+        "error_sketch_capacity": _env_int("ERROR_SKETCH_CAPACITY", 200),
+        # cache disque des templates Word compilés (défaut : dossier temporaire)
+        "template_cache_dir": os.getenv("TEMPLATE_CACHE_DIR") or None,
+        # mode batch : plusieurs dossiers de campagne en une exécution
+        "batch_manifest": os.getenv("BATCH_MANIFEST") or None,
+        "batch_glob": os.getenv("BATCH_GLOB") or None,
+        "batch_output_dir": os.getenv("BATCH_OUTPUT_DIR") or None,
+        "batch_workers": _env_int("BATCH_WORKERS"),
+        # percentiles exacts 90/95/99 avec budget mémoire (déversement disque)
+        "exact_percentiles": _env_bool("EXACT_PERCENTILES"),
+        "exact_memory_mb": _env_float("EXACT_MEMORY_MB", 256.0),
+        "exact_spill_dir": os.getenv("EXACT_SPILL_DIR") or None,
+        # SLA par label (JSON) : pass/fail + Apdex
+        "sla_file": os.getenv("SLA_FILE") or None,
+        # modèle de capacité (USL / Little) à travers les paliers
+        "capacity_analysis": _env_bool("CAPACITY_ANALYSIS"),
+        # un seul run en montée de charge, découpé par threads actifs
+        "concurrency_mode": _env_bool("CONCURRENCY_MODE"),
+        "concurrency_bucket": _env_int("CONCURRENCY_BUCKET", 1),
+        "concurrency_min_samples": _env_int("CONCURRENCY_MIN_SAMPLES", 100),
+        # tableau de bord HTML autonome
+        "html_output": os.getenv("HTML_OUTPUT") or None,
+        "timeseries_bucket_s": _env_float("TIMESERIES_BUCKET_S", 1.0),
+        "html_max_points": _env_int("HTML_MAX_POINTS", 1000),
+        # latences corrigées de la coordinated omission (intervalle auto si vide)
+        "co_correction": _env_bool("CO_CORRECTION"),
+        "co_expected_interval_ms": _env_float("CO_EXPECTED_INTERVAL_MS"),
+        # normalisation des labels (ID dans les URL) : règles regex/glob (JSON)
+        "label_rules_file": os.getenv("LABEL_RULES_FILE") or None,
+        "label_max_distinct": _env_int("LABEL_MAX_DISTINCT"),
+        # heatmap latence x temps (mémoire fixe par label)
+        "latency_heatmap": _env_bool("LATENCY_HEATMAP"),
+        "heatmap_bucket_s": _env_float("HEATMAP_BUCKET_S", 1.0),
+        "heatmap_columns": _env_int("HEATMAP_COLUMNS", 60),
+        # ingestion temps réel du Backend Listener InfluxDB (sans CSV)
+        "live_ingest": _env_bool("LIVE_INGEST"),
+        "live_host": os.getenv("LIVE_HOST") or "127.0.0.1",
+        "live_http_port": _env_int("LIVE_HTTP_PORT", 8086),
+        "live_udp_port": _env_int("LIVE_UDP_PORT"),
+        "live_measurement": os.getenv("LIVE_MEASUREMENT") or "jmeter",
+        "live_duration_s": _env_float("LIVE_DURATION_S"),
+        "live_idle_timeout_s": _env_float("LIVE_IDLE_TIMEOUT_S"),
+        # export Parquet des échantillons et des recaps (pyarrow requis)
+        "parquet_output": os.getenv("PARQUET_OUTPUT") or None,
+        "parquet_row_group": _env_int("PARQUET_ROW_GROUP", 65536),
+        # recap restreint à une fenêtre (ex : 14:05 -> 14:10) via index creux
+        "time_window_start": os.getenv("TIME_WINDOW_START") or None,
+        "time_window_end": os.getenv("TIME_WINDOW_END") or None,
+        "index_step_kb": _env_int("INDEX_STEP_KB", 256),
+        # lecture des CSV en arrière-plan (tampons réutilisés, file bornée)
+        "prefetch_io": _env_bool("PREFETCH_IO"),
+        "prefetch_block_kb": _env_int("PREFETCH_BLOCK_KB", 1024),
+        "prefetch_depth": _env_int("PREFETCH_DEPTH", 4),
+        # planificateur : auto | exact | streaming | sketch | parallel | spill
+        "execution_mode": (os.getenv("EXECUTION_MODE") or "auto").strip().lower(),
+        "planner_memory_fraction": _env_float("PLANNER_MEMORY_FRACTION", 0.5),
+        "parallel_min_mb": _env_float("PARALLEL_MIN_MB", 512.0),
+        "parallel_workers": _env_int("PARALLEL_WORKERS"),
+        "parallel_chunk_mb": _env_float("PARALLEL_CHUNK_MB", 64.0),
+        "run_profile": os.getenv("RUN_PROFILE") or None,
+        # métriques serveur (sar / nmon / CSV Prometheus), glob séparés par ;
+        "resource_files": os.getenv("RESOURCE_FILES") or None,
+        "resource_cpu_metric": os.getenv("RESOURCE_CPU_METRIC") or None,
+        "resource_cpu_cores": _env_float("RESOURCE_CPU_CORES", 1.0),
+        # détection d'anomalies en flux (pics, chutes de débit, blocages, changements de niveau)
+        "anomaly_detection": _env_bool("ANOMALY_DETECTION"),
+        "anomaly_bucket_s": _env_float("ANOMALY_BUCKET_S", 5.0),
+        "anomaly_z": _env_float("ANOMALY_Z", 4.0),
+        "anomaly_warmup": _env_int("ANOMALY_WARMUP", 6),
+        # intervalles de confiance bootstrap (moyenne, p95, % erreurs) par label
+        "bootstrap_ci": _env_bool("BOOTSTRAP_CI"),
+        "bootstrap_sample_size": _env_int("BOOTSTRAP_SAMPLE_SIZE", 5000),
+        "bootstrap_resamples": _env_int("BOOTSTRAP_RESAMPLES", 1000),
+        "bootstrap_time_budget_s": _env_float("BOOTSTRAP_TIME_BUDGET_S", 5.0),
+        "bootstrap_seed": _env_int("BOOTSTRAP_SEED"),
+        # colonnes de recap supplémentaires, séparées par des virgules (ex : 90% Line (ms))
+        "recap_columns": [c.strip() for c in (os.getenv("RECAP_COLUMNS") or "").split(",") if c.strip()],
+    }
+
+    for key, value in options.items():
+        logging.info("%-20s= %s", key.upper(), value)
+
+    if options["execution_mode"] not in ("auto", "exact", "streaming", "sketch", "parallel", "spill"):
+        raise ValueError(f"EXECUTION_MODE invalide : {options['execution_mode']}")
+    if options["concurrency_bucket"] < 1:
+        raise ValueError(f"CONCURRENCY_BUCKET doit être >= 1 : {options['concurrency_bucket']}")
+
+    return options
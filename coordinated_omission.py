@@ -0,0 +1,93 @@
+from metrics import ordered_label_names
+from histogram import LogHistogram
+
+PERCENTILES = (90, 95, 99)
+
+# écarts gardés par (thread, label) pour estimer le pacing
+MAX_GAPS = 32
+MIN_GAPS = 5
+
+
+class CoordinatedOmissionCollector:
+    """
+    Collecteur pour compute_recap : latences corrigées de la coordinated
+    omission (modèle fermé JMeter : un serveur bloqué empêche l'envoi des
+    requêtes suivantes, les percentiles bruts sont donc trop optimistes).
+
+    Intervalle attendu entre deux requêtes :
+      - `expected_interval_ms` s'il est configuré ;
+      - sinon, par (threadName, label), la médiane des écarts entre débuts
+        successifs (pacing du thread), dès MIN_GAPS écarts observés.
+    Chaque échantillon plus long que l'intervalle rétro-remplit les
+    échantillons manqués (LogHistogram.record_with_expected_interval).
+    """
+
+    def __init__(self, expected_interval_ms=None, percentiles=PERCENTILES):
+        self.expected_interval_ms = expected_interval_ms
+        self.percentiles = percentiles
+        self.raw = {}        # label -> LogHistogram
+        self.corrected = {}  # label -> LogHistogram
+        self.intervals = {}  # label -> dernier intervalle utilisé
+        self.threads = {}    # (thread, label) -> [dernier ts, écarts]
+
+    def _interval(self, label, ts, row):
+        if self.expected_interval_ms:
+            return self.expected_interval_ms
+        key = (row.get("threadName"), label)
+        state = self.threads.get(key)
+        if state is None:
+            self.threads[key] = [ts, []]
+            return None
+        gaps = state[1]
+        if ts > state[0]:
+            gaps.append(ts - state[0])
+            if len(gaps) > MAX_GAPS:
+                del gaps[0]
+        state[0] = ts
+        if len(gaps) < MIN_GAPS:
+            return None
+        return sorted(gaps)[len(gaps) // 2]
+
+    def add(self, label, ts, elapsed, success, row):
+        raw = self.raw.get(label)
+        if raw is None:
+            raw = self.raw[label] = LogHistogram()
+            self.corrected[label] = LogHistogram()
+        raw.record(elapsed)
+
+        interval = self._interval(label, ts, row)
+        if interval:
+            self.corrected[label].record_with_expected_interval(elapsed, interval)
+            self.intervals[label] = interval
+        else:
+            self.corrected[label].record(elapsed)
+
+    def _row(self, label, raw, corrected, interval):
+        row = {
+            "Label": label,
+            "Samples": raw.total,
+            "Back-filled": corrected.total - raw.total,
+            "Expected Interval (ms)": interval if interval is not None else "",
+            "Raw Average (ms)": round(raw.mean(), 1),
+            "CO Average (ms)": round(corrected.mean(), 1),
+        }
+        for p in self.percentiles:
+            row[f"Raw P{p} (ms)"] = raw.percentile(p)
+            row[f"CO P{p} (ms)"] = corrected.percentile(p)
+        row["Max (ms)"] = raw.max
+        return row
+
+    def results(self):
+        """
+        Liste de dicts par label (puis TOTAL) : percentiles bruts et corrigés côte à côte.
+        """
+        out = []
+        total_raw = LogHistogram()
+        total_corrected = LogHistogram()
+        for label in ordered_label_names(self.raw):
+            out.append(self._row(label, self.raw[label], self.corrected[label], self.intervals.get(label)))
+            total_raw.merge(self.raw[label])
+            total_corrected.merge(self.corrected[label])
+        if total_raw.total:
+            out.append(self._row("TOTAL", total_raw, total_corrected, self.expected_interval_ms))
+        return out
@@ -0,0 +1,123 @@
+import re
+import heapq
+from datetime import datetime
+
+from metrics import ordered_label_names
+
+MAX_TEXT_LEN = 200
+
+_DIGITS_RE = re.compile(r"\d+")
+_HEX_RE = re.compile(r"\b[0-9a-fA-F]{8,}\b")
+
+TS_FMT = "%d/%m/%y %H:%M:%S"
+
+
+def normalize_message(text):
+    """
+    Réduit la cardinalité des messages dynamiques : identifiants hexadécimaux
+    et nombres remplacés par '#', texte tronqué.
+    """
+    if not text:
+        return ""
+    text = _HEX_RE.sub("#", text.strip())
+    text = _DIGITS_RE.sub("#", text)
+    return text[:MAX_TEXT_LEN]
+
+
+class SpaceSaving:
+    """
+    Sketch heavy-hitters « Space-Saving » (Metwally et al.) à `capacity` compteurs.
+    Quand il est plein, la clé la moins fréquente est remplacée par la nouvelle,
+    qui hérite de son compte (surestimation bornée par `error`).
+    Un tas paresseux donne le minimum sans parcourir les compteurs.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counters = {}  # key -> [count, error, first_ts, last_ts]
+        self._heap = []     # (count, key), entrées potentiellement périmées
+
+    def add(self, key, ts):
+        entry = self.counters.get(key)
+        if entry is not None:
+            entry[0] += 1
+            if ts < entry[2]:
+                entry[2] = ts
+            if ts > entry[3]:
+                entry[3] = ts
+            return
+
+        if len(self.counters) < self.capacity:
+            self.counters[key] = [1, 0, ts, ts]
+            heapq.heappush(self._heap, (1, key))
+            return
+
+        while True:
+            count, victim = heapq.heappop(self._heap)
+            current = self.counters.get(victim)
+            if current is not None and current[0] == count:
+                break
+            if current is not None:
+                heapq.heappush(self._heap, (current[0], victim))
+
+        del self.counters[victim]
+        self.counters[key] = [count + 1, count, ts, ts]
+        heapq.heappush(self._heap, (count + 1, key))
+
+    def top(self, k):
+        """
+        [(key, count, error, first_ts, last_ts)] trié par compte décroissant.
+        """
+        items = sorted(self.counters.items(), key=lambda kv: -kv[1][0])[:k]
+        return [(key, e[0], e[1], e[2], e[3]) for key, e in items]
+
+
+class ErrorCollector:
+    """
+    Collecteur pour compute_recap : signatures d'erreur par label
+    (responseCode, responseMessage, failureMessage) dans un sketch borné.
+    La mémoire est limitée à `capacity` signatures par label, quel que soit
+    le nombre de messages distincts.
+    """
+
+    def __init__(self, top_k=10, capacity=200):
+        self.top_k = top_k
+        self.capacity = capacity
+        self.sketches = {}  # label -> SpaceSaving
+        self.errors = {}    # label -> nombre total d'erreurs
+
+    def add(self, label, ts, elapsed, success, row):
+        if success:
+            return
+        key = (
+            (row.get("responseCode") or "").strip(),
+            normalize_message(row.get("responseMessage")),
+            normalize_message(row.get("failureMessage")),
+        )
+        sketch = self.sketches.get(label)
+        if sketch is None:
+            sketch = self.sketches[label] = SpaceSaving(self.capacity)
+        sketch.add(key, ts)
+        self.errors[label] = self.errors.get(label, 0) + 1
+
+    def results(self):
+        """
+        Liste de dicts : Label, Response Code, Response Message, Failure Message,
+        Count, Count Error (±), % of Label Errors, First Seen, Last Seen.
+        """
+        out = []
+        for label in ordered_label_names(self.sketches):
+            total = self.errors[label]
+            for (code, message, failure), count, error, first_ts, last_ts in self.sketches[label].top(self.top_k):
+                out.append({
+                    "Label": label,
+                    "Response Code": code,
+                    "Response Message": message,
+                    "Failure Message": failure,
+                    "Count": count,
+                    "Count Error (±)": error,
+                    "% of Label Errors": round(count / total * 100.0, 2),
+                    "First Seen": datetime.fromtimestamp(first_ts / 1000.0).strftime(TS_FMT),
+                    "Last Seen": datetime.fromtimestamp(last_ts / 1000.0).strftime(TS_FMT),
+                })
+        return out
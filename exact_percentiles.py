@@ -0,0 +1,214 @@
+import os
+import heapq
+import logging
+import tempfile
+from array import array
+
+from metrics import percentile
+
+PERCENTILES = (90, 95, 99)
+
+# octets par valeur (array "i" : entier 32 bits)
+VALUE_SIZE = array("i").itemsize
+
+# copie en liste Python pour le tri / la sélection (sorted, lows / highs de
+# metrics.select_pair) : objet int (28 octets) + pointeur (8) + sous-listes
+LIST_VALUE_SIZE = 44
+
+# pic par valeur bufferisée : buffer array + sa copie triée + blocs de
+# lecture des runs pendant la fusion. Le budget EXACT_MEMORY_MB couvre ce pic.
+PEAK_VALUE_SIZE = VALUE_SIZE + LIST_VALUE_SIZE + VALUE_SIZE
+
+
+class MemoryBudget:
+    """
+    Budget EXACT_MEMORY_MB en nombre de valeurs bufferisées, partageable
+    entre plusieurs collecteurs (un par niveau de concurrence) : le total
+    de tous les buffers reste sous le budget, quel que soit le nombre de
+    niveaux découverts pendant la passe.
+    """
+
+    def __init__(self, memory_mb=256):
+        self.max_values = max(int(memory_mb * 1024 * 1024 / PEAK_VALUE_SIZE), 1024)
+        self.buffered = 0
+        self.collectors = []
+
+    def spill_largest(self):
+        """
+        Déverse le plus gros buffer, tous collecteurs confondus.
+        """
+        collector, label = max(((c, lbl) for c in self.collectors for lbl in c.buffers),
+                               key=lambda item: len(item[0].buffers[item[1]]))
+        collector._spill(label)
+
+
+def _run_reader(path, chunk_values):
+    """
+    Lit un run trié sur disque par blocs de `chunk_values` entiers.
+    """
+    with open(path, "rb") as f:
+        while True:
+            chunk = array("i")
+            try:
+                chunk.fromfile(f, chunk_values)
+            except EOFError:
+                pass
+            if not chunk:
+                return
+            yield from chunk
+
+
+def _ranks_for(count, percentiles):
+    """
+    Rangs (0-based) nécessaires pour l'interpolation de metrics.percentile.
+    """
+    ranks = set()
+    for p in percentiles:
+        k = (count - 1) * (p / 100.0)
+        f = int(k)
+        ranks.add(f)
+        ranks.add(min(f + 1, count - 1))
+    return ranks
+
+
+def _interpolate(count, p, values_at):
+    k = (count - 1) * (p / 100.0)
+    f = int(k)
+    c = min(f + 1, count - 1)
+    if f == c:
+        return values_at[f]
+    return values_at[f] * (c - k) + values_at[c] * (k - f)
+
+
+class ExactPercentileCollector:
+    """
+    Collecteur pour compute_recap : percentiles exacts (pas d'approximation
+    de sketch) avec un budget mémoire plafonné.
+
+    Les elapsed sont bufferisés par label en entiers 32 bits. Le budget
+    compte aussi les copies faites pour trier / sélectionner (PEAK_VALUE_SIZE
+    par valeur bufferisée) : quand le total dépasse budget / PEAK_VALUE_SIZE
+    valeurs, le plus gros buffer est trié et déversé sur disque (run de
+    largeur fixe). `budget` (MemoryBudget) partage ce plafond entre
+    plusieurs collecteurs ; par défaut le collecteur a le sien. Les buffers
+    restants tiennent donc toujours, avec leurs copies, dans le budget en
+    fin de passe :
+      - label sans run : sélection linéaire (metrics.percentile) en mémoire ;
+      - sinon : fusion k-voies en flux des runs, on ne garde que les rangs demandés.
+    """
+
+    def __init__(self, memory_mb=256, percentiles=PERCENTILES, spill_dir=None, budget=None):
+        self.budget = budget or MemoryBudget(memory_mb)
+        self.budget.collectors.append(self)
+        self.max_values = self.budget.max_values
+        self.percentiles = percentiles
+        self.spill_dir = spill_dir
+        self.buffers = {}   # label -> array("i")
+        self.runs = {}      # label -> [chemins des runs]
+        self.counts = {}    # label -> nombre total de valeurs
+        self.buffered = 0
+
+    def add(self, label, ts, elapsed, success, row):
+        buf = self.buffers.get(label)
+        if buf is None:
+            buf = self.buffers[label] = array("i")
+            self.counts[label] = 0
+        buf.append(int(round(elapsed)))
+        self.counts[label] += 1
+        self.buffered += 1
+        self.budget.buffered += 1
+        if self.budget.buffered >= self.max_values:
+            self.budget.spill_largest()
+
+    def _spill(self, label):
+        buf = self.buffers[label]
+        run = array("i", sorted(buf))
+        fd, path = tempfile.mkstemp(prefix="jmeter_run_", suffix=".bin", dir=self.spill_dir)
+        with os.fdopen(fd, "wb") as f:
+            run.tofile(f)
+        self.runs.setdefault(label, []).append(path)
+        self.buffered -= len(buf)
+        self.budget.buffered -= len(buf)
+        self.buffers[label] = array("i")
+        logging.info("  -> percentiles exacts : %d valeurs de '%s' déversées sur disque", len(run), label)
+
+    def _streams(self, labels):
+        """
+        Flux triés (runs disque + buffers triés en mémoire) des labels donnés,
+        avec des blocs de lecture dimensionnés sur le budget. Les copies
+        triées des buffers totalisent au plus max_values valeurs (budget).
+        """
+        paths = [path for lbl in labels for path in self.runs.get(lbl, [])]
+        chunk_values = max(self.max_values // (len(paths) + 1), 1024)
+        streams = [_run_reader(path, chunk_values) for path in paths]
+        for lbl in labels:
+            if self.buffers[lbl]:
+                streams.append(iter(sorted(self.buffers[lbl])))
+        return streams
+
+    def _merged_percentiles(self, labels, count):
+        ranks = _ranks_for(count, self.percentiles)
+        last_rank = max(ranks)
+        values_at = {}
+        for rank, value in enumerate(heapq.merge(*self._streams(labels))):
+            if rank in ranks:
+                values_at[rank] = value
+                if rank == last_rank:
+                    break
+        return {p: _interpolate(count, p, values_at) for p in self.percentiles}
+
+    def results(self):
+        """
+        label -> {p: valeur}, plus "TOTAL" (tous labels confondus).
+        Les fichiers de runs sont supprimés ensuite.
+        """
+        out = {}
+        try:
+            for label, count in self.counts.items():
+                if not count:
+                    continue
+                if label not in self.runs:
+                    buf = self.buffers[label]
+                    out[label] = {p: percentile(buf, p) for p in self.percentiles}
+                else:
+                    out[label] = self._merged_percentiles([label], count)
+
+            total = sum(self.counts.values())
+            if total:
+                out["TOTAL"] = self._merged_percentiles(list(self.counts), total)
+        finally:
+            self.cleanup()
+        return out
+
+    def cleanup(self):
+        """
+        Supprime les runs et rend les buffers au budget (partagé) : le
+        collecteur est vide ensuite.
+        """
+        self.budget.buffered -= self.buffered
+        self.buffered = 0
+        self.buffers = {}
+        self.counts = {}
+        if self in self.budget.collectors:
+            self.budget.collectors.remove(self)
+        for paths in self.runs.values():
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self.runs = {}
+
+    def apply_to_recap(self, recap):
+        """
+        Ajoute les colonnes "90% Line (ms)", "95% Line (ms)", "99% Line (ms)"
+        aux lignes du recap.
+        """
+        results = self.results()
+        for row in recap:
+            values = results.get(row["Label"])
+            if values is None:
+                continue
+            for p, v in values.items():
+                row[f"{p}% Line (ms)"] = round(v, 2)
+        return recap
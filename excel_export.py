@@ -3,6 +3,45 @@ import logging
 import xlsxwriter
 from metrics import LABEL_ORDER
 
+# colonnes type JMeter de chaque feuille de scénario (en-tête Excel, clé du recap) ;
+# déclarées au planificateur de métriques (metric_graph) par pipeline.required_columns
+RECAP_COLUMNS = [
+    ("Label", "Label"),
+    ("# Samples", "Samples"),
+    ("Average", "Average (ms)"),
+    ("Min", "Min (ms)"),
+    ("Max", "Max (ms)"),
+    ("Std. Dev.", "Std Dev (ms)"),
+    ("Error %", "Error %"),
+    ("Throughput", "Throughput (/min)"),
+    ("Received KB/sec", "Received KB/sec"),
+    ("Sent KB/sec", "Sent KB/sec"),
+    ("Avg. Bytes", "Avg Bytes"),
+]
+
+# colonnes ajoutées seulement si au moins une ligne du recap les contient
+# (en-tête Excel, clé du recap)
+OPTIONAL_COLUMNS = [
+    ("Sample Size", "Sample Size"),
+    ("Average CI (95%)", "Average CI (ms)"),
+    ("90% Line", "90% Line (ms)"),
+    ("95% Line", "95% Line (ms)"),
+    ("99% Line", "99% Line (ms)"),
+    ("95% Line CI", "95% CI (ms)"),
+    ("Error % CI", "Error % CI"),
+    ("Apdex", "Apdex"),
+    ("SLA", "SLA"),
+    ("SLA Details", "SLA Details"),
+]
+
+INT_COLUMNS = ["Average", "Min", "Max", "90% Line", "95% Line", "99% Line"]
+
+APPROX_NOTE = "APPROXIMATIF : mode preview sur échantillon, intervalles de confiance à 95 %"
+
+
+def is_approximate(rows) -> bool:
+    return any(r.get("Approximate") for r in rows)
+
 
 def sanitize_sheet_name(name: str) -> str:
     name = re.sub(r'[:\\/?*\[\]]', "_", name)
@@ -17,7 +56,17 @@ def write_excel(output_file: str,
                 scenarios_data: dict,
                 scenarios_users: list,
                 rt_matrix: dict,
-                err_matrix: dict):
+                err_matrix: dict,
+                scenario_windows: dict = None,
+                latency_breakdowns: dict = None,
+                error_breakdowns: dict = None,
+                sla_matrix: dict = None,
+                capacity: tuple = None,
+                co_breakdowns: dict = None,
+                heatmaps: dict = None,
+                resource_usage: dict = None,
+                resource_demand: dict = None,
+                anomalies: dict = None):
     logging.info("Création du fichier Excel : %s", output_file)
     workbook = xlsxwriter.Workbook(output_file)
 
@@ -29,35 +78,22 @@ def write_excel(output_file: str,
     cell_fmt = workbook.add_format({"border": 1})
     num_fmt = workbook.add_format({"border": 1, "num_format": "0.00"})
     int_fmt = workbook.add_format({"border": 1, "num_format": "0"})
+    approx_fmt = workbook.add_format({"bold": True, "font_color": "#C00000"})
+    bold_fmt = workbook.add_format({"bold": True})
+    pass_fmt = workbook.add_format({"bg_color": "#C6EFCE", "font_color": "#006100"})
+    fail_fmt = workbook.add_format({"bg_color": "#FFC7CE", "font_color": "#9C0006"})
+
+    def add_sla_formatting(ws, first_row, last_row, col):
+        if last_row < first_row:
+            return
+        ws.conditional_format(first_row, col, last_row, col, {
+            "type": "cell", "criteria": "==", "value": '"PASS"', "format": pass_fmt})
+        ws.conditional_format(first_row, col, last_row, col, {
+            "type": "cell", "criteria": "==", "value": '"FAIL"', "format": fail_fmt})
 
     # colonnes type JMeter pour chaque scénario
-    headers = [
-        "Label",
-        "# Samples",
-        "Average",
-        "Min",
-        "Max",
-        "Std. Dev.",
-        "Error %",
-        "Throughput",
-        "Received KB/sec",
-        "Sent KB/sec",
-        "Avg. Bytes",
-    ]
-
-    col_key_map = {
-        "Label": "Label",
-        "# Samples": "Samples",
-        "Average": "Average (ms)",
-        "Min": "Min (ms)",
-        "Max": "Max (ms)",
-        "Std. Dev.": "Std Dev (ms)",
-        "Error %": "Error %",
-        "Throughput": "Throughput (/min)",
-        "Received KB/sec": "Received KB/sec",
-        "Sent KB/sec": "Sent KB/sec",
-        "Avg. Bytes": "Avg Bytes",
-    }
+    headers = [h for h, _ in RECAP_COLUMNS]
+    col_key_map = dict(RECAP_COLUMNS)
 
     # Feuilles par scénario
     for sheet_name_raw, rows in scenarios_data.items():
@@ -70,29 +106,48 @@ def write_excel(output_file: str,
             logging.warning("    (Aucune donnée pour ce scénario)")
             continue
 
-        for col, h in enumerate(headers):
+        sheet_headers = list(headers)
+        sheet_keys = dict(col_key_map)
+        for h, key in OPTIONAL_COLUMNS:
+            if any(key in r for r in rows):
+                sheet_headers.append(h)
+                sheet_keys[h] = key
+
+        for col, h in enumerate(sheet_headers):
             ws.write(0, col, h, header_fmt)
 
         for row_idx, row in enumerate(rows, start=1):
-            for col_idx, h in enumerate(headers):
-                key = col_key_map[h]
+            for col_idx, h in enumerate(sheet_headers):
+                key = sheet_keys[h]
                 val = row.get(key, "")
                 if isinstance(val, (int, float)):
-                    if h in ["Average", "Min", "Max"]:
+                    if h in INT_COLUMNS:
                         ws.write(row_idx, col_idx, int(round(val)), int_fmt)
                     else:
                         ws.write(row_idx, col_idx, val, num_fmt)
                 else:
                     ws.write(row_idx, col_idx, str(val), cell_fmt)
 
+        if "SLA" in sheet_headers:
+            add_sla_formatting(ws, 1, len(rows), sheet_headers.index("SLA"))
+
+        note_row = len(rows) + 2
+        if is_approximate(rows):
+            ws.write(note_row, 0, APPROX_NOTE, approx_fmt)
+            note_row += 1
+        if scenario_windows and sheet_name_raw in scenario_windows:
+            ws.write(note_row, 0, f"Fenêtre stable : {scenario_windows[sheet_name_raw]}", bold_fmt)
+
         ws.set_column(0, 0, 40)
-        ws.set_column(1, len(headers) - 1, 16)
+        ws.set_column(1, len(sheet_headers) - 1, 16)
 
     # Onglet Data Time Response Time
     ws_rt = workbook.add_worksheet("Data Time Response Time")
     ws_rt.write(0, 0, "Scenario", header_fmt)
     ws_rt.write(0, 1, "API", header_fmt)
     ws_rt.write(0, 2, "Response Time (ms)", header_fmt)
+    if sla_matrix:
+        ws_rt.write(0, 3, "SLA", header_fmt)
 
     row_idx = 1
     for users in sorted(scenarios_users):
@@ -103,11 +158,20 @@ def write_excel(output_file: str,
                 continue
             ws_rt.write(row_idx, 1, label, cell_fmt)
             ws_rt.write(row_idx, 2, int(round(val)), int_fmt)
+            if sla_matrix:
+                ws_rt.write(row_idx, 3, sla_matrix.get(label, {}).get(users, ""), cell_fmt)
             row_idx += 1
         end_row = row_idx - 1
         if end_row >= start_row:
             ws_rt.merge_range(start_row, 0, end_row, 0, users, int_fmt)
 
+    if sla_matrix:
+        add_sla_formatting(ws_rt, 1, row_idx - 1, 3)
+
+    approximate = any(is_approximate(rows) for rows in scenarios_data.values())
+    if approximate:
+        ws_rt.write(0, 4, APPROX_NOTE, approx_fmt)
+
     ws_rt.set_column(0, 0, 12)
     ws_rt.set_column(1, 1, 20)
     ws_rt.set_column(2, 2, 20)
@@ -117,6 +181,8 @@ def write_excel(output_file: str,
     ws_err.write(0, 0, "Scenario", header_fmt)
     ws_err.write(0, 1, "API", header_fmt)
     ws_err.write(0, 2, "Error Rate (%)", header_fmt)
+    if sla_matrix:
+        ws_err.write(0, 3, "SLA", header_fmt)
 
     row_idx = 1
     for users in sorted(scenarios_users):
@@ -132,15 +198,169 @@ def write_excel(output_file: str,
             else:
                 s = f"{val:.2f}"
             ws_err.write(row_idx, 2, s, cell_fmt)
+            if sla_matrix:
+                ws_err.write(row_idx, 3, sla_matrix.get(label, {}).get(users, ""), cell_fmt)
 
             row_idx += 1
         end_row = row_idx - 1
         if end_row >= start_row:
             ws_err.merge_range(start_row, 0, end_row, 0, users, int_fmt)
 
+    if sla_matrix:
+        add_sla_formatting(ws_err, 1, row_idx - 1, 3)
+
+    if approximate:
+        ws_err.write(0, 4, APPROX_NOTE, approx_fmt)
+
     ws_err.set_column(0, 0, 12)
     ws_err.set_column(1, 1, 20)
     ws_err.set_column(2, 2, 20)
 
+    formats = (header_fmt, cell_fmt, num_fmt, int_fmt)
+    if latency_breakdowns:
+        write_grouped_sheet(workbook, "Latency Breakdown", latency_breakdowns, formats)
+    if error_breakdowns:
+        write_grouped_sheet(workbook, "Errors", error_breakdowns, formats)
+    if co_breakdowns:
+        write_grouped_sheet(workbook, "Coordinated Omission", co_breakdowns, formats)
+    if capacity:
+        write_capacity_sheet(workbook, capacity, formats, bold_fmt)
+    if resource_usage:
+        write_grouped_sheet(workbook, "Resources", resource_usage, formats)
+    if resource_demand:
+        write_grouped_sheet(workbook, "Resource Demand", resource_demand, formats)
+    if anomalies:
+        write_grouped_sheet(workbook, "Anomalies", anomalies, formats)
+    if heatmaps:
+        write_heatmap_sheet(workbook, heatmaps, formats, bold_fmt)
+
     workbook.close()
     logging.info("Fichier Excel finalisé.")
+
+
+def write_grouped_sheet(workbook, sheet_name, rows_by_users, formats):
+    """
+    Onglet « Scenario | API | colonnes... » : users -> liste de dicts avec "Label"
+    (ex : LatencyBreakdownCollector.results(), ErrorCollector.results()).
+    """
+    header_fmt, cell_fmt, num_fmt, int_fmt = formats
+    ws = workbook.add_worksheet(sheet_name)
+    keys = []
+    for rows in rows_by_users.values():
+        for r in rows:
+            for k in r:
+                if k not in keys and k != "Label":
+                    keys.append(k)
+
+    ws.write(0, 0, "Scenario", header_fmt)
+    ws.write(0, 1, "API", header_fmt)
+    for col, k in enumerate(keys, start=2):
+        ws.write(0, col, k, header_fmt)
+
+    row_idx = 1
+    for users in sorted(rows_by_users):
+        start_row = row_idx
+        for r in rows_by_users[users]:
+            ws.write(row_idx, 1, r["Label"], cell_fmt)
+            for col, k in enumerate(keys, start=2):
+                val = r.get(k, "")
+                if isinstance(val, int):
+                    ws.write(row_idx, col, val, int_fmt)
+                elif isinstance(val, float):
+                    ws.write(row_idx, col, val, num_fmt)
+                else:
+                    ws.write(row_idx, col, str(val), cell_fmt)
+            row_idx += 1
+        end_row = row_idx - 1
+        if end_row > start_row:
+            ws.merge_range(start_row, 0, end_row, 0, users, int_fmt)
+        elif end_row == start_row:
+            ws.write(start_row, 0, users, int_fmt)
+
+    ws.set_column(0, 0, 12)
+    ws.set_column(1, 1, 30)
+    ws.set_column(2, len(keys) + 1, 18)
+
+
+def _write_dict_table(ws, start_row, rows, formats):
+    """
+    Table à partir d'une liste de dicts (colonnes = union des clés, dans l'ordre).
+    Retourne la ligne suivant la table.
+    """
+    header_fmt, cell_fmt, num_fmt, int_fmt = formats
+    keys = []
+    for r in rows:
+        for k in r:
+            if k not in keys:
+                keys.append(k)
+
+    for col, k in enumerate(keys):
+        ws.write(start_row, col, k, header_fmt)
+    for row_idx, r in enumerate(rows, start=start_row + 1):
+        for col, k in enumerate(keys):
+            val = r.get(k, "")
+            if isinstance(val, int):
+                ws.write(row_idx, col, val, int_fmt)
+            elif isinstance(val, float):
+                ws.write(row_idx, col, val, num_fmt)
+            else:
+                ws.write(row_idx, col, str(val), cell_fmt)
+    return start_row + len(rows) + 1
+
+
+def write_capacity_sheet(workbook, capacity, formats, title_fmt):
+    """
+    Onglet Capacity : paramètres USL par label, puis courbe mesurée/ajustée.
+    capacity : (params, curve) de capacity.analyse_capacity.
+    """
+    params, curve = capacity
+    ws = workbook.add_worksheet("Capacity")
+    ws.write(0, 0, "Universal Scalability Law : X(N) = λN / (1 + σ(N-1) + κN(N-1))", title_fmt)
+    next_row = _write_dict_table(ws, 2, params, formats)
+    ws.write(next_row + 1, 0, "Courbe mesurée / ajustée, résidus et loi de Little", title_fmt)
+    _write_dict_table(ws, next_row + 3, curve, formats)
+    ws.set_column(0, 0, 30)
+    ws.set_column(1, 8, 20)
+
+
+def write_heatmap_sheet(workbook, heatmaps, formats, title_fmt):
+    """
+    Onglet Latency Heatmap : pour chaque palier et chaque label (+ TOTAL),
+    nombre d'échantillons par tranche de latence (lignes, la plus haute en
+    haut) et par tranche de temps (colonnes), en échelle 3 couleurs.
+    heatmaps : users -> LatencyHeatmapCollector.results().
+    """
+    header_fmt, cell_fmt, num_fmt, int_fmt = formats
+    ws = workbook.add_worksheet("Latency Heatmap")
+    max_cols = 0
+    row_idx = 0
+    for users in sorted(heatmaps):
+        heatmap = heatmaps[users]
+        if not heatmap:
+            continue
+        columns = heatmap["columns"]
+        max_cols = max(max_cols, len(columns))
+        for label, matrix in heatmap["labels"].items():
+            ws.write(row_idx, 0, f"{users} users - {label} (colonnes de {heatmap['col_ms'] / 1000:g} s)",
+                     title_fmt)
+            row_idx += 1
+            ws.write(row_idx, 0, "Latency (ms)", header_fmt)
+            for col, name in enumerate(columns, start=1):
+                ws.write(row_idx, col, name, header_fmt)
+            first_row = row_idx + 1
+            for r, line in enumerate(matrix, start=first_row):
+                ws.write(r, 0, heatmap["rows"][r - first_row], header_fmt)
+                for col, count in enumerate(line, start=1):
+                    ws.write(r, col, count, int_fmt)
+            last_row = first_row + len(matrix) - 1
+            ws.conditional_format(first_row, 1, last_row, len(columns), {
+                "type": "3_color_scale",
+                "min_color": "#FFFFFF",
+                "mid_color": "#FFEB84",
+                "max_color": "#F8696B",
+            })
+            row_idx = last_row + 2
+
+    ws.set_column(0, 0, 16)
+    if max_cols:
+        ws.set_column(1, max_cols, 9)
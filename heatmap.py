@@ -0,0 +1,139 @@
+from array import array
+from datetime import datetime
+
+from metrics import ordered_label_names
+from histogram import bucket_index, bucket_bounds
+
+# lignes : buckets log à 2 sous-buckets par puissance de 2 (0, 1, 2, 3, 4-5, 6-7, 8-11, ...)
+ROW_BITS = 1
+# au-delà, tout tombe dans la dernière ligne (« >= 65536 ms »)
+MAX_LATENCY_MS = 1 << 16
+ROWS = bucket_index(MAX_LATENCY_MS, ROW_BITS) + 1
+
+
+def _zero_grid(size):
+    """
+    array("I") de `size` zéros (taille d'un élément selon la plateforme).
+    """
+    grid = array("I")
+    grid.frombytes(bytes(size * grid.itemsize))
+    return grid
+
+
+def row_label(row):
+    lo, hi = bucket_bounds(row, ROW_BITS)
+    if row == ROWS - 1:
+        return f">= {lo}"
+    if lo == hi:
+        return str(lo)
+    return f"{lo}-{hi}"
+
+
+class LatencyHeatmapCollector:
+    """
+    Collecteur pour compute_recap : histogramme latence x temps par label,
+    pour voir les distributions bimodales (GC, cache) que moyenne et
+    percentiles masquent.
+
+    Chaque label tient un tableau d'entiers plat (array "I") de ROWS x
+    `max_columns` cases : mémoire fixe quelle que soit la durée du run.
+    Les colonnes font `bucket_s` secondes au départ ; quand le run dépasse
+    `max_columns` colonnes, la largeur double et les colonnes adjacentes
+    sont fusionnées deux à deux (pour tous les labels).
+    """
+
+    def __init__(self, bucket_s=1, max_columns=60):
+        self.col_ms = max(int(bucket_s * 1000), 1)
+        self.max_columns = max(int(max_columns), 2)
+        self.start_ms = None
+        self.used_columns = 0
+        self.grids = {}  # label -> array("I"), case = colonne * ROWS + ligne
+
+    def _widen(self):
+        for label, grid in self.grids.items():
+            merged = _zero_grid(len(grid))
+            for col in range(self.max_columns):
+                dst = (col // 2) * ROWS
+                src = col * ROWS
+                for row in range(ROWS):
+                    merged[dst + row] += grid[src + row]
+            self.grids[label] = merged
+        self.col_ms *= 2
+        self.used_columns = (self.used_columns + 1) // 2
+
+    def add(self, label, ts, elapsed, success, row):
+        if self.start_ms is None:
+            self.start_ms = ts
+        col = max(ts - self.start_ms, 0) // self.col_ms
+        while col >= self.max_columns:
+            self._widen()
+            col = max(ts - self.start_ms, 0) // self.col_ms
+        if col >= self.used_columns:
+            self.used_columns = col + 1
+
+        grid = self.grids.get(label)
+        if grid is None:
+            grid = self.grids[label] = _zero_grid(ROWS * self.max_columns)
+        value = min(max(int(elapsed), 0), MAX_LATENCY_MS)
+        grid[col * ROWS + bucket_index(value, ROW_BITS)] += 1
+
+    def results(self):
+        """
+        dict avec :
+          columns : libellés HH:MM:SS du début de chaque colonne
+          col_ms  : largeur d'une colonne
+          rows    : libellés des lignes de latence (ms), de la plus haute à la plus basse
+          labels  : label (+ TOTAL) -> matrice [ligne][colonne] alignée sur `rows`
+        Seules les lignes de latence effectivement atteintes sont gardées.
+        """
+        if self.start_ms is None:
+            return None
+
+        n_cols = self.used_columns
+        total = _zero_grid(ROWS * self.max_columns)
+        ordered = ordered_label_names(self.grids)
+        for label in ordered:
+            grid = self.grids[label]
+            for i in range(ROWS * n_cols):
+                total[i] += grid[i]
+
+        used_rows = [r for r in range(ROWS) if any(total[c * ROWS + r] for c in range(n_cols))]
+        if not used_rows:
+            return None
+        rows = list(range(used_rows[-1], used_rows[0] - 1, -1))
+
+        matrices = {}
+        for label, grid in [(lbl, self.grids[lbl]) for lbl in ordered] + [("TOTAL", total)]:
+            matrices[label] = [[grid[c * ROWS + r] for c in range(n_cols)] for r in rows]
+
+        columns = [datetime.fromtimestamp((self.start_ms + c * self.col_ms) / 1000.0).strftime("%H:%M:%S")
+                   for c in range(n_cols)]
+        return {
+            "columns": columns,
+            "col_ms": self.col_ms,
+            "rows": [row_label(r) for r in rows],
+            "labels": matrices,
+        }
+
+
+def merge_columns(heatmap, max_columns):
+    """
+    Copie de `heatmap` (results()) avec au plus `max_columns` colonnes,
+    par fusion de colonnes adjacentes (pour les tableaux Word).
+    """
+    n_cols = len(heatmap["columns"])
+    factor = 1
+    while (n_cols + factor - 1) // factor > max_columns:
+        factor *= 2
+    if factor == 1:
+        return heatmap
+
+    labels = {}
+    for label, matrix in heatmap["labels"].items():
+        labels[label] = [[sum(line[c:c + factor]) for c in range(0, n_cols, factor)] for line in matrix]
+    return {
+        "columns": heatmap["columns"][::factor],
+        "col_ms": heatmap["col_ms"] * factor,
+        "rows": heatmap["rows"],
+        "labels": labels,
+    }
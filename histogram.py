@@ -0,0 +1,167 @@
+import math
+
+# sous-buckets par puissance de 2 : précision relative ~1/64 (~1.6 %)
+SUB_BUCKET_BITS = 6
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+def bucket_index(value, bits=SUB_BUCKET_BITS):
+    """
+    Index du bucket logarithmique (façon HdrHistogram) d'une valeur entière >= 0.
+    Exact jusqu'à 2^bits, puis 2^bits buckets par puissance de 2
+    (`bits` plus petit : buckets plus grossiers, ex : lignes d'une heatmap).
+    """
+    sub_buckets = 1 << bits
+    if value < sub_buckets:
+        return value
+    shift = value.bit_length() - bits - 1
+    return (shift + 1) * sub_buckets + (value >> shift) - sub_buckets
+
+
+def bucket_bounds(index, bits=SUB_BUCKET_BITS):
+    """
+    [plus petite, plus grande] valeur couverte par le bucket.
+    """
+    sub_buckets = 1 << bits
+    if index < sub_buckets:
+        return index, index
+    shift = index // sub_buckets - 1
+    mantissa = index % sub_buckets + sub_buckets
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class LogHistogram:
+    """
+    Histogramme logarithmique à mémoire bornée (quelques centaines de buckets
+    pour des latences en ms), fusionnable. La somme est exacte, les
+    percentiles ont la précision du bucket (borne haute, comme HdrHistogram).
+    """
+
+    def __init__(self):
+        self.counts = {}  # index -> count
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value, count=1):
+        value = max(int(value), 0)
+        idx = bucket_index(value)
+        self.counts[idx] = self.counts.get(idx, 0) + count
+        self.total += count
+        self.sum += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def record_with_expected_interval(self, value, interval):
+        """
+        Enregistre `value` puis, si elle dépasse l'intervalle attendu, les
+        échantillons « manqués » value - interval, value - 2.interval, ... >= interval
+        (correction de coordinated omission d'HdrHistogram). Les valeurs
+        rétro-remplies sont ajoutées par bucket, pas une à une.
+        Retourne le nombre d'échantillons ajoutés.
+        """
+        value = max(int(value), 0)
+        self.record(value)
+        interval = int(interval)
+        if interval <= 0 or value < 2 * interval:
+            return 0
+
+        added = 0
+        current = value - interval
+        while current >= interval:
+            idx = bucket_index(current)
+            low = max(bucket_bounds(idx)[0], interval)
+            n = (current - low) // interval + 1
+            self.counts[idx] = self.counts.get(idx, 0) + n
+            # somme exacte de la progression current, current - i, ..., current - (n-1)i
+            self.sum += n * current - interval * n * (n - 1) // 2
+            self.total += n
+            added += n
+            current -= n * interval
+        smallest = current + interval
+        if added and smallest < self.min:
+            self.min = smallest
+        return added
+
+    def merge(self, other):
+        for idx, count in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def mean(self):
+        return self.sum / self.total if self.total else None
+
+    def percentile(self, p):
+        if not self.total:
+            return None
+        rank = max(int(math.ceil(p / 100.0 * self.total)), 1)
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= rank:
+                return min(bucket_bounds(idx)[1], self.max)
+        return self.max
+
+
+class HistogramPercentileCollector:
+    """
+    Collecteur pour compute_recap : percentiles approchés (précision du
+    bucket, ~1.6 %) en mémoire fixe par label, fusionnables entre morceaux
+    de fichier. Même interface que exact_percentiles.ExactPercentileCollector.
+    """
+
+    # alimentable par fusion de plages (chunked.compute_recap_chunked)
+    mergeable = True
+    needs_histograms = True
+
+    def __init__(self, percentiles=(90, 95, 99)):
+        self.percentiles = percentiles
+        self.histograms = {}  # label -> LogHistogram
+
+    def add(self, label, ts, elapsed, success, row):
+        hist = self.histograms.get(label)
+        if hist is None:
+            hist = self.histograms[label] = LogHistogram()
+        hist.record(elapsed)
+
+    def merge_part(self, part):
+        self.merge(part["histograms"])
+
+    def merge(self, histograms):
+        for label, hist in histograms.items():
+            into = self.histograms.get(label)
+            if into is None:
+                into = self.histograms[label] = LogHistogram()
+            into.merge(hist)
+
+    def results(self):
+        """
+        label -> {p: valeur}, plus "TOTAL".
+        """
+        out = {}
+        total = LogHistogram()
+        for label, hist in self.histograms.items():
+            out[label] = {p: hist.percentile(p) for p in self.percentiles}
+            total.merge(hist)
+        if total.total:
+            out["TOTAL"] = {p: total.percentile(p) for p in self.percentiles}
+        return out
+
+    def apply_to_recap(self, recap):
+        results = self.results()
+        for row in recap:
+            values = results.get(row["Label"])
+            if values is None:
+                continue
+            for p, v in values.items():
+                row[f"{p}% Line (ms)"] = v
+        return recap
@@ -0,0 +1,167 @@
+import html
+import logging
+from datetime import datetime
+
+from metrics import LABEL_ORDER
+from timeseries import lttb
+
+PALETTE = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+           "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"]
+
+RECAP_COLUMNS = [
+    ("Label", "Label"),
+    ("# Samples", "Samples"),
+    ("Average", "Average (ms)"),
+    ("Min", "Min (ms)"),
+    ("Max", "Max (ms)"),
+    ("Std. Dev.", "Std Dev (ms)"),
+    ("Error %", "Error %"),
+    ("Throughput", "Throughput (/min)"),
+    ("Received KB/sec", "Received KB/sec"),
+    ("Sent KB/sec", "Sent KB/sec"),
+    ("Avg. Bytes", "Avg Bytes"),
+]
+
+CSS = """
+body { font-family: Segoe UI, Arial, sans-serif; margin: 24px; color: #222; }
+h1 { font-size: 22px; } h2 { font-size: 18px; margin-top: 32px; } h3 { font-size: 15px; }
+table { border-collapse: collapse; margin: 8px 0 16px; font-size: 12px; }
+th, td { border: 1px solid #999; padding: 3px 8px; text-align: right; }
+th { background: #d9d9d9; } td:first-child, th:first-child { text-align: left; }
+.note { color: #c00000; font-weight: bold; }
+svg { background: #fff; border: 1px solid #ddd; }
+svg text { font-size: 11px; fill: #444; }
+.legend span { display: inline-block; margin-right: 14px; font-size: 12px; }
+.legend i { display: inline-block; width: 12px; height: 3px; margin-right: 4px; vertical-align: middle; }
+"""
+
+
+def _esc(value):
+    return html.escape(str(value))
+
+
+def _table(headers, rows):
+    out = ["<table><tr>"]
+    out += [f"<th>{_esc(h)}</th>" for h in headers]
+    out.append("</tr>")
+    for cells in rows:
+        out.append("<tr>" + "".join(f"<td>{_esc(c)}</td>" for c in cells) + "</tr>")
+    out.append("</table>")
+    return "".join(out)
+
+
+def _fmt_time(ts_ms):
+    return datetime.fromtimestamp(ts_ms / 1000.0).strftime("%H:%M:%S")
+
+
+def svg_line_chart(lines, title, width=960, height=260):
+    """
+    Graphique SVG statique. lines : [(nom, [(x_ms, y)])], déjà sous-échantillonnées.
+    """
+    lines = [(name, pts) for name, pts in lines if pts]
+    if not lines:
+        return ""
+
+    left, right, top, bottom = 60, 10, 24, 28
+    xs = [p[0] for _, pts in lines for p in pts]
+    ys = [p[1] for _, pts in lines for p in pts]
+    x_min, x_max = min(xs), max(xs)
+    y_max = max(ys) or 1.0
+    x_span = (x_max - x_min) or 1
+    plot_w = width - left - right
+    plot_h = height - top - bottom
+
+    def sx(x):
+        return left + (x - x_min) / x_span * plot_w
+
+    def sy(y):
+        return top + plot_h - y / y_max * plot_h
+
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+           f'viewBox="0 0 {width} {height}">',
+           f'<text x="{left}" y="15" font-weight="bold">{_esc(title)}</text>']
+
+    for i in range(5):
+        y = y_max * i / 4
+        py = sy(y)
+        out.append(f'<line x1="{left}" y1="{py:.1f}" x2="{width - right}" y2="{py:.1f}" stroke="#eee"/>')
+        out.append(f'<text x="{left - 6}" y="{py + 4:.1f}" text-anchor="end">{y:.0f}</text>')
+    for i in range(5):
+        x = x_min + x_span * i / 4
+        out.append(f'<text x="{sx(x):.1f}" y="{height - 8}" text-anchor="middle">{_fmt_time(x)}</text>')
+
+    legend = []
+    for i, (name, pts) in enumerate(lines):
+        color = PALETTE[i % len(PALETTE)]
+        coords = " ".join(f"{sx(x):.1f},{sy(y):.1f}" for x, y in pts)
+        out.append(f'<polyline fill="none" stroke="{color}" stroke-width="1.2" points="{coords}">'
+                   f'<title>{_esc(name)}</title></polyline>')
+        legend.append(f'<span><i style="background:{color}"></i>{_esc(name)}</span>')
+
+    out.append("</svg>")
+    return "".join(out) + '<div class="legend">' + "".join(legend) + "</div>"
+
+
+def _scenario_charts(series, bucket_s, max_points):
+    latency_lines = []
+    for label, points in series.items():
+        if label == "TOTAL":
+            continue
+        # tranches vides : pas de temps de réponse
+        latency_lines.append((label, lttb([(p[0], p[2]) for p in points if p[1]], max_points)))
+
+    total = series.get("TOTAL", [])
+    throughput = lttb([(p[0], p[1] / bucket_s) for p in total], max_points)
+    errors = lttb([(p[0], p[3] / bucket_s) for p in total], max_points)
+
+    return (svg_line_chart(latency_lines, "Temps de réponse moyen (ms)")
+            + svg_line_chart([("Débit (req/s)", throughput), ("Erreurs (/s)", errors)],
+                             "Débit et erreurs (/s)"))
+
+
+def _matrix_table(matrix, scenarios_users, fmt):
+    rows = []
+    for label in LABEL_ORDER:
+        values = matrix.get(label, {})
+        if not values:
+            continue
+        rows.append([label] + [fmt(values[u]) if u in values else "" for u in sorted(scenarios_users)])
+    return _table(["API"] + [f"{u} users" for u in sorted(scenarios_users)], rows)
+
+
+def write_html(output_file, scenarios_data, scenarios_users, rt_matrix, err_matrix,
+               timeseries=None, bucket_s=1, max_points=1000):
+    """
+    Tableau de bord HTML autonome (aucune ressource externe) : recaps par
+    scénario, matrices temps de réponse / erreurs, et graphiques SVG des
+    séries temporelles réduites par LTTB à `max_points` points par courbe.
+    timeseries : nom de scénario -> TimeSeriesCollector.series()
+    """
+    logging.info("Création du tableau de bord HTML : %s", output_file)
+    timeseries = timeseries or {}
+
+    parts = ["<!DOCTYPE html><html><head><meta charset=\"utf-8\">",
+             "<title>Recap scénarios JMeter</title>",
+             f"<style>{CSS}</style></head><body>",
+             "<h1>Recap scénarios JMeter</h1>"]
+
+    parts.append("<h2>Temps de réponse moyen (ms)</h2>")
+    parts.append(_matrix_table(rt_matrix, scenarios_users, lambda v: int(round(v))))
+    parts.append("<h2>Taux d'erreur (%)</h2>")
+    parts.append(_matrix_table(err_matrix, scenarios_users, lambda v: f"{v:.2f}"))
+
+    for name, rows in scenarios_data.items():
+        parts.append(f"<h2>{_esc(name)}</h2>")
+        if any(r.get("Approximate") for r in rows):
+            parts.append('<p class="note">APPROXIMATIF : mode preview sur échantillon</p>')
+        parts.append(_table([h for h, _ in RECAP_COLUMNS],
+                            [[r.get(key, "") for _, key in RECAP_COLUMNS] for r in rows]))
+        if name in timeseries:
+            parts.append(_scenario_charts(timeseries[name], bucket_s, max_points))
+
+    parts.append("</body></html>")
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("".join(parts))
+
+    logging.info("Tableau de bord HTML finalisé.")
@@ -2,7 +2,12 @@ import os
 import re
 import glob
 import csv
+import heapq
+import queue
+import codecs
 import logging
+import threading
+from collections import OrderedDict
 
 
 def extract_users_from_filename(path: str) -> int:
@@ -40,12 +45,165 @@ def find_scenario_files(results_folder: str):
     return files
 
 
-def read_jmeter_csv(path: str):
+def group_scenario_files(files):
+    """
+    Regroupe les fichiers par nombre d'utilisateurs (mode distribué : un CSV
+    par injecteur pour le même palier).
+    Ex : IDP API-results-8-users-inj1.csv + IDP API-results-8-users-inj2.csv
+         -> {8: [..inj1.csv, ..inj2.csv]}
+    """
+    groups = OrderedDict()
+    for f in sorted(files, key=extract_users_from_filename):
+        groups.setdefault(extract_users_from_filename(f), []).append(f)
+
+    for users, paths in groups.items():
+        if len(paths) > 1:
+            logging.info("Palier %d utilisateurs : %d fichiers injecteurs à fusionner", users, len(paths))
+    return groups
+
+
+def scenario_base_name(paths) -> str:
+    """
+    Nom du scénario (feuille Excel) pour un groupe de fichiers.
+    Un seul fichier : nom sans extension.
+    Plusieurs injecteurs : suffixe injecteur retiré (... results-8-users).
+    """
+    base = os.path.splitext(os.path.basename(paths[0]))[0]
+    if len(paths) == 1:
+        return base
+    m = re.match(r"(.*results-\d+-users?)", base)
+    if m:
+        return m.group(1)
+    return base
+
+
+def _prefetch_reader(f, free, filled, stop):
+    """
+    Thread d'E/S : remplit les tampons libres (readinto, sans allocation)
+    et les passe au parseur. Bloque quand tous les tampons sont pleins
+    (contre-pression : mémoire plafonnée à depth x block_size).
+    """
+    try:
+        while not stop.is_set():
+            buf = free.get()
+            if buf is None:
+                break
+            n = f.readinto(buf)
+            filled.put((buf, n))
+            if not n:
+                break
+    except Exception as e:
+        filled.put((e, 0))
+
+
+def iter_prefetched_lines(path, block_kb=1024, depth=4):
+    """
+    Lignes texte d'un fichier, lues par un thread d'E/S en blocs de
+    `block_kb` Ko dans `depth` tampons réutilisés, pendant que l'appelant
+    parse et agrège : le temps total tend vers max(E/S, CPU) au lieu de la
+    somme (partages réseau, disques lents). Décodage UTF-8 incrémental
+    (caractères à cheval sur deux blocs, BOM).
+    """
+    free = queue.Queue()
+    filled = queue.Queue()
+    for _ in range(max(depth, 2)):
+        free.put(bytearray(max(block_kb, 1) * 1024))
+    stop = threading.Event()
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+
+    with open(path, "rb", buffering=0) as f:
+        reader = threading.Thread(target=_prefetch_reader, args=(f, free, filled, stop),
+                                  name="jtl-prefetch", daemon=True)
+        reader.start()
+        try:
+            pending = ""
+            while True:
+                buf, n = filled.get()
+                if isinstance(buf, Exception):
+                    raise buf
+                if not n:
+                    break
+                text = decoder.decode(memoryview(buf)[:n])
+                free.put(buf)
+                # découpe sur "\n" seulement (splitlines couperait aussi sur \x1c, \u2028...) ;
+                # la dernière ligne, incomplète, attend le bloc suivant
+                lines = (pending + text).split("\n")
+                pending = lines.pop()
+                for line in lines:
+                    yield line + "\n"
+            pending += decoder.decode(b"", final=True)
+            if pending:
+                yield pending
+        finally:
+            stop.set()
+            free.put(None)
+            reader.join()
+
+
+def iter_jmeter_csv(path: str, prefetch=None):
+    """
+    Lecture en flux du CSV JMeter : une ligne (dict) à la fois.
+    `prefetch` : (block_kb, depth) pour lire le fichier en arrière-plan
+    (iter_prefetched_lines) ; None : lecture directe.
+    """
     logging.info("Lecture du fichier CSV : %s", path)
-    rows = []
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+    count = 0
+    if prefetch:
+        reader = csv.DictReader(iter_prefetched_lines(path, *prefetch))
         for r in reader:
-            rows.append(r)
-    logging.info("  -> %d lignes lues (hors en-tête)", len(rows))
+            count += 1
+            yield r
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for r in reader:
+                count += 1
+                yield r
+    logging.info("  -> %d lignes lues (hors en-tête) : %s", count, path)
+
+
+def _timestamp_key(row):
+    try:
+        return int(row.get("timeStamp"))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _read_header(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def _check_headers(paths):
+    """
+    En-têtes des injecteurs : l'ordre des colonnes est libre (DictReader),
+    mais sans timeStamp la fusion serait faussée (clé 0) -> ValueError ;
+    des jeux de colonnes différents sont signalés (cellules vides).
+    """
+    reference = None
+    for p in paths:
+        header = _read_header(p)
+        if "timeStamp" not in header:
+            raise ValueError(f"Colonne timeStamp absente, fusion impossible : {p}")
+        if reference is None:
+            reference = set(header)
+        elif set(header) != reference:
+            logging.warning("En-tête différent du premier injecteur (colonnes : %s) : %s",
+                            ", ".join(sorted(set(header) ^ reference)), p)
+
+
+def merge_jmeter_csv(paths, prefetch=None):
+    """
+    Fusion k-voies (heap) des CSV de plusieurs injecteurs, ordonnée par timeStamp.
+    Une seule ligne par fichier est gardée en mémoire, quel que soit k.
+    `prefetch` : voir iter_jmeter_csv (un thread d'E/S par fichier).
+    """
+    if len(paths) == 1:
+        return iter_jmeter_csv(paths[0], prefetch)
+    _check_headers(paths)
+    return heapq.merge(*(iter_jmeter_csv(p, prefetch) for p in paths), key=_timestamp_key)
+
+
+def read_jmeter_csv(path: str):
+    rows = list(iter_jmeter_csv(path))
     return rows
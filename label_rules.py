@@ -0,0 +1,94 @@
+import json
+import re
+import fnmatch
+import logging
+
+from metrics import LABEL_ORDER
+
+OTHER_LABEL = "OTHER"
+# séparateurs admis après un label de LABEL_ORDER (sous-échantillons JMeter
+# « Policy-0 », chemins « Policy/... ») ; pas l'espace : « Policy Renewal »
+# est une autre transaction
+PREFIX_DELIMITERS = "-_/:.#?"
+
+
+def load_label_rules(path):
+    """
+    Règles de normalisation des labels (JSON), appliquées dans l'ordre :
+      [{"regex": "^/policy/\\\\d+$", "label": "Policy"},
+       {"glob": "*/purchase/*", "label": "Purchase"},
+       {"regex": "^(GET|POST) /api/(\\\\w+)/.*", "label": "\\\\1 \\\\2"}]
+    `label` accepte les références de groupe (\\1, \\g<name>) pour les regex.
+    Retourne une liste de (pattern compilé, label cible).
+    """
+    with open(path, encoding="utf-8") as f:
+        definitions = json.load(f)
+    if not isinstance(definitions, list):
+        raise ValueError(f"Fichier de règles de labels invalide (liste JSON attendue) : {path}")
+
+    rules = []
+    for i, d in enumerate(definitions, start=1):
+        if "label" not in d or ("regex" in d) == ("glob" in d):
+            raise ValueError(f"Règle de label {i} invalide (label + regex ou glob attendus) : {d}")
+        pattern = d["regex"] if "regex" in d else fnmatch.translate(d["glob"])
+        rules.append((re.compile(pattern), d["label"]))
+    logging.info("Règles de labels chargées depuis %s : %d règles", path, len(rules))
+    return rules
+
+
+class LabelMapper:
+    """
+    Label brut -> transaction logique, à passer en `label_mapper` de
+    compute_recap. Ordre : première règle qui correspond, sinon le premier
+    label de LABEL_ORDER égal au label brut ou préfixe suivi d'un
+    séparateur (PREFIX_DELIMITERS), sinon le label brut.
+
+    Le résultat est mémorisé par label brut distinct : le coût des regex est
+    payé une fois par label, pas par échantillon. Le cache est borné à
+    `cache_size` entrées (vidé quand il est plein, pour les labels à ID
+    unique). Au-delà de `max_labels` transactions distinctes, les nouvelles
+    sont regroupées sous OTHER : mémoire et taille des rapports dépendent
+    du nombre de transactions, pas du nombre d'URL.
+    """
+
+    def __init__(self, rules=None, max_labels=None, cache_size=100000):
+        self.rules = rules or []
+        self.max_labels = max_labels
+        self.cache_size = cache_size
+        self.cache = {}
+        self.targets = set()
+        self.overflow = 0
+
+    def resolve(self, raw):
+        for pattern, target in self.rules:
+            m = pattern.match(raw)
+            if m:
+                return m.expand(target) if pattern.groups else target
+        for lbl in LABEL_ORDER:
+            if raw.startswith(lbl) and (len(raw) == len(lbl) or raw[len(lbl)] in PREFIX_DELIMITERS):
+                return lbl
+        return raw
+
+    def __call__(self, raw):
+        label = self.cache.get(raw)
+        if label is not None:
+            return label
+
+        label = self.resolve(raw)
+        if label not in self.targets:
+            if self.max_labels and len(self.targets) >= self.max_labels:
+                self.overflow += 1
+                label = OTHER_LABEL
+            else:
+                self.targets.add(label)
+
+        if len(self.cache) >= self.cache_size:
+            self.cache.clear()
+        self.cache[raw] = label
+        return label
+
+    def log_summary(self):
+        logging.info("  -> labels normalisés : %d transactions", len(self.targets))
+        if self.overflow:
+            logging.warning("  -> %d labels bruts regroupés sous %s (LABEL_MAX_DISTINCT atteint)",
+                            self.overflow, OTHER_LABEL)
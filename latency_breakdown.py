@@ -0,0 +1,66 @@
+from histogram import LogHistogram
+from metrics import to_int, ordered_label_names
+
+# (préfixe de colonne, composante)
+COMPONENTS = [
+    ("Connect", "connect"),
+    ("Server", "server"),
+    ("Download", "download"),
+]
+
+
+class LatencyBreakdownCollector:
+    """
+    Collecteur pour compute_recap : décompose chaque échantillon avec les
+    colonnes JMeter Latency (TTFB), Connect et IdleTime :
+      connect  = Connect
+      server   = Latency - Connect
+      download = elapsed - Latency
+    Un LogHistogram par composante et par label : mémoire bornée quel que
+    soit le nombre d'échantillons, moyennes exactes, percentiles à la
+    précision du bucket (~1.6 %).
+    """
+
+    def __init__(self, percentiles=(95,)):
+        self.percentiles = percentiles
+        self.labels = {}
+
+    def add(self, label, ts, elapsed, success, row):
+        latency = to_int(row.get("Latency"), None)
+        if latency is None:
+            return
+        connect = to_int(row.get("Connect"), 0)
+        idle = to_int(row.get("IdleTime"), 0)
+
+        data = self.labels.get(label)
+        if data is None:
+            data = self.labels[label] = {
+                "connect": LogHistogram(),
+                "server": LogHistogram(),
+                "download": LogHistogram(),
+                "idle_sum": 0,
+            }
+        data["connect"].record(connect)
+        data["server"].record(latency - connect)
+        data["download"].record(int(elapsed) - latency)
+        data["idle_sum"] += idle
+
+    def results(self):
+        """
+        Liste de dicts par label :
+          Label, Samples, Connect Avg (ms), Connect P95 (ms), Server Avg (ms), ...,
+          Idle Avg (ms)
+        """
+        out = []
+        for label in ordered_label_names(self.labels):
+            data = self.labels[label]
+            samples = data["connect"].total
+            row = {"Label": label, "Samples": samples}
+            for prefix, key in COMPONENTS:
+                hist = data[key]
+                row[f"{prefix} Avg (ms)"] = round(hist.mean(), 1)
+                for p in self.percentiles:
+                    row[f"{prefix} P{p} (ms)"] = hist.percentile(p)
+            row["Idle Avg (ms)"] = round(data["idle_sum"] / samples, 1)
+            out.append(row)
+        return out
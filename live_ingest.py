@@ -0,0 +1,310 @@
+import time
+import queue
+import logging
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from metrics import new_stats, merge_stats, build_recap, format_execution_range
+
+# corps HTTP / datagrammes UDP regroupés par passage de l'agrégateur
+DRAIN_BATCH = 256
+
+
+def _split_unescaped(text, sep, maxsplit=-1):
+    """
+    Découpe `text` sur `sep` hors échappement (\\) et hors chaînes "...".
+    """
+    parts = []
+    current = []
+    quoted = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\" and i + 1 < len(text):
+            current.append(text[i:i + 2])
+            i += 2
+            continue
+        if ch == '"':
+            quoted = not quoted
+        elif ch == sep and not quoted and (maxsplit < 0 or len(parts) < maxsplit):
+            parts.append("".join(current))
+            current = []
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    parts.append("".join(current))
+    return parts
+
+
+def _unescape(text):
+    out = []
+    i = 0
+    while i < len(text):
+        if text[i] == "\\" and i + 1 < len(text):
+            out.append(text[i + 1])
+            i += 2
+        else:
+            out.append(text[i])
+            i += 1
+    return "".join(out)
+
+
+def _field_value(raw):
+    if raw.startswith('"') and raw.endswith('"') and len(raw) >= 2:
+        return _unescape(raw[1:-1])
+    if raw in ("t", "T", "true", "True", "TRUE"):
+        return True
+    if raw in ("f", "F", "false", "False", "FALSE"):
+        return False
+    if raw.endswith("i") or raw.endswith("u"):
+        return int(raw[:-1])
+    return float(raw)
+
+
+def parse_line(line):
+    """
+    Ligne InfluxDB line protocol -> (measurement, tags, fields, ts_ns) ;
+    ts_ns vaut None si absent. ValueError si la ligne est invalide.
+      jmeter,application=app,transaction=Purchase,statut=all count=12,avg=230.5 1700000000000000000
+    """
+    sections = _split_unescaped(line, " ")
+    sections = [s for s in sections if s]
+    if len(sections) < 2:
+        raise ValueError(f"Ligne line protocol invalide : {line!r}")
+
+    key_parts = _split_unescaped(sections[0], ",")
+    measurement = _unescape(key_parts[0])
+    tags = {}
+    for part in key_parts[1:]:
+        k, v = _split_unescaped(part, "=", 1)
+        tags[_unescape(k)] = _unescape(v)
+
+    fields = {}
+    for part in _split_unescaped(sections[1], ","):
+        k, v = _split_unescaped(part, "=", 1)
+        fields[_unescape(k)] = _field_value(v)
+
+    ts_ns = int(sections[2]) if len(sections) > 2 else None
+    return measurement, tags, fields, ts_ns
+
+
+class LiveAggregator:
+    """
+    Agrège le flux du Backend Listener InfluxDB de JMeter dans les mêmes
+    structures que metrics.compute_recap (label -> new_stats).
+
+    Chaque point `statut=all` d'une transaction résume un intervalle
+    (count, countError, avg, min, max, rb, sb) et est fusionné comme un
+    sous-ensemble de Chan. La variance intra-intervalle étant inconnue,
+    l'écart-type n'est pas celui du recap batch : il est laissé vide
+    dans le recap live (voir recap). La transaction
+    `internal` donne les threads actifs, les points `events` le début et la
+    fin du test.
+
+    Un seul thread (run) écrit dans les agrégats : les serveurs HTTP/UDP
+    ne font que déposer les corps reçus dans la file, sans verrou sur les stats.
+    """
+
+    def __init__(self, measurement="jmeter"):
+        self.measurement = measurement
+        self.queue = queue.Queue()
+        self.labels = {}  # label -> stats
+        self.max_threads = 0
+        self.start_ms = None
+        self.end_ms = None
+        self.first_point_ms = None
+        self.last_point_ms = None
+        self.points = 0
+        self.invalid = 0
+        self.ended = threading.Event()
+
+    def submit(self, payload):
+        self.queue.put(payload)
+
+    def add_point(self, measurement, tags, fields, ts_ns):
+        ts_ms = ts_ns // 1000000 if ts_ns is not None else int(time.time() * 1000)
+
+        if measurement == "events":
+            text = str(fields.get("text", "")).lower()
+            if "started" in text:
+                self.start_ms = ts_ms
+            elif "ended" in text:
+                self.end_ms = ts_ms
+                self.ended.set()
+            return
+        if measurement != self.measurement:
+            return
+
+        transaction = tags.get("transaction")
+        if transaction == "internal":
+            self.max_threads = max(self.max_threads, int(fields.get("maxAT", 0)))
+            return
+        # "all" : TOTAL recalculé par build_recap ; ok / ko : sous-ensembles de statut=all
+        if transaction in (None, "all") or tags.get("statut") != "all":
+            return
+
+        count = int(fields.get("count", 0))
+        if count <= 0:
+            return
+        stats = new_stats()
+        stats["count"] = count
+        stats["mean"] = float(fields.get("avg", 0.0))
+        stats["min"] = float(fields.get("min", stats["mean"]))
+        stats["max"] = float(fields.get("max", stats["mean"]))
+        stats["errors"] = int(fields.get("countError", 0))
+        stats["bytes_sum"] = int(fields.get("rb", 0))
+        stats["sent_bytes_sum"] = int(fields.get("sb", 0))
+        stats["first_ts"] = ts_ms
+        stats["last_end_ts"] = ts_ms
+
+        into = self.labels.get(transaction)
+        if into is None:
+            into = self.labels[transaction] = new_stats()
+        merge_stats(into, stats)
+
+        self.points += 1
+        if self.first_point_ms is None or ts_ms < self.first_point_ms:
+            self.first_point_ms = ts_ms
+        if self.last_point_ms is None or ts_ms > self.last_point_ms:
+            self.last_point_ms = ts_ms
+
+    def _consume(self, payload):
+        for line in payload.decode("utf-8", errors="replace").splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                self.add_point(*parse_line(line))
+            except (ValueError, TypeError):
+                self.invalid += 1
+
+    def run(self):
+        """
+        Boucle de l'agrégateur : vide la file par lots jusqu'au sentinel None.
+        """
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < DRAIN_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            for payload in batch:
+                if payload is None:
+                    return
+                self._consume(payload)
+
+    def users(self):
+        return self.max_threads or 1
+
+    def time_range(self):
+        start = self.start_ms if self.start_ms is not None else self.first_point_ms
+        end = self.end_ms if self.end_ms is not None else self.last_point_ms
+        return start, end
+
+    def recap(self):
+        """
+        Recap (même structure que compute_recap), débit calculé sur la durée du test.
+        « Std Dev (ms) » est vide : seule la dispersion des moyennes par
+        intervalle est connue, pas celle des échantillons.
+        """
+        start, end = self.time_range()
+        duration_ms = end - start if start is not None and end is not None else None
+        recap = build_recap(self.labels, duration_ms)
+        for row in recap:
+            row["Std Dev (ms)"] = ""
+        return recap
+
+    def exec_range(self):
+        return format_execution_range(*self.time_range())
+
+
+def _make_http_handler(aggregator):
+    class InfluxWriteHandler(BaseHTTPRequestHandler):
+        """
+        Sous-ensemble de l'API InfluxDB 1.x : POST /write, GET /ping.
+        """
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/write":
+                self.send_response(404)
+                self.end_headers()
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            aggregator.submit(self.rfile.read(length))
+            self.send_response(204)
+            self.end_headers()
+
+        def do_GET(self):
+            self.send_response(204 if urlparse(self.path).path == "/ping" else 404)
+            self.end_headers()
+
+        def log_message(self, fmt, *args):
+            logging.debug("HTTP %s", fmt % args)
+
+    return InfluxWriteHandler
+
+
+def _make_udp_handler(aggregator):
+    class InfluxUdpHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            aggregator.submit(self.request[0])
+
+    return InfluxUdpHandler
+
+
+def run_ingestion_server(host="127.0.0.1", http_port=8086, udp_port=None,
+                         measurement="jmeter", duration_s=None, idle_timeout_s=None):
+    """
+    Sert l'ingestion (HTTP et/ou UDP) jusqu'à la fin du test : événement
+    « ended » du Backend Listener, `duration_s` écoulée, `idle_timeout_s`
+    sans nouveau point (après le premier), ou Ctrl+C.
+    Retourne le LiveAggregator rempli.
+    """
+    aggregator = LiveAggregator(measurement)
+    worker = threading.Thread(target=aggregator.run, name="live-aggregator", daemon=True)
+    worker.start()
+
+    servers = []
+    if http_port:
+        servers.append(ThreadingHTTPServer((host, http_port), _make_http_handler(aggregator)))
+        logging.info("Ingestion HTTP (line protocol) sur http://%s:%d/write", host, http_port)
+    if udp_port:
+        servers.append(socketserver.ThreadingUDPServer((host, udp_port), _make_udp_handler(aggregator)))
+        logging.info("Ingestion UDP (line protocol) sur %s:%d", host, udp_port)
+    if not servers:
+        raise ValueError("LIVE_HTTP_PORT ou LIVE_UDP_PORT doit être défini en mode live")
+
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    started = time.monotonic()
+    last_points = 0
+    last_change = started
+    try:
+        while not aggregator.ended.wait(1.0):
+            now = time.monotonic()
+            if duration_s and now - started >= duration_s:
+                logging.info("Durée d'ingestion atteinte (%ss)", duration_s)
+                break
+            if aggregator.points != last_points:
+                last_points = aggregator.points
+                last_change = now
+            elif idle_timeout_s and last_points and now - last_change >= idle_timeout_s:
+                logging.info("Aucun point depuis %ss, fin de l'ingestion", idle_timeout_s)
+                break
+    except KeyboardInterrupt:
+        logging.info("Interruption : fin de l'ingestion")
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+        aggregator.submit(None)
+        worker.join()
+
+    logging.info("  -> %d points agrégés (%d lignes invalides), %d labels",
+                 aggregator.points, aggregator.invalid, len(aggregator.labels))
+    return aggregator
@@ -1,55 +1,24 @@
 import logging
-from collections import defaultdict
+import multiprocessing
 
-from config_loader import load_env
-from jmeter_io import find_scenario_files, read_jmeter_csv, extract_users_from_filename
-from metrics import compute_recap
-from excel_export import write_excel
-from word_export import generate_word_report
+from config_loader import load_env, load_options
+from pipeline import run_campaign, run_live
+from batch import find_campaign_folders, plan_jobs, run_batch
 
 
 def main():
     try:
         results_folder, output_file, doc_template, doc_output = load_env()
-        files = find_scenario_files(results_folder)
-
-        scenarios_data = {}
-        scenarios_users = []
-        rt_matrix = defaultdict(dict)   # label -> {users: avg}
-        err_matrix = defaultdict(dict)  # label -> {users: error%}
-        scenario_rows = {}              # users -> rows CSV
-        scenario_recaps_by_users = {}   # users -> recap
-
-        for f in files:
-            logging.info("--------------------------------------------------")
-            logging.info("Traitement du fichier scénario : %s", f)
-
-            users = extract_users_from_filename(f)
-            if users not in scenarios_users:
-                scenarios_users.append(users)
-
-            rows = read_jmeter_csv(f)
-            recap = compute_recap(rows)
-
-            base_name = os.path.splitext(os.path.basename(f))[0]
-            scenarios_data[base_name] = recap
-            scenario_rows[users] = rows
-            scenario_recaps_by_users[users] = recap
-
-            for r in recap:
-                if r["Label"] == "TOTAL":
-                    continue
-                label = r["Label"]
-                rt_matrix[label][users] = r["Average (ms)"]
-                err_matrix[label][users] = r["Error %"]
-
-        write_excel(output_file, scenarios_data, scenarios_users, rt_matrix, err_matrix)
-
-        if doc_template and doc_output:
-            generate_word_report(doc_template, doc_output,
-                                 scenarios_users, scenario_recaps_by_users, scenario_rows)
+        options = load_options()
+
+        if options["batch_manifest"] or options["batch_glob"]:
+            folders = find_campaign_folders(options["batch_manifest"], options["batch_glob"])
+            jobs = plan_jobs(folders, options["batch_output_dir"], doc_template, options)
+            run_batch(jobs, options, options["batch_workers"])
+        elif options["live_ingest"]:
+            run_live(output_file, doc_template, doc_output, options)
         else:
-            logging.info("DOC_TEMPLATE ou DOC_OUTPUT non défini, Word ignoré.")
+            run_campaign(results_folder, output_file, doc_template, doc_output, options)
 
         logging.info("Terminé ✅")
 
@@ -58,4 +27,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # requis pour le pool de processus du mode batch dans l'exe PyInstaller
+    multiprocessing.freeze_support()
     main()
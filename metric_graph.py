@@ -0,0 +1,159 @@
+import math
+from functools import lru_cache
+
+# Graphe des métriques du recap : chaque colonne déclare ses dépendances
+# (accumulateurs de la passe, valeurs dérivées), les exports déclarent les
+# colonnes qu'ils affichent, et plan_metrics ne garde que le nécessaire.
+# L'Excel affichant toutes les colonnes de COLUMNS, le pipeline n'économise
+# que les percentiles non demandés ; les plans réduits servent surtout à
+# Campaign.select().
+
+# accumulateurs de la passe (champs de metrics.new_stats) -> dépendances ;
+# mises à jour dans _fused_adder
+ACCUMULATORS = {
+    "count": (),
+    "mean": ("count",),
+    "m2": ("mean",),
+    "min": (),
+    "max": (),
+    "errors": (),
+    "bytes": (),
+    "sent_bytes": (),
+    "span": (),
+}
+
+
+def _duration_min(stats, values, duration_ms):
+    if duration_ms is None:
+        duration_ms = stats["last_end_ts"] - stats["first_ts"]
+    return max(duration_ms, 1) / 1000.0 / 60.0
+
+
+# valeurs intermédiaires partagées entre colonnes (calculées une fois par ligne)
+DERIVED = {
+    "duration_min": (("span",), _duration_min),
+}
+
+# colonnes calculées à partir des accumulateurs (mêmes formules que metrics.stats_to_row)
+COLUMNS = {
+    "Samples": (("count",), lambda s, v: s["count"]),
+    "Average (ms)": (("mean",), lambda s, v: int(round(s["mean"]))),
+    "Min (ms)": (("min",), lambda s, v: int(round(s["min"]))),
+    "Max (ms)": (("max",), lambda s, v: int(round(s["max"]))),
+    "Std Dev (ms)": (("m2",), lambda s, v: round(math.sqrt(s["m2"] / s["count"]), 2) if s["count"] > 1 else 0.0),
+    "Error %": (("errors",), lambda s, v: round(s["errors"] / s["count"] * 100.0, 2)),
+    "Throughput (/min)": (("duration_min",), lambda s, v: f"{s['count'] / v['duration_min']:.1f}/min"),
+    "Received KB/sec": (("bytes", "duration_min"),
+                        lambda s, v: round((s["bytes_sum"] / 1024.0) / v["duration_min"], 2)),
+    "Sent KB/sec": (("sent_bytes", "duration_min"),
+                    lambda s, v: round((s["sent_bytes_sum"] / 1024.0) / v["duration_min"], 2)),
+    "Avg Bytes": (("bytes",), lambda s, v: round(s["bytes_sum"] / s["count"], 1)),
+}
+
+# colonnes fournies par un collecteur de percentiles (apply_to_recap)
+PERCENTILE_COLUMNS = {"90% Line (ms)": 90, "95% Line (ms)": 95, "99% Line (ms)": 99}
+
+# recap complet (comportement de metrics.compute_recap sans plan)
+ALL_COLUMNS = tuple(COLUMNS)
+
+
+def _resolve(name, accumulators, derived):
+    if name in ACCUMULATORS:
+        if name not in accumulators:
+            accumulators.add(name)
+            for dep in ACCUMULATORS[name]:
+                _resolve(dep, accumulators, derived)
+    elif name in DERIVED:
+        if name not in derived:
+            derived.append(name)
+            for dep in DERIVED[name][0]:
+                _resolve(dep, accumulators, derived)
+    else:
+        for dep in COLUMNS[name][0]:
+            _resolve(dep, accumulators, derived)
+
+
+@lru_cache(maxsize=None)
+def _fused_adder(accumulators):
+    """
+    Fonction d'ajout d'un échantillon limitée aux accumulateurs demandés
+    (drapeaux calculés une fois par plan, count toujours tenu).
+    Même signature que metrics.add_sample.
+    """
+    mean = "mean" in accumulators
+    m2 = "m2" in accumulators
+    low = "min" in accumulators
+    high = "max" in accumulators
+    errors = "errors" in accumulators
+    received = "bytes" in accumulators
+    sent = "sent_bytes" in accumulators
+    span = "span" in accumulators
+
+    def add(stats, ts, elapsed, success, bytes_val, sent_bytes_val):
+        stats["count"] += 1
+        if mean:
+            delta = elapsed - stats["mean"]
+            stats["mean"] += delta / stats["count"]
+            if m2:
+                stats["m2"] += delta * (elapsed - stats["mean"])
+        if low and (stats["min"] is None or elapsed < stats["min"]):
+            stats["min"] = elapsed
+        if high and (stats["max"] is None or elapsed > stats["max"]):
+            stats["max"] = elapsed
+        if errors and not success:
+            stats["errors"] += 1
+        if received:
+            stats["bytes_sum"] += bytes_val
+        if sent:
+            stats["sent_bytes_sum"] += sent_bytes_val
+        if span:
+            end_ts = ts + int(elapsed)
+            if stats["first_ts"] is None or ts < stats["first_ts"]:
+                stats["first_ts"] = ts
+            if stats["last_end_ts"] is None or end_ts > stats["last_end_ts"]:
+                stats["last_end_ts"] = end_ts
+
+    return add
+
+
+def plan_metrics(columns=ALL_COLUMNS):
+    """
+    Plan de calcul pour les colonnes demandées (noms des clés du recap,
+    "Label" implicite) :
+      columns : colonnes calculées par la passe, dans l'ordre du recap
+      percentiles : percentiles à confier à un collecteur (90% Line...)
+      add : fonction d'ajout fusionnée (voir metrics.compute_recap)
+      row : ligne de recap réduite aux colonnes demandées (voir metrics.build_recap)
+      bytes : la passe a besoin des colonnes bytes / sentBytes
+    Colonne inconnue : ValueError.
+    """
+    wanted = set(columns) - {"Label"}
+    unknown = wanted - set(COLUMNS) - set(PERCENTILE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Colonne(s) de recap inconnue(s) : {', '.join(sorted(unknown))}")
+
+    selected = [c for c in COLUMNS if c in wanted]
+    # count est toujours tenu : build_recap écarte les labels vides
+    accumulators = {"count"}
+    derived = []
+    for column in selected:
+        _resolve(column, accumulators, derived)
+    derived = [d for d in DERIVED if d in derived]
+
+    def row(label, stats, duration_ms=None):
+        values = {}
+        for name in derived:
+            values[name] = DERIVED[name][1](stats, values, duration_ms)
+        out = {"Label": label}
+        for column in selected:
+            out[column] = COLUMNS[column][1](stats, values)
+        return out
+
+    return {
+        "columns": selected,
+        "percentiles": tuple(p for c, p in PERCENTILE_COLUMNS.items() if c in wanted),
+        "accumulators": frozenset(accumulators),
+        "add": _fused_adder(frozenset(accumulators)),
+        "row": row,
+        "bytes": bool(accumulators & {"bytes", "sent_bytes"}),
+    }
@@ -1,5 +1,7 @@
-import statistics
-from collections import defaultdict
+import csv
+import math
+import random
+import tempfile
 from datetime import datetime
 
 LABEL_ORDER = [
@@ -25,6 +27,18 @@ def to_int(value, default=0):
         return default
 
 
+def parse_throughput(value):
+    """
+    "123.4/min" (colonne Throughput du recap) -> 123.4 ; nombre -> float.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).split("/")[0])
+    except ValueError:
+        return 0.0
+
+
 def to_bool_success(value):
     if value is None:
         return False
@@ -32,20 +46,71 @@ def to_bool_success(value):
     return v in ("true", "1", "yes", "y")
 
 
+def select_pair(values, k):
+    """
+    k-ième et (k+1)-ième plus petites valeurs (0-based) par sélection
+    (quickselect à partition 3 voies) : O(n) en moyenne, sans tri complet.
+    La (k+1)-ième vaut la k-ième si k est le dernier rang.
+    """
+    data = values
+    above = None  # plus petite valeur connue au-dessus de `data`
+    while True:
+        if len(data) <= 32:
+            data = sorted(data)
+            lo = data[k]
+            if k + 1 < len(data):
+                return lo, data[k + 1]
+            return lo, above if above is not None else lo
+
+        pivot = data[random.randrange(len(data))]
+        lows = [v for v in data if v < pivot]
+        if k < len(lows):
+            above = pivot
+            data = lows
+            continue
+
+        n_le = len(lows) + data.count(pivot)
+        highs = [v for v in data if v > pivot]
+        if k < n_le:
+            if k + 1 < n_le:
+                return pivot, pivot
+            if highs:
+                return pivot, min(highs)
+            return pivot, above if above is not None else pivot
+
+        k -= n_le
+        data = highs
+
+
 def percentile(values, p):
     if not values:
         return None
-    values = sorted(values)
-    k = (len(values) - 1) * (p / 100.0)
+    n = len(values)
+    k = (n - 1) * (p / 100.0)
     f = int(k)
-    c = min(f + 1, len(values) - 1)
+    c = min(f + 1, n - 1)
+    lo, hi = select_pair(values, f)
     if f == c:
-        return values[int(k)]
-    d0 = values[f] * (c - k)
-    d1 = values[c] * (k - f)
+        return lo
+    d0 = lo * (c - k)
+    d1 = hi * (k - f)
     return d0 + d1
 
 
+def format_execution_range(start_ms, end_ms):
+    """
+    Format : 21/11/25 09:42 PM - 21/11/25 10:00 PM
+    """
+    if start_ms is None or end_ms is None:
+        return ""
+
+    start_dt = datetime.fromtimestamp(start_ms / 1000.0)
+    end_dt = datetime.fromtimestamp(end_ms / 1000.0)
+
+    fmt = "%d/%m/%y %I:%M %p"
+    return f"{start_dt.strftime(fmt)} - {end_dt.strftime(fmt)}"
+
+
 def compute_execution_range_string(rows):
     """
     Calcule la date/heure de début et fin du scénario à partir des timeStamp JMeter.
@@ -64,75 +129,206 @@ def compute_execution_range_string(rows):
     if not timestamps:
         return ""
 
-    start_ts = min(timestamps) / 1000.0
-    end_ts = max(timestamps) / 1000.0
+    return format_execution_range(min(timestamps), max(timestamps))
 
-    start_dt = datetime.fromtimestamp(start_ts)
-    end_dt = datetime.fromtimestamp(end_ts)
 
-    fmt = "%d/%m/%y %I:%M %p"
-    return f"{start_dt.strftime(fmt)} - {end_dt.strftime(fmt)}"
+class ExecutionRangeCollector:
+    """
+    Collecteur pour compute_recap : garde le premier/dernier timeStamp vu
+    pendant la passe, sans conserver les lignes.
+    """
+
+    # date d'exécution du run complet, même en mode fenêtre (voir compute_recap)
+    whole_run = True
+    # alimentable par fusion de plages (chunked.compute_recap_chunked)
+    mergeable = True
+
+    def __init__(self):
+        self.start_ms = None
+        self.end_ms = None
+
+    def merge_part(self, part):
+        if part["first_ts"] is not None:
+            self.add(None, part["first_ts"], 0, True, None)
+            self.add(None, part["last_ts"], 0, True, None)
+
+    def add(self, label, ts, elapsed, success, row):
+        if self.start_ms is None or ts < self.start_ms:
+            self.start_ms = ts
+        if self.end_ms is None or ts > self.end_ms:
+            self.end_ms = ts
+
+    def to_string(self):
+        return format_execution_range(self.start_ms, self.end_ms)
 
 
-def compute_recap(rows):
+def new_stats():
     """
-    Retourne une liste de dicts avec :
-      Label, Samples, Average (ms), Min (ms), Max (ms), Std Dev (ms),
-      Error %, Throughput (/min), Received KB/sec, Sent KB/sec, Avg Bytes
-    (90/95/99% calculés mais non stockés)
+    Agrégats fusionnables d'un label (moyenne/variance par Welford) :
+    la mémoire ne dépend pas du nombre d'échantillons.
     """
-    labels = {}
+    return {
+        "count": 0,
+        "mean": 0.0,
+        "m2": 0.0,
+        "min": None,
+        "max": None,
+        "errors": 0,
+        "bytes_sum": 0,
+        "sent_bytes_sum": 0,
+        "first_ts": None,
+        "last_end_ts": None,
+    }
+
+
+def add_sample(stats, ts, elapsed, success, bytes_val, sent_bytes_val):
+    stats["count"] += 1
+    delta = elapsed - stats["mean"]
+    stats["mean"] += delta / stats["count"]
+    stats["m2"] += delta * (elapsed - stats["mean"])
+
+    if stats["min"] is None or elapsed < stats["min"]:
+        stats["min"] = elapsed
+    if stats["max"] is None or elapsed > stats["max"]:
+        stats["max"] = elapsed
+
+    if not success:
+        stats["errors"] += 1
+    stats["bytes_sum"] += bytes_val
+    stats["sent_bytes_sum"] += sent_bytes_val
+
+    end_ts = ts + int(elapsed)
+    if stats["first_ts"] is None or ts < stats["first_ts"]:
+        stats["first_ts"] = ts
+    if stats["last_end_ts"] is None or end_ts > stats["last_end_ts"]:
+        stats["last_end_ts"] = end_ts
+
+
+def _merge_bound(a, b, pick):
+    """
+    min / max de deux bornes ; None (non calculée) des deux côtés est ignoré.
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return pick(a, b)
 
-    for r in rows:
-        label = r.get("label")
-        elapsed_raw = r.get("elapsed")
-        success_raw = r.get("success")
-        ts_raw = r.get("timeStamp")
 
-        if label is None or elapsed_raw is None or ts_raw is None:
-            continue
+def merge_stats(into, other):
+    """
+    Fusionne `other` dans `into` (variance combinée de Chan et al.).
+    """
+    if other["count"] == 0:
+        return into
+    if into["count"] == 0:
+        into.update(other)
+        return into
+
+    n_a = into["count"]
+    n_b = other["count"]
+    n = n_a + n_b
+    delta = other["mean"] - into["mean"]
+    into["mean"] += delta * n_b / n
+    into["m2"] += other["m2"] + delta * delta * n_a * n_b / n
+    into["count"] = n
+
+    # bornes à None : non calculées (plan metric_graph réduit)
+    into["min"] = _merge_bound(into["min"], other["min"], min)
+    into["max"] = _merge_bound(into["max"], other["max"], max)
+    into["errors"] += other["errors"]
+    into["bytes_sum"] += other["bytes_sum"]
+    into["sent_bytes_sum"] += other["sent_bytes_sum"]
+    into["first_ts"] = _merge_bound(into["first_ts"], other["first_ts"], min)
+    into["last_end_ts"] = _merge_bound(into["last_end_ts"], other["last_end_ts"], max)
+    return into
+
+
+def parse_sample(r, with_bytes=True):
+    """
+    Extrait (label, ts, elapsed, success, bytes, sentBytes) d'une ligne CSV,
+    ou None si la ligne est inexploitable.
+    `with_bytes` False : bytes / sentBytes ne sont pas lus (0).
+    """
+    label = r.get("label")
+    elapsed_raw = r.get("elapsed")
+    ts_raw = r.get("timeStamp")
 
-        elapsed = to_float(elapsed_raw)
-        if elapsed is None:
-            continue
+    if label is None or elapsed_raw is None or ts_raw is None:
+        return None
 
-        ts = to_int(ts_raw)
-        end_ts = ts + int(elapsed)
-
-        success = to_bool_success(success_raw)
-        bytes_val = to_int(r.get("bytes", 0))
-        sent_bytes_val = to_int(r.get("sentBytes", 0))
-
-        if label not in labels:
-            labels[label] = {
-                "times": [],
-                "errors": 0,
-                "bytes_sum": 0,
-                "sent_bytes_sum": 0,
-                "first_ts": ts,
-                "last_end_ts": end_ts,
-            }
-
-        data = labels[label]
-        data["times"].append(elapsed)
-        if not success:
-            data["errors"] += 1
-        data["bytes_sum"] += bytes_val
-        data["sent_bytes_sum"] += sent_bytes_val
-        data["first_ts"] = min(data["first_ts"], ts)
-        data["last_end_ts"] = max(data["last_end_ts"], end_ts)
+    elapsed = to_float(elapsed_raw)
+    if elapsed is None:
+        return None
 
-    recap = []
+    return (
+        label,
+        to_int(ts_raw),
+        elapsed,
+        to_bool_success(r.get("success")),
+        to_int(r.get("bytes", 0)) if with_bytes else 0,
+        to_int(r.get("sentBytes", 0)) if with_bytes else 0,
+    )
 
-    total_samples_all = 0
-    all_times = []
-    total_errors_all = 0
-    total_bytes_all = 0
-    total_sent_bytes_all = 0
-    global_first_ts = None
-    global_last_end_ts = None
 
-    # ordre des labels pour Word/Excel
+def active_threads(row):
+    """
+    Threads actifs d'un échantillon : allThreads, sinon grpThreads (0 si absent).
+    """
+    if row is None:
+        return 0
+    threads = to_int(row.get("allThreads"), 0)
+    if threads <= 0:
+        threads = to_int(row.get("grpThreads"), 0)
+    return threads
+
+
+def stats_to_row(label, stats, duration_ms=None):
+    """
+    Ligne de recap. `duration_ms` remplace la durée first_ts -> last_end_ts
+    pour le débit (ex : temps effectivement passé à un niveau de concurrence).
+    """
+    samples = stats["count"]
+
+    std_dev = math.sqrt(stats["m2"] / samples) if samples > 1 else 0.0
+    err_pct = (stats["errors"] / samples * 100.0) if samples else 0.0
+
+    if duration_ms is None:
+        duration_ms = stats["last_end_ts"] - stats["first_ts"]
+    duration_ms = max(duration_ms, 1)
+    duration_min = duration_ms / 1000.0 / 60.0
+
+    if duration_min > 0:
+        throughput_per_min = samples / duration_min
+        recv_kb_per_min = (stats["bytes_sum"] / 1024.0) / duration_min
+        sent_kb_per_min = (stats["sent_bytes_sum"] / 1024.0) / duration_min
+    else:
+        throughput_per_min = 0.0
+        recv_kb_per_min = 0.0
+        sent_kb_per_min = 0.0
+
+    avg_bytes = (stats["bytes_sum"] / samples) if samples else 0.0
+
+    return {
+        "Label": label,
+        "Samples": samples,
+        "Average (ms)": int(round(stats["mean"])),
+        "Min (ms)": int(round(stats["min"])),
+        "Max (ms)": int(round(stats["max"])),
+        "Std Dev (ms)": round(std_dev, 2),
+        "Error %": round(err_pct, 2),
+
+        "Throughput (/min)": f"{throughput_per_min:.1f}/min",
+        "Received KB/sec": round(recv_kb_per_min, 2),
+        "Sent KB/sec": round(sent_kb_per_min, 2),
+        "Avg Bytes": round(avg_bytes, 1),
+    }
+
+
+def ordered_label_names(labels):
+    """
+    Ordre des labels pour Word/Excel : LABEL_ORDER d'abord, puis alphabétique.
+    """
     ordered_labels = []
     for lbl in LABEL_ORDER:
         if lbl in labels:
@@ -140,107 +336,141 @@ def compute_recap(rows):
     for lbl in sorted(labels.keys()):
         if lbl not in ordered_labels:
             ordered_labels.append(lbl)
+    return ordered_labels
 
-    for label in ordered_labels:
-        data = labels[label]
-        times = data["times"]
-        errors = data["errors"]
-        samples = len(times)
-        if samples == 0:
-            continue
 
-        avg = statistics.mean(times)
-        mn = min(times)
-        mx = max(times)
-        std_dev = statistics.pstdev(times) if samples > 1 else 0.0
-        # percentiles calculés mais non stockés
-        _ = percentile(times, 90)
-        _ = percentile(times, 95)
-        _ = percentile(times, 99)
-        err_pct = (errors / samples * 100.0) if samples else 0.0
-
-        duration_ms = max(data["last_end_ts"] - data["first_ts"], 1)
-        duration_sec = duration_ms / 1000.0
-        duration_min = duration_sec / 60.0 if duration_sec > 0 else 0.0
-
-        if duration_min > 0:
-            throughput_per_min = samples / duration_min
-            recv_kb_per_min = (data["bytes_sum"] / 1024.0) / duration_min
-            sent_kb_per_min = (data["sent_bytes_sum"] / 1024.0) / duration_min
-        else:
-            throughput_per_min = 0.0
-            recv_kb_per_min = 0.0
-            sent_kb_per_min = 0.0
-
-        avg_bytes = (data["bytes_sum"] / samples) if samples else 0.0
-
-        recap.append({
-            "Label": label,
-            "Samples": samples,
-            "Average (ms)": int(round(avg)),
-            "Min (ms)": int(round(mn)),
-            "Max (ms)": int(round(mx)),
-            "Std Dev (ms)": round(std_dev, 2),
-            "Error %": round(err_pct, 2),
-
-            "Throughput (/min)": f"{throughput_per_min:.1f}/min",
-            "Received KB/sec": round(recv_kb_per_min, 2),
-            "Sent KB/sec": round(sent_kb_per_min, 2),
-            "Avg Bytes": round(avg_bytes, 1),
-        })
-
-        total_samples_all += samples
-        total_errors_all += errors
-        all_times.extend(times)
-        total_bytes_all += data["bytes_sum"]
-        total_sent_bytes_all += data["sent_bytes_sum"]
-
-        if global_first_ts is None or data["first_ts"] < global_first_ts:
-            global_first_ts = data["first_ts"]
-        if global_last_end_ts is None or data["last_end_ts"] > global_last_end_ts:
-            global_last_end_ts = data["last_end_ts"]
-
-    # TOTAL
-    if all_times:
-        total_avg = statistics.mean(all_times)
-        total_min = min(all_times)
-        total_max = max(all_times)
-        total_std = statistics.pstdev(all_times) if len(all_times) > 1 else 0.0
-        _ = percentile(all_times, 90)
-        _ = percentile(all_times, 95)
-        _ = percentile(all_times, 99)
-        total_err_pct = (total_errors_all / total_samples_all * 100.0) if total_samples_all else 0.0
-
-        if global_first_ts is not None and global_last_end_ts is not None:
-            duration_ms_all = max(global_last_end_ts - global_first_ts, 1)
-            duration_min_all = duration_ms_all / 1000.0 / 60.0
-        else:
-            duration_min_all = 0.0
+def build_recap(labels, duration_ms=None, row=stats_to_row):
+    """
+    labels : label -> stats (new_stats). Ajoute la ligne TOTAL.
+    `duration_ms` : durée commune imposée pour le débit (voir stats_to_row).
+    `row` : construction d'une ligne (stats_to_row, ou plan metric_graph).
+    """
+    recap = []
+    total = new_stats()
 
-        if duration_min_all > 0:
-            throughput_all = total_samples_all / duration_min_all
-            recv_kb_all = (total_bytes_all / 1024.0) / duration_min_all
-            sent_kb_all = (total_sent_bytes_all / 1024.0) / duration_min_all
-        else:
-            throughput_all = 0.0
-            recv_kb_all = 0.0
-            sent_kb_all = 0.0
-
-        avg_bytes_all = (total_bytes_all / total_samples_all) if total_samples_all else 0.0
-
-        recap.append({
-            "Label": "TOTAL",
-            "Samples": total_samples_all,
-            "Average (ms)": int(round(total_avg)),
-            "Min (ms)": int(round(total_min)),
-            "Max (ms)": int(round(total_max)),
-            "Std Dev (ms)": round(total_std, 2),
-            "Error %": round(total_err_pct, 2),
-
-            "Throughput (/min)": f"{throughput_all:.1f}/min",
-            "Received KB/sec": round(recv_kb_all, 2),
-            "Sent KB/sec": round(sent_kb_all, 2),
-            "Avg Bytes": round(avg_bytes_all, 1),
-        })
+    for label in ordered_label_names(labels):
+        stats = labels[label]
+        if stats["count"] == 0:
+            continue
+        recap.append(row(label, stats, duration_ms))
+        merge_stats(total, dict(stats))
+
+    if total["count"]:
+        recap.append(row("TOTAL", total, duration_ms))
 
     return recap
+
+
+class _WindowSpool:
+    """
+    Échantillons mis de côté sur disque (CSV temporaire) pendant la passe en
+    mode fenêtre, puis rejoués vers les collecteurs pour la seule fenêtre
+    retenue : mémoire constante, une écriture + une lecture disque en plus.
+    """
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile("w+", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.header = None
+
+    def add(self, label, r):
+        if self.header is None:
+            self.header = list(r)
+        self.writer.writerow([label] + [r.get(k) for k in self.header])
+
+    def replay(self, collectors, start_ms=None, end_ms=None):
+        try:
+            self.file.seek(0)
+            for values in csv.reader(self.file):
+                r = dict(zip(self.header, values[1:]))
+                sample = parse_sample(r, with_bytes=False)
+                if sample is None:
+                    continue
+                ts = sample[1]
+                if start_ms is not None and not start_ms <= ts < end_ms:
+                    continue
+                for c in collectors:
+                    c.add(values[0], ts, sample[2], sample[3], r)
+        finally:
+            self.file.close()
+
+
+def compute_recap(rows, collectors=None, window=None, label_mapper=None, plan=None):
+    """
+    Retourne une liste de dicts avec :
+      Label, Samples, Average (ms), Min (ms), Max (ms), Std Dev (ms),
+      Error %, Throughput (/min), Received KB/sec, Sent KB/sec, Avg Bytes
+
+    `rows` peut être un itérable (flux) : une seule passe est faite.
+    `collectors` : objets avec add(label, ts, elapsed, success, row),
+    alimentés pendant cette même passe.
+    `window` : détecteur de régime stable (steady_state.SteadyStateDetector).
+    Les agrégats sont alors tenus par tranche de temps et seules les tranches
+    de la fenêtre retenue en fin de passe sont fusionnées. Les collecteurs
+    reçoivent eux aussi la seule fenêtre (échantillons rejoués depuis un
+    spool disque), sauf ceux marqués `whole_run` (date d'exécution, séries
+    temporelles, export Parquet) alimentés en direct sur tout le run.
+    `label_mapper` : label brut -> transaction logique (label_rules.LabelMapper),
+    appliqué avant les agrégats et les collecteurs.
+    `plan` : metric_graph.plan_metrics ; seules les colonnes demandées sont
+    calculées (fonction d'ajout fusionnée), les autres sont absentes du recap.
+    """
+    add = add_sample if plan is None else plan["add"]
+    with_bytes = plan is None or plan["bytes"]
+    labels = {}
+    buckets = {}  # label -> {index tranche: stats} (mode fenêtre)
+    collectors = collectors or []
+    bucket_ms = window.bucket_ms if window is not None else None
+    windowed = []
+    spool = None
+    if window is not None:
+        windowed = [c for c in collectors if not getattr(c, "whole_run", False)]
+        collectors = [c for c in collectors if getattr(c, "whole_run", False)]
+        if windowed:
+            spool = _WindowSpool()
+
+    for r in rows:
+        sample = parse_sample(r, with_bytes)
+        if sample is None:
+            continue
+        label, ts, elapsed, success, bytes_val, sent_bytes_val = sample
+        if label_mapper is not None:
+            label = label_mapper(label)
+
+        if window is None:
+            stats = labels.get(label)
+            if stats is None:
+                stats = labels[label] = new_stats()
+        else:
+            window.add(label, ts, elapsed, success, r)
+            per_bucket = buckets.setdefault(label, {})
+            idx = ts // bucket_ms
+            stats = per_bucket.get(idx)
+            if stats is None:
+                stats = per_bucket[idx] = new_stats()
+
+        add(stats, ts, elapsed, success, bytes_val, sent_bytes_val)
+
+        for c in collectors:
+            c.add(label, ts, elapsed, success, r)
+        if spool is not None:
+            spool.add(label, r)
+
+    if window is not None:
+        win = window.resolve()
+        if spool is not None:
+            if win is None:
+                spool.replay(windowed)
+            else:
+                spool.replay(windowed, win["start_ms"], win["end_ms"])
+        for label, per_bucket in buckets.items():
+            stats = new_stats()
+            for idx, bucket_stats in per_bucket.items():
+                if win is None or win["start_ms"] <= idx * bucket_ms < win["end_ms"]:
+                    merge_stats(stats, bucket_stats)
+            if stats["count"]:
+                labels[label] = stats
+
+    if plan is None:
+        return build_recap(labels)
+    return build_recap(labels, row=plan["row"])
@@ -0,0 +1,153 @@
+import os
+import logging
+
+from metrics import to_int
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # dépendance optionnelle (PARQUET_OUTPUT)
+    pa = None
+    pq = None
+
+
+def parquet_available():
+    return pa is not None
+
+
+def sample_schema():
+    """
+    Colonnes typées des échantillons ; labels, codes et threads encodés en
+    dictionnaire (quelques valeurs distinctes répétées des millions de fois).
+    """
+    dict_string = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("timeStamp", pa.timestamp("ms")),
+        ("label", dict_string),
+        ("rawLabel", dict_string),
+        ("elapsed", pa.int32()),
+        ("success", pa.bool_()),
+        ("responseCode", dict_string),
+        ("threadName", dict_string),
+        ("allThreads", pa.int32()),
+        ("latency", pa.int32()),
+        ("connect", pa.int32()),
+        ("bytes", pa.int64()),
+        ("sentBytes", pa.int64()),
+    ])
+
+
+def _optional_int(row, key):
+    value = row.get(key)
+    if value is None or value == "":
+        return None
+    return to_int(value, None)
+
+
+class ParquetSampleCollector:
+    """
+    Collecteur pour compute_recap : écrit les échantillons analysés (label
+    normalisé compris) en Parquet, par row groups de `row_group_size`
+    lignes, sans DataFrame complet en mémoire.
+    Partitionnement Hive : <output_dir>/samples/users=<n>/part-0.parquet.
+    """
+
+    # tous les échantillons, même hors fenêtre stable (voir metrics.compute_recap)
+    whole_run = True
+
+    def __init__(self, output_dir, users, row_group_size=65536):
+        self.path = os.path.join(output_dir, "samples", f"users={users}", "part-0.parquet")
+        self.row_group_size = row_group_size
+        self.schema = sample_schema()
+        self.columns = {name: [] for name in self.schema.names}
+        self.writer = None
+        self.rows = 0
+
+    def add(self, label, ts, elapsed, success, row):
+        c = self.columns
+        c["timeStamp"].append(ts)
+        c["label"].append(label)
+        c["rawLabel"].append(row.get("label"))
+        c["elapsed"].append(int(elapsed))
+        c["success"].append(success)
+        c["responseCode"].append(row.get("responseCode"))
+        c["threadName"].append(row.get("threadName"))
+        c["allThreads"].append(_optional_int(row, "allThreads"))
+        c["latency"].append(_optional_int(row, "Latency"))
+        c["connect"].append(_optional_int(row, "Connect"))
+        c["bytes"].append(to_int(row.get("bytes", 0)))
+        c["sentBytes"].append(to_int(row.get("sentBytes", 0)))
+        if len(c["timeStamp"]) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.columns["timeStamp"]:
+            return
+        if self.writer is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+        batch = pa.Table.from_pydict(self.columns, schema=self.schema)
+        self.writer.write_table(batch, row_group_size=self.row_group_size)
+        self.rows += batch.num_rows
+        self.columns = {name: [] for name in self.schema.names}
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            logging.info("  -> %d échantillons écrits en Parquet : %s", self.rows, self.path)
+
+
+def _rows_to_table(rows):
+    """
+    Liste de dicts -> table Arrow (colonnes = union des clés). Une colonne
+    aux types mélangés (ex : nombre ou "") est écrite en texte.
+    """
+    keys = []
+    for r in rows:
+        for k in r:
+            if k not in keys:
+                keys.append(k)
+    columns = {}
+    for k in keys:
+        values = [r.get(k) for r in rows]
+        present = [v for v in values if v is not None and v != ""]
+        numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present)
+        if numeric:
+            values = [v if v != "" else None for v in values]
+        else:
+            values = [None if v is None else str(v) for v in values]
+        columns[k] = values
+    return pa.Table.from_pydict(columns)
+
+
+def write_recap_tables(output_dir, scenarios_data, rt_matrix, err_matrix):
+    """
+    Petites tables à côté des échantillons :
+      recap.parquet  : lignes de recap de chaque scénario (colonne Scenario) ;
+      matrix.parquet : Label, Users, Response Time (ms), Error % (format long).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    recap_rows = []
+    for scenario, rows in scenarios_data.items():
+        for r in rows:
+            recap_rows.append(dict({"Scenario": scenario}, **r))
+    if recap_rows:
+        pq.write_table(_rows_to_table(recap_rows), os.path.join(output_dir, "recap.parquet"))
+
+    matrix_rows = []
+    for label in rt_matrix.keys() | err_matrix.keys():
+        for users in sorted(rt_matrix.get(label, {}).keys() | err_matrix.get(label, {}).keys()):
+            matrix_rows.append({
+                "Label": label,
+                "Users": users,
+                "Response Time (ms)": rt_matrix.get(label, {}).get(users),
+                "Error %": err_matrix.get(label, {}).get(users),
+            })
+    if matrix_rows:
+        matrix_rows.sort(key=lambda r: (r["Users"], r["Label"]))
+        pq.write_table(_rows_to_table(matrix_rows), os.path.join(output_dir, "matrix.parquet"))
+
+    logging.info("Tables Parquet (recap, matrice) écrites dans : %s", output_dir)
@@ -0,0 +1,427 @@
+import os
+import time
+import logging
+from collections import defaultdict
+
+from jmeter_io import find_scenario_files, group_scenario_files, merge_jmeter_csv, scenario_base_name
+from metrics import compute_recap, ExecutionRangeCollector, parse_throughput, format_execution_range
+from sampling import compute_preview_recap
+from steady_state import SteadyStateDetector
+from latency_breakdown import LatencyBreakdownCollector
+from error_analysis import ErrorCollector
+from timeseries import TimeSeriesCollector
+from exact_percentiles import ExactPercentileCollector, MemoryBudget
+from sla import load_sla_definitions, needs_percentiles, SlaCollector, evaluate_sla
+from capacity import analyse_capacity
+from coordinated_omission import CoordinatedOmissionCollector
+from label_rules import load_label_rules, LabelMapper
+from heatmap import LatencyHeatmapCollector
+from live_ingest import run_ingestion_server
+from parquet_export import parquet_available, ParquetSampleCollector, write_recap_tables
+from time_index import resolve_time_window, merge_time_window
+from histogram import HistogramPercentileCollector
+from chunked import compute_recap_chunked
+from planner import plan_scenario, write_run_profile
+from resources import load_resource_metrics, find_cpu_metric, correlate_resources
+from anomalies import AnomalyDetector
+from bootstrap import BootstrapCollector
+from metric_graph import plan_metrics
+from concurrency import compute_recaps_by_concurrency
+from excel_export import write_excel, RECAP_COLUMNS as EXCEL_COLUMNS
+from word_export import generate_word_report, RECAP_COLUMNS as WORD_COLUMNS
+from html_export import write_html, RECAP_COLUMNS as HTML_COLUMNS
+
+# colonnes lues par le pipeline lui-même (matrices, capacité, SLA, ressources)
+PIPELINE_COLUMNS = ["Average (ms)", "Error %", "Throughput (/min)"]
+
+
+def required_columns(options, word=False):
+    """
+    Colonnes du recap demandées par les exports actifs et le pipeline, plus
+    RECAP_COLUMNS (ex : "90% Line (ms)" attendu par script_recap) :
+    entrée de metric_graph.plan_metrics. L'Excel, toujours écrit, affiche
+    toutes les colonnes calculées : seuls les percentiles sont élagués ici.
+    """
+    columns = [key for _, key in EXCEL_COLUMNS] + PIPELINE_COLUMNS
+    if word:
+        columns += WORD_COLUMNS
+    if options["html_output"]:
+        columns += [key for _, key in HTML_COLUMNS]
+    return columns + options["recap_columns"]
+
+
+def make_scenario_collectors(options, sla_definitions=None, users=None, metric_plan=None, exact_budget=None):
+    """
+    Collecteurs d'un scénario selon les options (nom -> collecteur),
+    alimentés pendant la passe unique de compute_recap.
+    `users` : palier du scénario (partition de l'export Parquet).
+    `metric_plan` : metric_graph.plan_metrics (percentiles demandés par colonne).
+    `exact_budget` : exact_percentiles.MemoryBudget partagé entre scénarios
+    alimentés par la même passe (niveaux de concurrence).
+    """
+    parts = {"exec_range": ExecutionRangeCollector()}
+    if options["latency_breakdown"]:
+        parts["breakdown"] = LatencyBreakdownCollector()
+    if options["error_analysis"]:
+        parts["errors"] = ErrorCollector(options["error_top_k"], options["error_sketch_capacity"])
+    if options["exact_percentiles"] or (sla_definitions and needs_percentiles(sla_definitions)) \
+            or (metric_plan and metric_plan["percentiles"]):
+        parts["exact"] = ExactPercentileCollector(options["exact_memory_mb"], spill_dir=options["exact_spill_dir"],
+                                                  budget=exact_budget)
+    if sla_definitions:
+        parts["sla"] = SlaCollector(sla_definitions)
+    if options["html_output"] or options["resource_files"]:
+        parts["timeseries"] = TimeSeriesCollector(options["timeseries_bucket_s"])
+    if options["co_correction"]:
+        parts["co"] = CoordinatedOmissionCollector(options["co_expected_interval_ms"])
+    if options["latency_heatmap"]:
+        parts["heatmap"] = LatencyHeatmapCollector(options["heatmap_bucket_s"], options["heatmap_columns"])
+    if options["parquet_output"] and parquet_available():
+        parts["parquet"] = ParquetSampleCollector(options["parquet_output"], users, options["parquet_row_group"])
+    if options["anomaly_detection"]:
+        parts["anomalies"] = AnomalyDetector(options["anomaly_bucket_s"], options["anomaly_z"],
+                                             options["anomaly_warmup"])
+    if options["bootstrap_ci"]:
+        parts["bootstrap"] = BootstrapCollector(options["bootstrap_sample_size"], options["bootstrap_resamples"],
+                                                options["bootstrap_time_budget_s"], seed=options["bootstrap_seed"])
+    return parts
+
+
+def apply_plan(plan, parts, options):
+    """
+    Adapte le collecteur de percentiles au mode choisi par planner.plan_scenario.
+    """
+    mode = plan["mode"]
+    if mode == "exact":
+        # budget du planificateur : tout reste en mémoire
+        parts["exact"] = ExactPercentileCollector(plan["memory_budget_bytes"] / 1024 / 1024,
+                                                  spill_dir=options["exact_spill_dir"])
+    elif mode == "spill" and "exact" in parts:
+        memory_mb = min(options["exact_memory_mb"], plan["memory_budget_bytes"] / 1024 / 1024)
+        parts["exact"] = ExactPercentileCollector(memory_mb, spill_dir=options["exact_spill_dir"])
+    elif mode == "sketch":
+        parts["exact"] = HistogramPercentileCollector()
+
+
+def close_collectors(parts):
+    """
+    Libère les collecteurs d'un scénario non enregistré (recap vide, niveau
+    ignoré, erreur) : Parquet finalisé (pied de page, fichier lisible),
+    runs de percentiles supprimés.
+    """
+    if "parquet" in parts:
+        parts["parquet"].close()
+    if "exact" in parts and hasattr(parts["exact"], "cleanup"):
+        parts["exact"].cleanup()
+
+
+def preview_ignored(options, parts, window=None):
+    """
+    Ce que le mode preview (recap sur échantillon, sans passe complète)
+    n'applique pas : collecteurs autres que la date d'exécution (feuilles
+    SLA, erreurs, décomposition... vides), fenêtre stable, fenêtre temporelle.
+    """
+    ignored = [name for name in parts if name != "exec_range"]
+    if window is not None:
+        ignored.append("steady_state")
+    if options["time_window_start"] or options["time_window_end"]:
+        ignored.append("time_window")
+    return ignored
+
+
+def scenario_rows(paths, options):
+    """
+    Lignes d'un groupe de fichiers : fusion complète (lecture en arrière-plan
+    si PREFETCH_IO), ou seulement la fenêtre
+    TIME_WINDOW_START / TIME_WINDOW_END lue via l'index creux (time_index).
+    """
+    if not (options["time_window_start"] or options["time_window_end"]):
+        prefetch = (options["prefetch_block_kb"], options["prefetch_depth"]) if options["prefetch_io"] else None
+        return merge_jmeter_csv(paths, prefetch)
+    start_ms, end_ms = resolve_time_window(paths, options["time_window_start"],
+                                           options["time_window_end"], options["index_step_kb"])
+    logging.info("Fenêtre temporelle : %s", format_execution_range(start_ms, end_ms))
+    return merge_time_window(paths, start_ms, end_ms, options["index_step_kb"])
+
+
+def run_campaign(results_folder, output_file, doc_template, doc_output, options):
+    """
+    Traite un dossier de résultats (une campagne) : recap par palier
+    d'utilisateurs, fichier Excel, puis rapport Word si le template est défini.
+    """
+    files = find_scenario_files(results_folder)
+    sla_definitions = load_sla_definitions(options["sla_file"]) if options["sla_file"] else None
+
+    if options["parquet_output"] and not parquet_available():
+        logging.warning("PARQUET_OUTPUT défini mais pyarrow n'est pas installé : export Parquet ignoré.")
+
+    label_mapper = None
+    if options["label_rules_file"] or options["label_max_distinct"]:
+        rules = load_label_rules(options["label_rules_file"]) if options["label_rules_file"] else None
+        label_mapper = LabelMapper(rules, options["label_max_distinct"])
+
+    # percentiles calculés seulement si un export actif ou RECAP_COLUMNS les demande
+    metric_plan = plan_metrics(required_columns(options, bool(doc_template and doc_output)))
+    logging.info("Colonnes du recap calculées : %s", ", ".join(metric_plan["columns"]))
+
+    scenarios_data = {}
+    scenarios_users = []
+    rt_matrix = defaultdict(dict)   # label -> {users: avg}
+    err_matrix = defaultdict(dict)  # label -> {users: error%}
+    tp_matrix = defaultdict(dict)   # label (+ TOTAL) -> {users: req/s}
+    avg_matrix = defaultdict(dict)  # label (+ TOTAL) -> {users: avg}
+    scenario_exec_ranges = {}       # users -> "début - fin"
+    scenario_recaps_by_users = {}   # users -> recap
+    scenario_windows = {}           # users -> fenêtre stable retenue
+    sheet_windows = {}              # nom de feuille -> fenêtre stable retenue
+    latency_breakdowns = {}         # users -> décomposition par label
+    error_breakdowns = {}           # users -> top-K signatures d'erreur
+    co_breakdowns = {}              # users -> latences brutes / corrigées (CO)
+    heatmaps = {}                   # users -> heatmap latence x temps
+    scenario_timeseries = {}        # nom de feuille -> séries temporelles
+    sla_matrix = defaultdict(dict)  # label -> {users: PASS/FAIL}
+    profile = {"results_folder": results_folder, "scenarios": []}
+    resource_usage = {}             # users -> utilisation par métrique serveur
+    resource_demand = {}            # users -> CPU-ms par requête par label
+    anomalies = {}                  # users -> anomalies détectées
+
+    resource_metrics = None
+    cpu_metric = None
+    if options["resource_files"]:
+        resource_metrics = load_resource_metrics(options["resource_files"])
+        cpu_metric = find_cpu_metric(resource_metrics, options["resource_cpu_metric"])
+        logging.info("Métrique CPU retenue : %s", cpu_metric or "aucune")
+
+    def register(users, base_name, recap, parts, window=None):
+        """
+        Enregistre le recap d'un scénario et les résultats de ses collecteurs.
+        """
+        if users not in scenarios_users:
+            scenarios_users.append(users)
+
+        if "exact" in parts:
+            parts["exact"].apply_to_recap(recap)
+        if "bootstrap" in parts:
+            parts["bootstrap"].apply_to_recap(recap)
+        if "sla" in parts:
+            for label, status in evaluate_sla(recap, parts["sla"]).items():
+                sla_matrix[label][users] = status
+        if "breakdown" in parts:
+            latency_breakdowns[users] = parts["breakdown"].results()
+        if "errors" in parts:
+            error_breakdowns[users] = parts["errors"].results()
+        if "co" in parts:
+            co_breakdowns[users] = parts["co"].results()
+        if "heatmap" in parts:
+            heatmaps[users] = parts["heatmap"].results()
+        if "anomalies" in parts:
+            anomalies[users] = parts["anomalies"].results()
+        if "parquet" in parts:
+            parts["parquet"].close()
+        if "timeseries" in parts:
+            series = parts["timeseries"].series()
+            scenario_timeseries[base_name] = series
+            if resource_metrics:
+                exec_range = parts["exec_range"]
+                usage, demand = correlate_resources(resource_metrics, series,
+                                                    exec_range.start_ms, exec_range.end_ms,
+                                                    cpu_metric, options["resource_cpu_cores"])
+                averages = {r["Label"]: r["Average (ms)"] for r in recap}
+                cpu_mean = next((u["Mean"] for u in usage if u["Label"] == cpu_metric), "")
+                for d in demand:
+                    d["Average (ms)"] = averages.get(d["Label"], "")
+                    if d["Label"] == "TOTAL":
+                        d["CPU %"] = cpu_mean
+                resource_usage[users] = usage
+                resource_demand[users] = demand
+        if window is not None and window.window is not None:
+            scenario_windows[users] = window.describe()
+            sheet_windows[base_name] = window.describe()
+
+        scenarios_data[base_name] = recap
+        scenario_exec_ranges[users] = parts["exec_range"].to_string()
+        scenario_recaps_by_users[users] = recap
+
+        for r in recap:
+            tp_matrix[r["Label"]][users] = parse_throughput(r["Throughput (/min)"]) / 60.0
+            avg_matrix[r["Label"]][users] = r["Average (ms)"]
+            if r["Label"] == "TOTAL":
+                continue
+            label = r["Label"]
+            rt_matrix[label][users] = r["Average (ms)"]
+            err_matrix[label][users] = r["Error %"]
+
+    if options["concurrency_mode"]:
+        # un seul run en montée de charge : un scénario par niveau de threads
+        logging.info("--------------------------------------------------")
+        if options["preview_mode"]:
+            logging.warning("PREVIEW_MODE ignoré en mode concurrence : passe complète")
+        logging.info("Mode concurrence : découpage par threads actifs de %s", ", ".join(files))
+        level_parts = {}
+        # une seule passe alimente tous les niveaux : un seul budget EXACT_MEMORY_MB
+        exact_budget = MemoryBudget(options["exact_memory_mb"])
+
+        def make_collectors(level):
+            level_parts[level] = make_scenario_collectors(options, sla_definitions, level, metric_plan, exact_budget)
+            return list(level_parts[level].values())
+
+        try:
+            levels = compute_recaps_by_concurrency(scenario_rows(files, options),
+                                                   options["concurrency_bucket"],
+                                                   make_collectors,
+                                                   options["concurrency_min_samples"],
+                                                   label_mapper=label_mapper)
+        except Exception:
+            for parts in level_parts.values():
+                close_collectors(parts)
+            raise
+        for level, parts in level_parts.items():
+            if level not in levels:
+                close_collectors(parts)
+        for level, (recap, _) in levels.items():
+            register(level, f"Concurrency-{level}-users", recap, level_parts[level])
+    else:
+        for users, paths in group_scenario_files(files).items():
+            logging.info("--------------------------------------------------")
+            logging.info("Traitement du scénario %d utilisateurs : %s", users, ", ".join(paths))
+
+            base_name = scenario_base_name(paths)
+            parts = make_scenario_collectors(options, sla_definitions, users, metric_plan)
+
+            window = None
+            if options["steady_state"] or options["steady_trim_start_s"] is not None \
+                    or options["steady_trim_end_s"] is not None:
+                window = SteadyStateDetector(options["steady_bucket_s"],
+                                             options["steady_trim_start_s"],
+                                             options["steady_trim_end_s"])
+
+            plan = None
+            started = time.perf_counter()
+            try:
+                if not options["preview_mode"]:
+                    plan = plan_scenario(paths, options, parts, window)
+                    apply_plan(plan, parts, options)
+
+                if options["preview_mode"]:
+                    ignored = preview_ignored(options, parts, window)
+                    if ignored:
+                        logging.warning("PREVIEW_MODE : ignorés sur échantillon (résultats absents du rapport) "
+                                        ": %s", ", ".join(ignored))
+                    exec_range = parts["exec_range"]
+                    parts = {"exec_range": exec_range}
+                    recap = compute_preview_recap(paths, options["preview_sample_size"],
+                                                  options["preview_seed"], exec_range=exec_range,
+                                                  label_mapper=label_mapper)
+                elif plan["mode"] == "parallel":
+                    # le planificateur ne choisit parallel que si tous les collecteurs sont fusionnables
+                    recap = compute_recap_chunked(paths, options["parallel_workers"], options["parallel_chunk_mb"],
+                                                  list(parts.values()), label_mapper=label_mapper)
+                else:
+                    # fusion en flux des injecteurs (mode distribué), sans tout charger
+                    recap = compute_recap(scenario_rows(paths, options), collectors=list(parts.values()),
+                                          window=window, label_mapper=label_mapper, plan=metric_plan)
+            except Exception:
+                close_collectors(parts)
+                raise
+
+            profile["scenarios"].append({
+                "users": users,
+                "files": paths,
+                "plan": plan,
+                "duration_s": round(time.perf_counter() - started, 2),
+            })
+
+            if not recap:
+                logging.warning("  -> aucun échantillon retenu pour ce scénario, ignoré")
+                close_collectors(parts)
+                continue
+            register(users, base_name, recap, parts, window)
+
+    if label_mapper is not None:
+        label_mapper.log_summary()
+
+    if profile["scenarios"]:
+        write_run_profile(options["run_profile"] or os.path.splitext(output_file)[0] + "-profile.json", profile)
+
+    capacity = None
+    if options["capacity_analysis"]:
+        capacity = analyse_capacity(tp_matrix, avg_matrix)
+
+    write_excel(output_file, scenarios_data, scenarios_users, rt_matrix, err_matrix,
+                scenario_windows=sheet_windows,
+                latency_breakdowns=latency_breakdowns,
+                error_breakdowns=error_breakdowns,
+                sla_matrix=sla_matrix,
+                capacity=capacity,
+                co_breakdowns=co_breakdowns,
+                heatmaps=heatmaps,
+                resource_usage=resource_usage,
+                resource_demand=resource_demand,
+                anomalies=anomalies)
+
+    if options["parquet_output"] and parquet_available():
+        write_recap_tables(options["parquet_output"], scenarios_data, rt_matrix, err_matrix)
+
+    if options["html_output"]:
+        write_html(options["html_output"], scenarios_data, scenarios_users, rt_matrix, err_matrix,
+                   timeseries=scenario_timeseries,
+                   bucket_s=options["timeseries_bucket_s"],
+                   max_points=options["html_max_points"])
+
+    if doc_template and doc_output:
+        generate_word_report(doc_template, doc_output,
+                             scenarios_users, scenario_recaps_by_users, scenario_exec_ranges,
+                             scenario_windows=scenario_windows,
+                             error_breakdowns=error_breakdowns,
+                             capacity=capacity,
+                             co_breakdowns=co_breakdowns,
+                             heatmaps=heatmaps,
+                             resource_demand=resource_demand,
+                             anomalies=anomalies,
+                             template_cache_dir=options["template_cache_dir"])
+    else:
+        logging.info("DOC_TEMPLATE ou DOC_OUTPUT non défini, Word ignoré.")
+
+    return {
+        "users": sorted(scenarios_users),
+        "output_file": output_file,
+        "doc_output": doc_output if doc_template and doc_output else None,
+    }
+
+
+def run_live(output_file, doc_template, doc_output, options):
+    """
+    Mode live : agrège le flux du Backend Listener pendant le test, puis
+    produit Excel / Word pour un seul scénario, sans passe CSV.
+    """
+    aggregator = run_ingestion_server(options["live_host"],
+                                      options["live_http_port"],
+                                      options["live_udp_port"],
+                                      options["live_measurement"],
+                                      options["live_duration_s"],
+                                      options["live_idle_timeout_s"])
+    recap = aggregator.recap()
+    users = aggregator.users()
+
+    rt_matrix = defaultdict(dict)
+    err_matrix = defaultdict(dict)
+    for r in recap:
+        if r["Label"] == "TOTAL":
+            continue
+        rt_matrix[r["Label"]][users] = r["Average (ms)"]
+        err_matrix[r["Label"]][users] = r["Error %"]
+
+    write_excel(output_file, {f"Live-{users}-users": recap}, [users], rt_matrix, err_matrix)
+
+    if doc_template and doc_output:
+        generate_word_report(doc_template, doc_output,
+                             [users], {users: recap}, {users: aggregator.exec_range()},
+                             template_cache_dir=options["template_cache_dir"])
+    else:
+        logging.info("DOC_TEMPLATE ou DOC_OUTPUT non défini, Word ignoré.")
+
+    return {
+        "users": [users],
+        "output_file": output_file,
+        "doc_output": doc_output if doc_template and doc_output else None,
+    }
@@ -0,0 +1,177 @@
+import os
+import json
+import random
+import shutil
+import logging
+import tempfile
+import multiprocessing
+
+from sampling import sample_jmeter_csv
+from exact_percentiles import VALUE_SIZE, PEAK_VALUE_SIZE
+
+# lignes échantillonnées pour estimer lignes / labels
+PLAN_SAMPLE_LINES = 2000
+
+
+def _meminfo_available():
+    """
+    MemAvailable de /proc/meminfo (Linux) en octets : contrairement à
+    SC_AVPHYS_PAGES (MemFree), compte le cache de pages récupérable, qui
+    gonfle après la lecture d'un gros fichier. None si absent.
+    """
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def available_memory_bytes():
+    """
+    Mémoire physique disponible (MemAvailable sous Linux, sysconf sous Unix,
+    GlobalMemoryStatusEx sous Windows), None si inconnue.
+    """
+    available = _meminfo_available()
+    if available is not None:
+        return available
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        pass
+    if os.name == "nt":
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+    return None
+
+
+def estimate_scenario(paths, sample_lines=PLAN_SAMPLE_LINES):
+    """
+    Taille, lignes estimées (longueur moyenne des lignes échantillonnées) et
+    labels distincts vus dans l'échantillon (borne basse).
+    """
+    rng = random.Random(0)
+    size = 0
+    est_rows = 0
+    labels = set()
+    for path in paths:
+        rows, info = sample_jmeter_csv(path, sample_lines, rng)
+        size += info["file_size"]
+        est_rows += info["est_rows"]
+        labels.update(r.get("label") for r in rows)
+    return {"size_bytes": size, "est_rows": est_rows, "est_labels": len(labels)}
+
+
+def plan_scenario(paths, options, parts, window=None):
+    """
+    Choisit le mode d'exécution d'un scénario :
+      exact     : percentiles exacts en mémoire (tient dans le budget RAM) ;
+      spill     : percentiles exacts avec déversement disque ;
+      sketch    : flux + percentiles approchés par histogramme (RAM et disque insuffisants) ;
+      parallel  : plages d'octets agrégées en parallèle puis fusionnées ;
+      streaming : flux, sans percentiles.
+    EXECUTION_MODE force le choix (sauf parallel si un collecteur séquentiel
+    est actif). Le budget RAM est une fraction de la mémoire disponible :
+    le mode par défaut ne dépasse jamais ce budget.
+    Retourne un dict (mode, raisons, estimations) pour les logs et le profil.
+    """
+    estimate = estimate_scenario(paths)
+    available = available_memory_bytes()
+    budget = int((available or 2 * 1024 ** 3) * options["planner_memory_fraction"])
+    spill_dir = options["exact_spill_dir"] or tempfile.gettempdir()
+    disk_free = shutil.disk_usage(spill_dir).free
+    # un processus de pool (mode batch) ne relance pas de pool
+    cpus = 1 if multiprocessing.parent_process() is not None else (os.cpu_count() or 1)
+
+    needs_percentiles = "exact" in parts
+    # seuls les collecteurs fusionnables (`mergeable`) suivent l'exécution
+    # parallèle ; percentiles exacts compris (pas de fusion exacte)
+    sequential = [k for k, c in parts.items() if not getattr(c, "mergeable", False)]
+    if window is not None:
+        sequential.append("steady_state")
+    if options["time_window_start"] or options["time_window_end"]:
+        sequential.append("time_window")
+    if options["label_max_distinct"]:
+        # OTHER dépend de l'ordre d'arrivée des labels : une seule passe ordonnée
+        sequential.append("label_max_distinct")
+    # pic du collecteur exact : valeurs + copies de tri / sélection (exact_percentiles)
+    percentile_bytes = estimate["est_rows"] * PEAK_VALUE_SIZE
+    # runs déversés : entiers 32 bits sur disque
+    spill_bytes = estimate["est_rows"] * VALUE_SIZE
+    size_mb = estimate["size_bytes"] / 1024 / 1024
+
+    reasons = [
+        f"{size_mb:.0f} Mo, ~{estimate['est_rows']} lignes, >= {estimate['est_labels']} labels",
+        f"RAM disponible {available / 1024 ** 2:.0f} Mo, budget {budget / 1024 ** 2:.0f} Mo"
+        if available else f"RAM disponible inconnue, budget {budget / 1024 ** 2:.0f} Mo",
+    ]
+
+    mode = options["execution_mode"]
+    if mode != "auto":
+        reasons.append(f"EXECUTION_MODE={mode} (forcé)")
+        if mode == "parallel" and sequential:
+            mode = "spill" if needs_percentiles else "streaming"
+            reasons.append(f"parallel impossible avec {', '.join(sequential)} : {mode}")
+            logging.warning("EXECUTION_MODE=parallel ignoré (collecteurs non fusionnables : %s), mode %s",
+                            ", ".join(sequential), mode)
+    elif needs_percentiles:
+        if percentile_bytes <= budget:
+            mode = "exact"
+            reasons.append(f"percentiles : {percentile_bytes / 1024 ** 2:.0f} Mo tiennent dans le budget")
+        elif spill_bytes * 2 <= disk_free:
+            mode = "spill"
+            reasons.append(f"percentiles : {percentile_bytes / 1024 ** 2:.0f} Mo > budget, "
+                           f"déversement sur {spill_dir}")
+        else:
+            mode = "sketch"
+            reasons.append("percentiles : ni la RAM ni le disque ne suffisent, histogramme approché")
+    elif not sequential and cpus > 1 and size_mb >= options["parallel_min_mb"]:
+        mode = "parallel"
+        reasons.append(f"fichiers >= {options['parallel_min_mb']} Mo et {cpus} cœurs, sans collecteur séquentiel")
+    else:
+        mode = "streaming"
+        if sequential:
+            reasons.append(f"collecteurs séquentiels : {', '.join(sequential)}")
+
+    if estimate["est_labels"] > 1000:
+        reasons.append("beaucoup de labels distincts : voir LABEL_RULES_FILE / LABEL_MAX_DISTINCT")
+
+    plan = dict(estimate)
+    plan.update({
+        "mode": mode,
+        "reasons": reasons,
+        "available_memory_bytes": available,
+        "memory_budget_bytes": budget,
+        "disk_free_bytes": disk_free,
+        "cpus": cpus,
+    })
+    logging.info("  -> plan d'exécution : %s (%s)", mode, " ; ".join(reasons))
+    return plan
+
+
+def write_run_profile(path, profile):
+    """
+    Profil d'exécution (JSON) : plan et durée de chaque scénario.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+    logging.info("Profil d'exécution écrit : %s", path)
@@ -0,0 +1,321 @@
+import os
+import csv
+import glob
+import heapq
+import math
+import logging
+from datetime import datetime, timezone
+
+from metrics import ordered_label_names
+
+# colonnes de temps reconnues dans un CSV générique / export Prometheus
+TIME_COLUMNS = ("timestamp", "time", "date", "datetime", "ts")
+NAME_COLUMNS = ("metric", "__name__", "name", "series")
+
+BUSY_SUFFIX = "CPU busy %"
+
+
+def parse_timestamp(value):
+    """
+    Horodatage -> ms epoch : epoch s ou ms, "YYYY-MM-DD HH:MM:SS" (suffixe
+    UTC / Z : UTC, sinon heure locale), ISO 8601. None si illisible.
+    """
+    v = value.strip().strip('"')
+    if not v:
+        return None
+    try:
+        num = float(v)
+        return int(num if num > 1e11 else num * 1000)
+    except ValueError:
+        pass
+    utc = v.endswith(" UTC") or v.endswith("Z")
+    v = v[:-4] if v.endswith(" UTC") else v.rstrip("Z")
+    try:
+        dt = datetime.fromisoformat(v.replace("T", " "))
+    except ValueError:
+        return None
+    if utc and dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def _to_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _read_sar(path, lines, prefix):
+    """
+    Sortie `sadf -d` : "# hostname;interval;timestamp;CPU;%user;...;%idle".
+    Seules les lignes agrégées (CPU = -1 / all) sont gardées ; ajoute
+    « CPU busy % » = 100 - %idle.
+    """
+    header = lines[0].lstrip("#").strip().split(";")
+    ts_col = header.index("timestamp")
+    cpu_col = header.index("CPU") if "CPU" in header else None
+    out = []
+    for line in lines[1:]:
+        if line.startswith("#") or not line.strip():
+            continue
+        values = line.strip().split(";")
+        if len(values) != len(header):
+            continue
+        if cpu_col is not None and values[cpu_col] not in ("-1", "all"):
+            continue
+        ts = parse_timestamp(values[ts_col])
+        if ts is None:
+            continue
+        for i, name in enumerate(header):
+            if name in ("hostname", "interval", "timestamp", "CPU"):
+                continue
+            value = _to_number(values[i])
+            if value is not None:
+                out.append((ts, f"{prefix}{name}", value))
+                if name == "%idle":
+                    out.append((ts, f"{prefix}{BUSY_SUFFIX}", 100.0 - value))
+    return out
+
+
+def _read_nmon(path, lines, prefix):
+    """
+    Fichier nmon : lignes ZZZZ,Tnnnn,HH:MM:SS,DD-MON-YYYY (instants), en-têtes
+    de section (ex : CPU_ALL,CPU Total,User%,Sys%,...) puis données
+    SECTION,Tnnnn,... Ajoute « CPU busy % » = User% + Sys% (CPU_ALL).
+    """
+    snapshots = {}
+    headers = {}
+    data = []
+    for values in csv.reader(lines):
+        if len(values) < 2:
+            continue
+        section, tag = values[0], values[1]
+        if section == "ZZZZ" and len(values) >= 4:
+            try:
+                dt = datetime.strptime(f"{values[2]} {values[3].title()}", "%H:%M:%S %d-%b-%Y")
+            except ValueError:
+                continue
+            snapshots[tag] = int(dt.timestamp() * 1000)
+        elif tag.startswith("T") and tag[1:].isdigit():
+            data.append(values)
+        elif section not in ("AAA", "BBBP"):
+            headers[section] = values[2:]
+
+    out = []
+    for values in data:
+        ts = snapshots.get(values[1])
+        columns = headers.get(values[0])
+        if ts is None or columns is None:
+            continue
+        row = {}
+        for name, raw in zip(columns, values[2:]):
+            value = _to_number(raw)
+            if value is not None:
+                row[name] = value
+                out.append((ts, f"{prefix}{values[0]} {name}", value))
+        if values[0] == "CPU_ALL" and "User%" in row and "Sys%" in row:
+            out.append((ts, f"{prefix}{BUSY_SUFFIX}", row["User%"] + row["Sys%"]))
+    return out
+
+
+def _read_csv(path, lines, prefix):
+    """
+    CSV générique : une colonne de temps puis des colonnes numériques (format
+    large), ou export Prometheus long (temps, metric/__name__, [instance], value).
+    """
+    reader = csv.DictReader(lines)
+    fields = reader.fieldnames or []
+    lower = {f.lower(): f for f in fields}
+    ts_field = next((lower[c] for c in TIME_COLUMNS if c in lower), None)
+    if ts_field is None:
+        raise ValueError(f"Colonne de temps introuvable dans {path} (attendu : {', '.join(TIME_COLUMNS)})")
+    name_field = next((lower[c] for c in NAME_COLUMNS if c in lower), None)
+    value_field = lower.get("value")
+    instance_field = lower.get("instance")
+
+    out = []
+    for r in reader:
+        ts = parse_timestamp(r.get(ts_field) or "")
+        if ts is None:
+            continue
+        if name_field and value_field:
+            value = _to_number(r.get(value_field))
+            if value is None:
+                continue
+            name = r.get(name_field)
+            if instance_field and r.get(instance_field):
+                name = f"{name}{{{r.get(instance_field)}}}"
+            out.append((ts, f"{prefix}{name}", value))
+        else:
+            for f in fields:
+                if f == ts_field:
+                    continue
+                value = _to_number(r.get(f))
+                if value is not None:
+                    out.append((ts, f"{prefix}{f}", value))
+    return out
+
+
+def read_resource_file(path):
+    """
+    Fichier de métriques serveur (sar `sadf -d`, nmon, CSV / export Prometheus)
+    -> liste (ts_ms, métrique, valeur). Les métriques sont préfixées par le
+    nom du fichier (plusieurs serveurs).
+    """
+    with open(path, encoding="utf-8", errors="replace", newline="") as f:
+        lines = f.read().splitlines()
+    if not lines:
+        return []
+    prefix = os.path.splitext(os.path.basename(path))[0] + " "
+    if lines[0].startswith("#") and ";" in lines[0]:
+        return _read_sar(path, lines, prefix)
+    if path.lower().endswith(".nmon") or lines[0].startswith("AAA,"):
+        return _read_nmon(path, lines, prefix)
+    return _read_csv(path, lines, prefix)
+
+
+def load_resource_metrics(pattern):
+    """
+    RESOURCE_FILES (glob, séparateur ;) -> métrique -> [(ts_ms, valeur)] trié.
+    """
+    paths = []
+    for part in pattern.split(";"):
+        paths.extend(sorted(glob.glob(part.strip())))
+    if not paths:
+        raise FileNotFoundError(f"Aucun fichier de métriques serveur trouvé : {pattern}")
+
+    metrics = {}
+    for path in paths:
+        points = read_resource_file(path)
+        logging.info("Métriques serveur : %s (%d points)", path, len(points))
+        for ts, name, value in points:
+            metrics.setdefault(name, []).append((ts, value))
+    for points in metrics.values():
+        points.sort()
+    return metrics
+
+
+def find_cpu_metric(metrics, name=None):
+    """
+    Métrique d'utilisation CPU (%) : RESOURCE_CPU_METRIC (sous-chaîne) si
+    défini, sinon « CPU busy % » dérivée de sar / nmon, sinon la première
+    métrique contenant « cpu ».
+    """
+    names = sorted(metrics)
+    if name:
+        return next((n for n in names if name in n), None)
+    busy = [n for n in names if n.endswith(BUSY_SUFFIX)]
+    if busy:
+        return busy[0]
+    return next((n for n in names if "cpu" in n.lower()), None)
+
+
+def _pearson(xs, ys):
+    n = len(xs)
+    if n < 3:
+        return None
+    mx = sum(xs) / n
+    my = sum(ys) / n
+    sxx = sum((x - mx) ** 2 for x in xs)
+    syy = sum((y - my) ** 2 for y in ys)
+    if not sxx or not syy:
+        return None
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / math.sqrt(sxx * syy)
+
+
+def join_intervals(points, series, start_ms, end_ms):
+    """
+    Jointure par fusion triée : chaque point de métrique (t, v) couvre
+    l'intervalle ]t précédent, t] (sar / nmon publient la moyenne de
+    l'intervalle écoulé) ; on lui associe les tranches JMeter
+    (TimeSeriesCollector.series) qui y tombent. Les deux flux sont lus une
+    seule fois, dans l'ordre.
+    Retourne [(durée ms, valeur, {label: [requêtes, somme elapsed]})].
+    """
+    samples = heapq.merge(*([(ts, label, count, avg * count) for ts, count, avg, _ in pts if count]
+                            for label, pts in series.items() if label != "TOTAL"))
+    pending = next(samples, None)
+
+    intervals = []
+    prev_ts = None
+    for ts, value in points:
+        if prev_ts is None or ts <= start_ms:
+            prev_ts = ts
+            continue
+        if prev_ts >= end_ms:
+            break
+        per_label = {}
+        while pending is not None and pending[0] <= ts:
+            b_ts, label, count, elapsed_sum = pending
+            if b_ts > prev_ts:
+                entry = per_label.setdefault(label, [0, 0.0])
+                entry[0] += count
+                entry[1] += elapsed_sum
+            pending = next(samples, None)
+        intervals.append((ts - prev_ts, value, per_label))
+        prev_ts = ts
+    return intervals
+
+
+def correlate_resources(metrics, series, start_ms, end_ms, cpu_metric=None, cpu_cores=1):
+    """
+    Pour un palier : utilisation moyenne / max de chaque métrique sur la
+    durée du scénario et corrélation avec débit et latence ; puis, pour la
+    métrique CPU, CPU-ms par requête par label (temps CPU de chaque
+    intervalle réparti au prorata du temps de réponse cumulé des labels).
+    Les intervalles sans requête (arrêt) comptent dans l'utilisation et la
+    corrélation au débit (débit nul) ; la latence n'y est pas définie, et
+    leur CPU n'est imputable à aucune requête.
+    Retourne (lignes par métrique, lignes de demande CPU par label).
+    """
+    usage = []
+    demand = []
+    for name in sorted(metrics):
+        intervals = join_intervals(metrics[name], series, start_ms, end_ms)
+        if not intervals:
+            continue
+        active = [(d, v, pl) for d, v, pl in intervals if sum(e[0] for e in pl.values())]
+        values = [v for _, v, _ in intervals]
+        throughput = [sum(e[0] for e in pl.values()) / (d / 1000.0) for d, _, pl in intervals]
+        latency = [sum(e[1] for e in pl.values()) / max(sum(e[0] for e in pl.values()), 1) for _, _, pl in active]
+        corr_tp = _pearson(values, throughput)
+        corr_rt = _pearson([v for _, v, _ in active], latency)
+        usage.append({
+            "Label": name,
+            "Intervals": len(intervals),
+            "Mean": round(sum(values) / len(values), 2),
+            "Max": round(max(values), 2),
+            "Corr. Throughput": round(corr_tp, 3) if corr_tp is not None else "",
+            "Corr. Latency": round(corr_rt, 3) if corr_rt is not None else "",
+        })
+
+        if name != cpu_metric:
+            continue
+        cpu_ms = {}
+        counts = {}
+        for duration, value, per_label in active:
+            interval_cpu = value / 100.0 * cpu_cores * duration
+            elapsed_total = sum(e[1] for e in per_label.values())
+            count_total = sum(e[0] for e in per_label.values())
+            for label, (count, elapsed_sum) in per_label.items():
+                share = elapsed_sum / elapsed_total if elapsed_total else count / count_total
+                cpu_ms[label] = cpu_ms.get(label, 0.0) + interval_cpu * share
+                counts[label] = counts.get(label, 0) + count
+        for label in ordered_label_names(cpu_ms):
+            demand.append({
+                "Label": label,
+                "Requests": counts[label],
+                "CPU-ms": round(cpu_ms[label], 1),
+                "CPU-ms / request": round(cpu_ms[label] / counts[label], 3) if counts[label] else "",
+            })
+        total_requests = sum(counts.values())
+        if total_requests:
+            total_cpu = sum(cpu_ms.values())
+            demand.append({
+                "Label": "TOTAL",
+                "Requests": total_requests,
+                "CPU-ms": round(total_cpu, 1),
+                "CPU-ms / request": round(total_cpu / total_requests, 3),
+            })
+    return usage, demand
@@ -0,0 +1,269 @@
+import os
+import csv
+import math
+import random
+import logging
+
+from metrics import LABEL_ORDER, to_float, to_int, to_bool_success, percentile
+
+Z_95 = 1.96
+
+# lignes lues en tête/fin de fichier pour borner la durée du run
+EDGE_BYTES = 64 * 1024
+# lecture arrière pour retrouver le début de la ligne d'un offset
+LINE_SCAN_BYTES = 4096
+# tirages max par ligne demandée (rejet des lignes longues)
+MAX_DRAWS_PER_LINE = 4
+
+
+def _parse_line(line_bytes, header):
+    try:
+        line = line_bytes.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    values = next(csv.reader([line]), None)
+    if not values or len(values) != len(header):
+        return None
+    return dict(zip(header, values))
+
+
+def _edge_timestamps(f, size, header_end, header):
+    """
+    Premier et dernier timeStamp du fichier, lus sur quelques Ko en tête/fin,
+    et longueur de la plus courte ligne lue (retour à la ligne compris).
+    """
+    def ts_of(lines):
+        out = []
+        for line in lines:
+            row = _parse_line(line, header)
+            if row is not None:
+                ts = to_int(row.get("timeStamp"), None)
+                if ts is not None:
+                    out.append(ts)
+        return out
+
+    f.seek(header_end)
+    head = f.read(EDGE_BYTES).split(b"\n")[:-1]
+    f.seek(max(header_end, size - EDGE_BYTES))
+    tail = f.read().split(b"\n")[1:]
+
+    head_ts = ts_of(head)
+    tail_ts = ts_of(tail)
+    first_ts = min(head_ts) if head_ts else None
+    last_ts = max(tail_ts) if tail_ts else None
+    min_len = min((len(line) + 1 for line in head + tail if line), default=None)
+    return first_ts, last_ts, min_len
+
+
+def _line_at(f, offset, header_end):
+    """
+    Ligne contenant l'octet `offset` (retour à la ligne compris).
+    """
+    start = header_end
+    pos = offset
+    while pos > header_end:
+        step = min(LINE_SCAN_BYTES, pos - header_end)
+        f.seek(pos - step)
+        nl = f.read(step).rfind(b"\n")
+        if nl >= 0:
+            start = pos - step + nl + 1
+            break
+        pos -= step
+    f.seek(start)
+    return f.readline()
+
+
+def sample_jmeter_csv(path, sample_size, rng):
+    """
+    Échantillonne `sample_size` lignes par positions d'octets aléatoires.
+    Un offset tombe dans une ligne avec une probabilité proportionnelle à sa
+    longueur : la ligne est gardée avec la probabilité min_len / longueur
+    (rejet), ce qui rend l'échantillon uniforme sur les lignes. min_len est
+    la plus courte ligne vue (tête/fin de fichier puis tirages).
+    Le nombre de lignes est estimé par taille x moyenne(1 / longueur) sur
+    tous les tirages (estimateur sans biais pour un tirage proportionnel).
+    Le coût ne dépend que de la taille d'échantillon, pas du fichier.
+
+    Retourne (rows, info) avec info = {file_size, est_rows, first_ts, last_ts}.
+    """
+    size = os.path.getsize(path)
+    rows = []
+
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        header_end = f.tell()
+        header = next(csv.reader([header_line.decode("utf-8-sig")]))
+
+        data_size = size - header_end
+        if data_size <= 0:
+            return rows, {"file_size": size, "est_rows": 0, "first_ts": None, "last_ts": None}
+
+        first_ts, last_ts, min_len = _edge_timestamps(f, size, header_end, header)
+
+        draws = 0
+        inverse_len_sum = 0.0
+        while len(rows) < sample_size and draws < sample_size * MAX_DRAWS_PER_LINE:
+            line = _line_at(f, header_end + rng.randrange(data_size), header_end)
+            draws += 1
+            inverse_len_sum += 1.0 / len(line)
+            if min_len is None or len(line) < min_len:
+                min_len = len(line)
+            if rng.random() * len(line) >= min_len:
+                continue
+            row = _parse_line(line, header)
+            if row is not None:
+                rows.append(row)
+
+    est_rows = int(round(data_size * inverse_len_sum / draws)) if draws else 0
+    info = {"file_size": size, "est_rows": est_rows, "first_ts": first_ts, "last_ts": last_ts}
+    logging.info("  -> preview %s : %d lignes échantillonnées, ~%d lignes estimées",
+                 path, len(rows), est_rows)
+    return rows, info
+
+
+def _mean_ci(values):
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, 0.0
+    var = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return mean, Z_95 * math.sqrt(var / n)
+
+
+def _proportion_ci(k, n):
+    """
+    Intervalle de Wilson à 95 % pour une proportion k/n, en %.
+    """
+    if n == 0:
+        return 0.0, 0.0
+    p = k / n
+    z2 = Z_95 * Z_95
+    denom = 1 + z2 / n
+    center = (p + z2 / (2 * n)) / denom
+    half = Z_95 * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / denom
+    return max(0.0, center - half) * 100.0, min(1.0, center + half) * 100.0
+
+
+def _percentile_ci(sorted_values, p):
+    """
+    IC à 95 % d'un percentile par statistiques d'ordre (approximation binomiale).
+    """
+    n = len(sorted_values)
+    q = p / 100.0
+    half = Z_95 * math.sqrt(n * q * (1 - q))
+    lo = max(0, int(math.floor(n * q - half)))
+    hi = min(n - 1, int(math.ceil(n * q + half)))
+    return sorted_values[lo], sorted_values[hi]
+
+
+def _preview_row(label, times, errors, bytes_sum, sent_bytes_sum, scale, duration_min, sample_size):
+    samples = len(times)
+    times = sorted(times)
+    avg, avg_half = _mean_ci(times)
+    std_dev = math.sqrt(sum((t - avg) ** 2 for t in times) / samples) if samples > 1 else 0.0
+    err_lo, err_hi = _proportion_ci(errors, samples)
+    p95 = percentile(times, 95)
+    p95_lo, p95_hi = _percentile_ci(times, 95)
+
+    est_samples = samples * scale
+    if duration_min > 0:
+        throughput_per_min = est_samples / duration_min
+        recv_kb_per_min = (bytes_sum * scale / 1024.0) / duration_min
+        sent_kb_per_min = (sent_bytes_sum * scale / 1024.0) / duration_min
+    else:
+        throughput_per_min = 0.0
+        recv_kb_per_min = 0.0
+        sent_kb_per_min = 0.0
+
+    return {
+        "Label": label,
+        "Samples": int(round(est_samples)),
+        "Average (ms)": int(round(avg)),
+        "Min (ms)": int(round(times[0])),
+        "Max (ms)": int(round(times[-1])),
+        "Std Dev (ms)": round(std_dev, 2),
+        "Error %": round(errors / samples * 100.0, 2),
+
+        "Throughput (/min)": f"{throughput_per_min:.1f}/min",
+        "Received KB/sec": round(recv_kb_per_min, 2),
+        "Sent KB/sec": round(sent_kb_per_min, 2),
+        "Avg Bytes": round(bytes_sum / samples, 1),
+
+        "Approximate": True,
+        "Sample Size": sample_size,
+        "Average CI (ms)": f"±{avg_half:.1f}",
+        "95% Line (ms)": int(round(p95)),
+        "95% CI (ms)": f"{int(round(p95_lo))}-{int(round(p95_hi))}",
+        "Error % CI": f"{err_lo:.2f}-{err_hi:.2f}",
+    }
+
+
+def compute_preview_recap(paths, sample_size=20000, seed=None, exec_range=None, label_mapper=None):
+    """
+    Recap approximatif (mode preview) sur un échantillon uniforme des fichiers
+    d'un palier. Même structure que metrics.compute_recap, plus :
+      Approximate, Sample Size, Average CI (ms), 95% Line (ms), 95% CI (ms), Error % CI
+    Samples/Throughput/KB sont extrapolés à partir du nombre de lignes estimé.
+    Min/Max sont ceux de l'échantillon.
+    `exec_range` (ExecutionRangeCollector) reçoit les timeStamp de tête/fin.
+    `label_mapper` : voir metrics.compute_recap.
+    """
+    rng = random.Random(seed)
+    total_size = sum(os.path.getsize(p) for p in paths) or 1
+
+    labels = {}
+    all_samples = []
+    est_rows = 0
+    first_ts = None
+    last_ts = None
+
+    for path in paths:
+        share = max(1, int(sample_size * os.path.getsize(path) / total_size))
+        rows, info = sample_jmeter_csv(path, share, rng)
+        est_rows += info["est_rows"]
+        if info["first_ts"] is not None:
+            first_ts = info["first_ts"] if first_ts is None else min(first_ts, info["first_ts"])
+        if info["last_ts"] is not None:
+            last_ts = info["last_ts"] if last_ts is None else max(last_ts, info["last_ts"])
+
+        for r in rows:
+            label = r.get("label")
+            elapsed = to_float(r.get("elapsed"))
+            if label is None or elapsed is None:
+                continue
+            if label_mapper is not None:
+                label = label_mapper(label)
+            sample = (elapsed, to_bool_success(r.get("success")),
+                      to_int(r.get("bytes", 0)), to_int(r.get("sentBytes", 0)))
+            labels.setdefault(label, []).append(sample)
+            all_samples.append(sample)
+
+    if exec_range is not None and first_ts is not None and last_ts is not None:
+        exec_range.add(None, first_ts, 0, True, None)
+        exec_range.add(None, last_ts, 0, True, None)
+
+    if not all_samples:
+        return []
+
+    scale = est_rows / len(all_samples)
+    if first_ts is not None and last_ts is not None:
+        duration_min = max(last_ts - first_ts, 1) / 1000.0 / 60.0
+    else:
+        duration_min = 0.0
+
+    ordered_labels = [lbl for lbl in LABEL_ORDER if lbl in labels]
+    ordered_labels += [lbl for lbl in sorted(labels) if lbl not in ordered_labels]
+
+    recap = []
+    for label, samples in [(lbl, labels[lbl]) for lbl in ordered_labels] + [("TOTAL", all_samples)]:
+        recap.append(_preview_row(
+            label,
+            [s[0] for s in samples],
+            sum(1 for s in samples if not s[1]),
+            sum(s[2] for s in samples),
+            sum(s[3] for s in samples),
+            scale,
+            duration_min,
+            len(samples),
+        ))
+    return recap
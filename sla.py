@@ -0,0 +1,133 @@
+import json
+import logging
+
+from metrics import parse_throughput
+
+# seuils reconnus dans le fichier SLA (JSON) :
+#   p90_ms / p95_ms / p99_ms   : percentile <= X ms
+#   avg_ms                     : moyenne <= X ms
+#   error_pct                  : Error % <= Y
+#   min_throughput_per_min     : débit >= Z /min
+#   apdex_t_ms / apdex_f_ms    : seuils Apdex T / F (F = 4T par défaut)
+#   min_apdex                  : Apdex >= A
+# "*" : valeurs par défaut appliquées à tous les labels.
+PERCENTILE_KEYS = {"p90_ms": "90% Line (ms)", "p95_ms": "95% Line (ms)", "p99_ms": "99% Line (ms)"}
+
+
+def load_sla_definitions(path):
+    """
+    Ex :
+      {"*": {"error_pct": 1, "apdex_t_ms": 500},
+       "Purchase": {"p95_ms": 800, "min_throughput_per_min": 120, "min_apdex": 0.9}}
+    """
+    with open(path, encoding="utf-8") as f:
+        definitions = json.load(f)
+    if not isinstance(definitions, dict):
+        raise ValueError(f"Fichier SLA invalide (objet JSON attendu) : {path}")
+
+    # min_apdex sans seuil T : Apdex jamais calculé, SLA toujours en échec
+    default = definitions.get("*", {})
+    any_threshold = any("apdex_t_ms" in d for d in definitions.values())
+    for name, d in definitions.items():
+        sla = dict(default, **d)
+        if "min_apdex" in sla and "apdex_t_ms" not in sla and not (name == "TOTAL" and any_threshold):
+            raise ValueError(f"SLA '{name}' : min_apdex exige apdex_t_ms ({path})")
+    logging.info("SLA chargés depuis %s : %d définitions", path, len(definitions))
+    return definitions
+
+
+def needs_percentiles(definitions):
+    return any(key in d for d in definitions.values() for key in PERCENTILE_KEYS)
+
+
+class SlaCollector:
+    """
+    Collecteur pour compute_recap : comptes Apdex par label. Les seuils
+    T / F sont résolus une fois par label ; chaque échantillon en succès
+    ne coûte que deux comparaisons (pas de buffer ni de tri).
+    """
+
+    def __init__(self, definitions):
+        self.definitions = definitions
+        self.resolved = {}  # label -> définition fusionnée avec "*"
+        self.counts = {}    # label -> [total, satisfaits, tolérés, T, F]
+
+    def resolve(self, label):
+        sla = self.resolved.get(label)
+        if sla is None:
+            sla = dict(self.definitions.get("*", {}))
+            sla.update(self.definitions.get(label, {}))
+            if "apdex_t_ms" in sla and "apdex_f_ms" not in sla:
+                sla["apdex_f_ms"] = 4 * sla["apdex_t_ms"]
+            self.resolved[label] = sla
+        return sla
+
+    def add(self, label, ts, elapsed, success, row):
+        counts = self.counts.get(label)
+        if counts is None:
+            sla = self.resolve(label)
+            counts = self.counts[label] = [0, 0, 0, sla.get("apdex_t_ms"), sla.get("apdex_f_ms")]
+        counts[0] += 1
+        if not success or counts[3] is None:
+            return
+        if elapsed <= counts[3]:
+            counts[1] += 1
+        elif elapsed <= counts[4]:
+            counts[2] += 1
+
+    def apdex(self):
+        """
+        label -> Apdex, plus "TOTAL" (somme des comptes, seuils de chaque label).
+        """
+        out = {}
+        total = [0, 0, 0]
+        for label, counts in self.counts.items():
+            if counts[3] is None:
+                continue
+            n, satisfied, tolerating = counts[:3]
+            out[label] = (satisfied + tolerating / 2.0) / n if n else 0.0
+            total = [a + b for a, b in zip(total, counts)]
+        if total[0]:
+            out["TOTAL"] = (total[1] + total[2] / 2.0) / total[0]
+        return out
+
+
+def evaluate_sla(recap, collector):
+    """
+    Ajoute aux lignes du recap : "Apdex", "SLA" (PASS/FAIL) et "SLA Details"
+    (critères en échec). Retourne label -> statut.
+    """
+    apdex = collector.apdex()
+    statuses = {}
+    for row in recap:
+        label = row["Label"]
+        if label == "TOTAL" and "TOTAL" not in collector.definitions:
+            sla = {}
+        else:
+            sla = collector.resolve(label)
+
+        if label in apdex:
+            row["Apdex"] = round(apdex[label], 3)
+
+        failures = []
+        for key, column in PERCENTILE_KEYS.items():
+            if key in sla and column in row and row[column] > sla[key]:
+                failures.append(f"{key[:-3]} {row[column]:.0f} > {sla[key]}")
+        if "avg_ms" in sla and row["Average (ms)"] > sla["avg_ms"]:
+            failures.append(f"avg {row['Average (ms)']} > {sla['avg_ms']}")
+        if "error_pct" in sla and row["Error %"] > sla["error_pct"]:
+            failures.append(f"error {row['Error %']}% > {sla['error_pct']}%")
+        if "min_throughput_per_min" in sla:
+            throughput = parse_throughput(row["Throughput (/min)"])
+            if throughput < sla["min_throughput_per_min"]:
+                failures.append(f"throughput {throughput:.1f} < {sla['min_throughput_per_min']}")
+        if "min_apdex" in sla and row.get("Apdex", 0.0) < sla["min_apdex"]:
+            failures.append(f"apdex {row.get('Apdex', 0.0)} < {sla['min_apdex']}")
+
+        checked = [k for k in sla if k not in ("apdex_t_ms", "apdex_f_ms")]
+        if not checked:
+            continue
+        row["SLA"] = "FAIL" if failures else "PASS"
+        row["SLA Details"] = "; ".join(failures)
+        statuses[label] = row["SLA"]
+    return statuses
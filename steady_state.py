@@ -0,0 +1,115 @@
+import logging
+from datetime import datetime
+
+from metrics import active_threads
+
+WINDOW_FMT = "%d/%m/%y %H:%M:%S"
+
+
+class SteadyStateDetector:
+    """
+    Détection de la fenêtre de régime stable (hors montée/descente en charge),
+    alimentée pendant la passe de compute_recap.
+
+    Par tranche de `bucket_s` secondes on garde : nombre d'échantillons,
+    min/max des threads actifs. En fin de passe, resolve() choisit :
+      1) trim explicite (trim_start_s / trim_end_s) s'il est configuré ;
+      2) sinon le plateau de threads : tranches où tous les échantillons
+         sont au nombre maximal de threads ;
+      3) sinon (pas de colonne threads) les tranches dont le débit atteint
+         `throughput_ratio` x le débit médian.
+    La fenêtre est alignée sur les tranches.
+    """
+
+    def __init__(self, bucket_s=10, trim_start_s=None, trim_end_s=None, throughput_ratio=0.8):
+        self.bucket_ms = max(int(bucket_s * 1000), 1)
+        self.trim_start_s = trim_start_s
+        self.trim_end_s = trim_end_s
+        self.throughput_ratio = throughput_ratio
+        self.buckets = {}  # index tranche -> [count, min threads, max threads]
+        self.window = None
+
+    def add(self, label, ts, elapsed, success, row):
+        idx = ts // self.bucket_ms
+        threads = active_threads(row)
+        entry = self.buckets.get(idx)
+        if entry is None:
+            self.buckets[idx] = [1, threads, threads]
+            return
+        entry[0] += 1
+        if threads < entry[1]:
+            entry[1] = threads
+        if threads > entry[2]:
+            entry[2] = threads
+
+    def _full_range(self):
+        return min(self.buckets), max(self.buckets)
+
+    def _explicit_range(self):
+        first_idx, last_idx = self._full_range()
+        start_ms = first_idx * self.bucket_ms + int((self.trim_start_s or 0) * 1000)
+        end_ms = (last_idx + 1) * self.bucket_ms - int((self.trim_end_s or 0) * 1000)
+        # seules les tranches entièrement dans [start, end[ : aucune seconde rognée ne revient
+        return -(-start_ms // self.bucket_ms), end_ms // self.bucket_ms - 1
+
+    def _threads_range(self):
+        plateau = max(entry[2] for entry in self.buckets.values())
+        if plateau <= 0:
+            return None
+        steady = [idx for idx, entry in self.buckets.items() if entry[1] >= plateau]
+        if not steady:
+            return None
+        return min(steady), max(steady)
+
+    def _throughput_range(self):
+        first_idx, last_idx = self._full_range()
+        counts = [self.buckets.get(idx, (0,))[0] for idx in range(first_idx, last_idx + 1)]
+        ordered = sorted(counts)
+        median = ordered[len(ordered) // 2]
+        threshold = median * self.throughput_ratio
+        steady = [first_idx + i for i, c in enumerate(counts) if c >= threshold]
+        if not steady:
+            return None
+        return min(steady), max(steady)
+
+    def resolve(self):
+        """
+        Retourne {"start_ms", "end_ms", "method"} (end exclusive) ou None.
+        """
+        if not self.buckets:
+            return None
+
+        if self.trim_start_s is not None or self.trim_end_s is not None:
+            method = "trim explicite"
+            rng = self._explicit_range()
+        else:
+            method = "plateau de threads"
+            rng = self._threads_range()
+            if rng is None:
+                method = "stabilité du débit"
+                rng = self._throughput_range()
+
+        if rng is None or rng[1] < rng[0]:
+            logging.warning("Fenêtre stable introuvable (%s), run complet conservé.", method)
+            method = "run complet"
+            rng = self._full_range()
+
+        self.window = {
+            "start_ms": rng[0] * self.bucket_ms,
+            "end_ms": (rng[1] + 1) * self.bucket_ms,
+            "method": method,
+        }
+        logging.info("  -> fenêtre stable : %s", self.describe())
+        return self.window
+
+    def describe(self):
+        """
+        Ex : 21/11/25 21:45:10 - 21/11/25 21:58:40 (plateau de threads, 13.5 min)
+        """
+        if self.window is None:
+            return ""
+        start = datetime.fromtimestamp(self.window["start_ms"] / 1000.0)
+        end = datetime.fromtimestamp(self.window["end_ms"] / 1000.0)
+        minutes = (self.window["end_ms"] - self.window["start_ms"]) / 60000.0
+        return (f"{start.strftime(WINDOW_FMT)} - {end.strftime(WINDOW_FMT)} "
+                f"({self.window['method']}, {minutes:.1f} min)")
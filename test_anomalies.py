@@ -0,0 +1,60 @@
+from anomalies import AnomalyDetector
+
+BUCKET_MS = 5000
+
+
+def feed(detector, label, buckets, per_bucket=10, elapsed=100, start=0):
+    for b in buckets:
+        for i in range(per_bucket):
+            ts = start + b * BUCKET_MS + i * (BUCKET_MS // per_bucket)
+            detector.add(label, ts, elapsed, True, {})
+
+
+def run(streams):
+    """streams : (label, tranches) ; échantillons fusionnés par horodatage."""
+    detector = AnomalyDetector(bucket_s=5, z_threshold=4.0, warmup=6)
+    samples = []
+    for label, buckets in streams:
+        for b in buckets:
+            for i in range(10):
+                samples.append((b * BUCKET_MS + i * 500, label))
+    for ts, label in sorted(samples):
+        detector.add(label, ts, 100, True, {})
+    return detector.results()
+
+
+def test_label_ending_early_is_not_a_stall():
+    rows = run([("A", range(0, 20)), ("B", range(0, 60))])
+    assert rows == []
+
+
+def test_gap_followed_by_samples_is_one_stall():
+    rows = run([("A", list(range(0, 20)) + list(range(30, 40)))])
+    stalls = [r for r in rows if r["Type"] == "stall"]
+    assert [(r["Label"], r["Duration (s)"]) for r in stalls] == [("A", 50.0), ("TOTAL", 50.0)]
+
+
+def test_long_gap_is_jumped_in_one_step():
+    detector = AnomalyDetector(bucket_s=5, warmup=6)
+    feed(detector, "A", range(0, 10))
+    feed(detector, "A", [10 ** 9])
+    closed = []
+    detector._close_bucket = lambda name, state, partial=False: closed.append(name)
+    detector.add("A", (10 ** 9 + 1) * BUCKET_MS, 100, True, {})
+    assert closed == ["A", "TOTAL"]
+
+
+def test_total_ignores_workload_mix_change():
+    rows = run([("A", range(0, 20)), ("B", range(0, 60)), ("C", range(0, 20))])
+    assert not [r for r in rows if r["Label"] == "TOTAL"]
+
+
+def test_total_throughput_drop_of_active_labels():
+    detector = AnomalyDetector(bucket_s=5, warmup=6)
+    for b in range(0, 30):
+        per_bucket = 2 if 20 <= b < 23 else 20
+        for label in ("A", "B"):
+            for i in range(per_bucket):
+                detector.add(label, b * BUCKET_MS + i * (BUCKET_MS // per_bucket), 100, True, {})
+    drops = {r["Label"] for r in detector.results() if r["Type"] == "throughput drop"}
+    assert drops == {"A", "B", "TOTAL"}
@@ -0,0 +1,32 @@
+import os
+
+from batch import find_campaign_folders, plan_jobs
+
+
+def test_same_basename_gets_distinct_outputs(tmp_path):
+    folders = [str(tmp_path / "release-42" / "run"), str(tmp_path / "release-43" / "run"),
+               str(tmp_path / "other")]
+    options = {"html_output": "/x/dashboard.html", "parquet_output": str(tmp_path / "pq"),
+               "run_profile": "profile.json"}
+    jobs = plan_jobs(folders, str(tmp_path / "out"), "t.docx", options)
+
+    for key in ("output_file", "doc_output"):
+        assert len({job[key] for job in jobs}) == 3
+    for key in ("html_output", "parquet_output", "run_profile"):
+        assert len({job["options"][key] for job in jobs}) == 3
+    assert jobs[2]["name"] == "other"
+    assert jobs[0]["name"].startswith("run-") and jobs[0]["name"] != jobs[1]["name"]
+    assert [job["index"] for job in jobs] == [0, 1, 2]
+
+
+def test_no_overrides_without_options(tmp_path):
+    jobs = plan_jobs([str(tmp_path / "a")])
+    assert jobs[0]["options"] == {}
+    assert jobs[0]["output_file"] == os.path.join(str(tmp_path / "a"), "a-recap_scenarios.xlsx")
+
+
+def test_manifest_relative_paths_and_dedup(tmp_path):
+    (tmp_path / "c1").mkdir()
+    manifest = tmp_path / "list.txt"
+    manifest.write_text("# campagnes\nc1\n\nc1\n", encoding="utf-8")
+    assert find_campaign_folders(str(manifest)) == [str(tmp_path / "c1")]
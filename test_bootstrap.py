@@ -0,0 +1,48 @@
+import random
+
+from bootstrap import BootstrapCollector, Reservoir
+
+
+def test_reservoir_is_bounded_and_uniform():
+    rng = random.Random(0)
+    firsts = 0
+    for _ in range(2000):
+        reservoir = Reservoir(10, rng)
+        for i in range(100):
+            reservoir.add(i, True)
+        assert len(reservoir.elapsed) == 10 and reservoir.seen == 100
+        firsts += sum(1 for v in reservoir.elapsed if v < 50)
+    # moitié des valeurs retenues dans la première moitié du flux
+    assert abs(firsts / (2000 * 10) - 0.5) < 0.02
+
+
+def test_apply_to_recap_only_fills_ci_columns():
+    collector = BootstrapCollector(sample_size=200, resamples=100, seed=1)
+    for i in range(1000):
+        collector.add("A", i, 100 + i % 50, i % 10 != 0, None)
+    recap = [
+        {"Label": "A", "Average (ms)": 124, "Error %": 10.0},
+        {"Label": "TOTAL", "Average (ms)": 124, "Error %": 10.0, "95% Line (ms)": 147},
+    ]
+    collector.apply_to_recap(recap)
+
+    assert "95% Line (ms)" not in recap[0]
+    assert recap[1]["95% Line (ms)"] == 147
+    for row in recap:
+        assert set(row) >= {"Average CI (ms)", "95% CI (ms)", "Error % CI"}
+        lo, hi = map(float, row["Average CI (ms)"].split("-"))
+        assert lo < 124 < hi
+        lo, hi = map(float, row["Error % CI"].split("-"))
+        assert lo < 10.0 < hi
+    lo, hi = map(int, recap[1]["95% CI (ms)"].split("-"))
+    assert lo <= 147 <= hi
+
+
+def test_apply_to_recap_without_value_columns():
+    collector = BootstrapCollector(sample_size=50, resamples=50, seed=2)
+    for i in range(100):
+        collector.add("A", i, 10.0, True, None)
+    recap = [{"Label": "A", "Samples": 100}]
+    collector.apply_to_recap(recap)
+    assert recap[0]["Average CI (ms)"] == "10.0-10.0"
+    assert set(recap[0]) == {"Label", "Samples", "Average CI (ms)", "95% CI (ms)", "Error % CI"}
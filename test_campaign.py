@@ -0,0 +1,88 @@
+import csv
+
+import pytest
+
+import campaign
+import config_loader
+import pipeline
+from campaign import Campaign
+
+HEADER = ["timeStamp", "elapsed", "label", "responseCode", "success", "threadName", "bytes", "sentBytes",
+          "allThreads"]
+
+
+def _write_results(folder, users, samples):
+    """
+    samples : (ts, elapsed, label, success) -> IDP API-results-<users>-users.csv
+    """
+    path = folder / f"IDP API-results-{users}-users.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for ts, elapsed, label, success in samples:
+            writer.writerow([ts, elapsed, label, "200" if success else "500", str(success).lower(),
+                             "TG 1-1", 1000, 300, users])
+    return str(path)
+
+
+def _campaign_folder(tmp_path):
+    for users in (1, 4):
+        samples = [(1700000000000 + 250 * i, 50 + (i * 37) % 400, "Login" if i % 3 else "Purchase", i % 11 != 0)
+                   for i in range(200 * users)]
+        _write_results(tmp_path, users, samples)
+    return tmp_path
+
+
+def _default_options():
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(config_loader.os, "getenv", lambda name, default=None: default)
+        return config_loader.load_options()
+
+
+def test_queries_compose_lazily(tmp_path, monkeypatch):
+    c = Campaign.open(str(_campaign_folder(tmp_path)), cache=False)
+    opened = []
+    monkeypatch.setattr(campaign, "merge_jmeter_csv", lambda paths: opened.append(paths) or iter(()))
+
+    q = c.where(users=4).between("14:05", None).where(label="Login").select("Samples", "Average (ms)")
+    assert opened == []
+    assert (q._users, q._labels, q._start, q._end) == ((4,), ("Login",), "14:05", None)
+    assert q._columns == ("Samples", "Average (ms)")
+    assert q.users() == [4]
+    # requête d'origine inchangée
+    assert (c._users, c._labels, c._columns) == (None, None, None)
+    assert c.users() == [1, 4]
+
+    with pytest.raises(ValueError):
+        c.select("Inconnue")
+    with pytest.raises(ValueError):
+        c.recap()
+
+    c.where(users=1).select("Samples").recap()
+    assert len(opened) == 1 and opened[0][0].endswith("IDP API-results-1-users.csv")
+
+
+def test_recaps_match_run_campaign(tmp_path, monkeypatch):
+    folder = _campaign_folder(tmp_path)
+    captured = {}
+    monkeypatch.setattr(pipeline, "write_excel", lambda output_file, scenarios_data, *a, **k:
+                        captured.update(scenarios_data))
+    options = _default_options()
+    options["exact_percentiles"] = True
+    pipeline.run_campaign(str(folder), str(tmp_path / "recap.xlsx"), None, None, options)
+
+    recaps = Campaign.open(str(folder), cache=False).recaps()
+    assert list(recaps) == [1, 4]
+    for users, recap in recaps.items():
+        expected = captured[f"IDP API-results-{users}-users"]
+        assert [r["Label"] for r in recap] == [r["Label"] for r in expected]
+        for got, want in zip(recap, expected):
+            common = set(got) & set(want)
+            assert {"Samples", "Average (ms)", "Error %", "Throughput (/min)"} <= common
+            assert {k: got[k] for k in common} == {k: want[k] for k in common}
+
+    login = Campaign.open(str(folder), cache=False).where(users=4, label="Login") \
+        .select("Samples", "95% Line (ms)").recap()
+    expected_login = next(r for r in captured["IDP API-results-4-users"] if r["Label"] == "Login")
+    assert login[0] == {"Label": "Login", "Samples": expected_login["Samples"],
+                        "95% Line (ms)": expected_login["95% Line (ms)"]}
@@ -0,0 +1,46 @@
+import pytest
+
+from capacity import analyse_capacity, fit_usl, usl_throughput
+
+
+def test_fit_usl_recovers_parameters():
+    lam, sigma, kappa = 10.0, 0.05, 0.002
+    points = [(n, usl_throughput(n, lam, sigma, kappa)) for n in (1, 2, 4, 8, 16, 32)]
+    fit = fit_usl(points)
+
+    assert fit["lambda"] == pytest.approx(lam)
+    assert fit["sigma"] == pytest.approx(sigma)
+    assert fit["kappa"] == pytest.approx(kappa)
+    assert fit["r2"] == pytest.approx(1.0)
+    knee = ((1 - sigma) / kappa) ** 0.5
+    assert fit["knee"] == pytest.approx(knee)
+    assert fit["max_x"] == pytest.approx(usl_throughput(knee, lam, sigma, kappa))
+
+
+def test_fit_usl_falls_back_to_amdahl_and_linear():
+    # débit légèrement superlinéaire au dernier palier : κ < 0, repli Amdahl (κ = 0)
+    points = [(n, usl_throughput(n, 5.0, 0.1, 0.0) * (1.01 if n == 4 else 1.0)) for n in (1, 2, 4)]
+    amdahl = fit_usl(points)
+    assert amdahl["kappa"] == 0.0 and amdahl["sigma"] > 0
+    assert amdahl["knee"] is None
+    assert amdahl["max_x"] == pytest.approx(amdahl["lambda"] / amdahl["sigma"])
+
+    linear = fit_usl([(1, 3.0), (4, 12.0)])
+    assert (linear["sigma"], linear["kappa"], linear["max_x"]) == (pytest.approx(0.0), 0.0, None)
+
+    assert fit_usl([(4, 12.0)]) is None
+    assert fit_usl([(1, 0.0), (2, 0.0)]) is None
+
+
+def test_analyse_capacity_little_and_think_time():
+    tp = {"A": {n: usl_throughput(n, 2.0, 0.02, 0.001) for n in (1, 5, 10)}}
+    rt = {"A": {1: 250, 5: 400, 10: 900}}
+    params, curve = analyse_capacity(tp, rt)
+
+    assert [p["Label"] for p in params] == ["A"]
+    measured = [r for r in curve if "Measured (req/s)" in r]
+    assert [r["Users"] for r in measured] == [1, 5, 10]
+    first = measured[0]
+    assert first["Little N (X.R)"] == round(2.0 * 0.25, 2)
+    assert first["Think Time (s)"] == round(1 / 2.0 - 0.25, 3)
+    assert [r["Users"] for r in curve] == sorted(r["Users"] for r in curve)
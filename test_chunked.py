@@ -0,0 +1,74 @@
+import csv
+import re
+
+from chunked import split_byte_ranges, _range_lines, compute_recap_chunked
+from label_rules import LabelMapper
+from metrics import compute_recap, ExecutionRangeCollector
+from histogram import HistogramPercentileCollector
+from exact_percentiles import ExactPercentileCollector
+from jmeter_io import iter_jmeter_csv
+
+import pytest
+
+
+def _rows(n=3000):
+    return [(1700000000000 + i * 7, 50 + (i * 37) % 400, f"item/{i % 5}", i % 11 != 0) for i in range(n)]
+
+
+def _write_csv(tmp_path, rows):
+    path = tmp_path / "IDP API-results-1-users.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timeStamp", "elapsed", "label", "success", "bytes", "sentBytes"])
+        for ts, elapsed, label, success in rows:
+            writer.writerow([ts, elapsed, label, str(success).lower(), 1000, 300])
+    return str(path)
+
+
+def test_ranges_cover_every_line_once(tmp_path):
+    path = _write_csv(tmp_path, _rows())
+    header, ranges = split_byte_ranges(path, chunk_mb=0.005)
+    assert len(ranges) > 5
+    lines = []
+    with open(path, "rb") as f:
+        for start, end in ranges:
+            lines += list(_range_lines(f, start, end, ranges[0][0]))
+    with open(path, newline="", encoding="utf-8") as f:
+        assert lines == f.readlines()[1:]
+
+
+def test_chunked_matches_sequential(tmp_path):
+    path = _write_csv(tmp_path, _rows())
+    expected = compute_recap(iter_jmeter_csv(path))
+    assert compute_recap_chunked([path], workers=2, chunk_mb=0.01) == expected
+
+
+def test_mapper_rules_applied_and_registered(tmp_path):
+    path = _write_csv(tmp_path, _rows())
+    mapper = LabelMapper([(re.compile(r"item/\d+"), "Item")])
+    recap = compute_recap_chunked([path], workers=2, chunk_mb=0.01, label_mapper=mapper)
+    assert [r["Label"] for r in recap] == ["Item", "TOTAL"]
+    assert mapper.targets == {"Item"}
+
+
+def test_capped_mapper_rejected(tmp_path):
+    path = _write_csv(tmp_path, _rows(10))
+    with pytest.raises(ValueError):
+        compute_recap_chunked([path], label_mapper=LabelMapper(max_labels=2))
+
+
+def test_mergeable_collectors_fed_by_parts(tmp_path):
+    rows = _rows()
+    path = _write_csv(tmp_path, rows)
+    exec_range = ExecutionRangeCollector()
+    percentiles = HistogramPercentileCollector()
+    compute_recap_chunked([path], workers=2, chunk_mb=0.01, collectors=[exec_range, percentiles])
+
+    assert (exec_range.start_ms, exec_range.end_ms) == (1700000000000, 1700000000000 + 7 * (len(rows) - 1))
+    assert sum(h.total for h in percentiles.histograms.values()) == len(rows)
+
+
+def test_unmergeable_collector_rejected(tmp_path):
+    path = _write_csv(tmp_path, _rows(10))
+    with pytest.raises(ValueError, match="ExactPercentileCollector"):
+        compute_recap_chunked([path], collectors=[ExactPercentileCollector()])
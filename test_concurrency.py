@@ -0,0 +1,35 @@
+import pytest
+
+from concurrency import concurrency_level, compute_recaps_by_concurrency
+
+
+def _row(ts, elapsed, threads):
+    return {"timeStamp": str(ts), "elapsed": str(elapsed), "label": "A", "success": "true",
+            "allThreads": str(threads)}
+
+
+def test_concurrency_level_rounds_up_to_bucket():
+    assert [concurrency_level(t, 4) for t in (1, 4, 5, 8, 9)] == [4, 4, 8, 8, 12]
+    assert concurrency_level(3) == 3
+
+
+def test_recaps_by_level_use_time_at_level():
+    rows = [_row(1000 * s, 100, 1) for s in range(10)]
+    rows += [_row(10000 + 500 * s, 200, 2) for s in range(40)]
+    rows.append(_row(40000, 300, 3))
+    levels = compute_recaps_by_concurrency(rows, min_samples=2)
+
+    assert list(levels) == [1, 2]
+    recap_1, _ = levels[1]
+    recap_2, _ = levels[2]
+    assert recap_1[0]["Throughput (/min)"] == "60.0/min"
+    assert recap_2[0]["Throughput (/min)"] == "120.0/min"
+    assert recap_2[-1]["Label"] == "TOTAL" and recap_2[-1]["Average (ms)"] == 200
+
+
+def test_concurrency_bucket_must_be_positive(monkeypatch):
+    import config_loader
+    env = {"CONCURRENCY_BUCKET": "0"}
+    monkeypatch.setattr(config_loader.os, "getenv", lambda name, default=None: env.get(name, default))
+    with pytest.raises(ValueError, match="CONCURRENCY_BUCKET"):
+        config_loader.load_options()
@@ -0,0 +1,46 @@
+from coordinated_omission import CoordinatedOmissionCollector
+from histogram import LogHistogram
+
+
+def _one_by_one(values):
+    hist = LogHistogram()
+    for v in values:
+        hist.record(v)
+    return hist
+
+
+def test_backfill_one_second_stall():
+    hist = LogHistogram()
+    assert hist.record_with_expected_interval(1000, 100) == 9
+    expected = _one_by_one([1000, 900, 800, 700, 600, 500, 400, 300, 200, 100])
+    assert hist.counts == expected.counts
+    assert (hist.total, hist.sum, hist.min, hist.max) == (10, 5500, 100, 1000)
+
+
+def test_backfill_by_bucket_matches_one_by_one():
+    # grands écarts : plusieurs valeurs rétro-remplies tombent dans le même bucket
+    hist = LogHistogram()
+    added = hist.record_with_expected_interval(100000, 7)
+    expected = _one_by_one([100000] + list(range(100000 - 7, 6, -7)))
+    assert added == expected.total - 1
+    assert (hist.counts, hist.sum, hist.min) == (expected.counts, expected.sum, expected.min)
+
+
+def test_no_backfill_within_interval():
+    hist = LogHistogram()
+    for value in (50, 100, 150, 199):
+        assert hist.record_with_expected_interval(value, 100) == 0
+    assert hist.record_with_expected_interval(500, 0) == 0
+    assert (hist.total, hist.sum, hist.min, hist.max) == (5, 999, 50, 500)
+
+
+def test_collector_reports_backfilled_samples():
+    co = CoordinatedOmissionCollector(expected_interval_ms=100)
+    for ts, elapsed in ((0, 50), (100, 1000), (1100, 80)):
+        co.add("Login", ts, elapsed, True, {"threadName": "t1"})
+    rows = co.results()
+    assert [r["Label"] for r in rows] == ["Login", "TOTAL"]
+    assert rows[0]["Samples"] == 3
+    assert rows[0]["Back-filled"] == 9
+    assert rows[0]["Expected Interval (ms)"] == 100
+    assert rows[0]["CO Average (ms)"] > rows[0]["Raw Average (ms)"]
@@ -0,0 +1,42 @@
+import random
+
+from error_analysis import ErrorCollector, SpaceSaving, normalize_message
+
+
+def test_space_saving_bounds_and_heavy_hitters():
+    rng = random.Random(3)
+    stream = ["hot"] * 3000 + ["warm"] * 1500 + [f"rare-{i}" for i in range(5000)]
+    rng.shuffle(stream)
+    sketch = SpaceSaving(capacity=50)
+    for ts, key in enumerate(stream):
+        sketch.add(key, ts)
+
+    assert len(sketch.counters) == 50
+    top = sketch.top(2)
+    assert [key for key, *_ in top] == ["hot", "warm"]
+    for key, count, error, _, _ in top:
+        true_count = stream.count(key)
+        # Space-Saving : count - error <= vrai compte <= count
+        assert count - error <= true_count <= count
+    # surestimation bornée par N / capacity
+    assert all(e[1] <= len(stream) / 50 for e in sketch.counters.values())
+
+
+def test_space_saving_exact_below_capacity():
+    sketch = SpaceSaving(capacity=10)
+    for ts, key in enumerate("aabacbd"):
+        sketch.add(key, ts)
+    assert sketch.top(3) == [("a", 3, 0, 0, 3), ("b", 2, 0, 2, 5), ("c", 1, 0, 4, 4)]
+
+
+def test_error_collector_groups_dynamic_messages():
+    assert normalize_message(" order 12345 id deadbeef01 ") == "order # id #"
+    collector = ErrorCollector(top_k=5, capacity=10)
+    for i in range(4):
+        row = {"responseCode": "500", "responseMessage": f"timeout after {i} ms", "failureMessage": ""}
+        collector.add("A", 1000 * i, 10, False, row)
+    collector.add("A", 5000, 10, True, {"responseCode": "200", "responseMessage": "OK", "failureMessage": ""})
+
+    [row] = collector.results()
+    assert (row["Response Code"], row["Response Message"], row["Count"]) == ("500", "timeout after # ms", 4)
+    assert row["% of Label Errors"] == 100.0
@@ -0,0 +1,60 @@
+import os
+import random
+
+import pytest
+
+from metrics import percentile
+from exact_percentiles import ExactPercentileCollector, MemoryBudget, PEAK_VALUE_SIZE
+
+
+def _feed(collector, samples):
+    for label, value in samples:
+        collector.add(label, 0, value, True, None)
+
+
+def _expected(samples, label=None):
+    values = [v for lbl, v in samples if label is None or lbl == label]
+    return {p: round(percentile(values, p), 2) for p in (90, 95, 99)}
+
+
+@pytest.mark.parametrize("memory_mb", [256, 0.01])
+def test_matches_in_memory_percentiles(tmp_path, memory_mb):
+    rng = random.Random(7)
+    samples = [(rng.choice("AB"), rng.randint(1, 5000)) for _ in range(20000)]
+    collector = ExactPercentileCollector(memory_mb, spill_dir=str(tmp_path))
+    _feed(collector, samples)
+    if memory_mb < 1:
+        assert collector.runs
+    results = collector.results()
+    for label in ("A", "B"):
+        assert {p: round(v, 2) for p, v in results[label].items()} == _expected(samples, label)
+    assert {p: round(v, 2) for p, v in results["TOTAL"].items()} == _expected(samples)
+    # runs supprimés après results()
+    assert not os.listdir(tmp_path)
+
+
+def test_budget_counts_sort_copies(tmp_path):
+    memory_mb = 1
+    collector = ExactPercentileCollector(memory_mb, spill_dir=str(tmp_path))
+    assert collector.max_values == int(1024 * 1024 / PEAK_VALUE_SIZE)
+    _feed(collector, (("A", i % 997) for i in range(3 * collector.max_values)))
+    assert collector.buffered < collector.max_values
+    collector.cleanup()
+
+
+def test_shared_budget_caps_all_collectors(tmp_path):
+    budget = MemoryBudget(1)
+    levels = [ExactPercentileCollector(spill_dir=str(tmp_path), budget=budget) for _ in range(4)]
+    samples = []
+    for i in range(2 * budget.max_values):
+        level = levels[i % 4]
+        _feed(level, [("A", i % 991)])
+        samples.append((i % 4, i % 991))
+    assert budget.buffered == sum(c.buffered for c in levels) < budget.max_values
+
+    for n, level in enumerate(levels):
+        values = [("A", v) for lvl, v in samples if lvl == n]
+        results = level.results()
+        assert {p: round(v, 2) for p, v in results["A"].items()} == _expected(values)
+    assert budget.buffered == 0 and not budget.collectors
+    assert not os.listdir(tmp_path)
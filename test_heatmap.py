@@ -0,0 +1,37 @@
+from heatmap import LatencyHeatmapCollector, merge_columns
+
+
+def _column_sums(result, label):
+    return [sum(line[c] for line in result["labels"][label]) for c in range(len(result["columns"]))]
+
+
+def test_widen_across_column_cap():
+    hm = LatencyHeatmapCollector(bucket_s=1, max_columns=4)
+    # 10 s de données, 1 échantillon / seconde : dépasse 4 puis 8 colonnes de 1 s
+    for s in range(10):
+        hm.add("Login", 1000 * s, 5 if s < 5 else 300, True, {})
+    hm.add("Logout", 9500, 5, True, {})
+    result = hm.results()
+    assert result["col_ms"] == 4000
+    assert len(result["columns"]) == 3
+    assert _column_sums(result, "Login") == [4, 4, 2]
+    assert _column_sums(result, "Logout") == [0, 0, 1]
+    assert _column_sums(result, "TOTAL") == [4, 4, 3]
+    assert result["rows"][0] == "256-383" and result["rows"][-1] == "4-5"
+    assert result["labels"]["Login"][0] == [0, 3, 2]
+    assert result["labels"]["Login"][-1] == [4, 1, 0]
+
+
+def test_merge_columns():
+    heatmap = {
+        "columns": ["00:00:00", "00:00:01", "00:00:02", "00:00:03", "00:00:04"],
+        "col_ms": 1000,
+        "rows": ["10", "5"],
+        "labels": {"Login": [[1, 2, 3, 4, 5], [0, 1, 0, 1, 0]]},
+    }
+    assert merge_columns(heatmap, 5) is heatmap
+    merged = merge_columns(heatmap, 2)
+    assert merged["columns"] == ["00:00:00", "00:00:04"]
+    assert merged["col_ms"] == 4000
+    assert merged["labels"]["Login"] == [[10, 5], [2, 0]]
+    assert merge_columns(heatmap, 3)["labels"]["Login"] == [[3, 7, 5], [1, 1, 0]]
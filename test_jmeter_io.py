@@ -0,0 +1,120 @@
+import io
+import logging
+import threading
+
+import pytest
+
+import jmeter_io
+from jmeter_io import group_scenario_files, iter_prefetched_lines, merge_jmeter_csv, scenario_base_name
+
+
+def _csv(tmp_path, name, header, rows):
+    path = tmp_path / name
+    path.write_text("\n".join([",".join(header)] + [",".join(map(str, r)) for r in rows]) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_group_by_users_across_injectors():
+    files = [
+        "r/IDP API-results-8-users-inj2.csv",
+        "r/IDP API-results-1-user.csv",
+        "r/IDP API-results-8-users-inj1.csv",
+        "r/IDP API-results-12-users.csv",
+    ]
+    groups = group_scenario_files(files)
+    assert list(groups) == [1, 8, 12]
+    assert groups[8] == ["r/IDP API-results-8-users-inj2.csv", "r/IDP API-results-8-users-inj1.csv"]
+    assert scenario_base_name(groups[8]) == "IDP API-results-8-users"
+    assert scenario_base_name(groups[1]) == "IDP API-results-1-user"
+    assert scenario_base_name(["r/IDP API-results-12-users-inj1.csv"]) == "IDP API-results-12-users-inj1"
+
+
+def test_merge_interleaved_timestamps_and_ties(tmp_path):
+    header = ["timeStamp", "elapsed", "label"]
+    a = _csv(tmp_path, "a.csv", header, [(1000, 5, "a1"), (1002, 5, "a2"), (1004, 5, "a3")])
+    b = _csv(tmp_path, "b.csv", header, [(1001, 5, "b1"), (1002, 5, "b2"), (1005, 5, "b3")])
+    labels = [r["label"] for r in merge_jmeter_csv([a, b])]
+    # à timeStamp égal, l'ordre des fichiers est conservé (fusion stable)
+    assert labels == ["a1", "b1", "a2", "b2", "a3", "b3"]
+    assert [r["label"] for r in merge_jmeter_csv([b, a])] == ["a1", "b1", "b2", "a2", "a3", "b3"]
+
+
+def test_merge_prefetch_same_order(tmp_path):
+    header = ["timeStamp", "elapsed", "label"]
+    a = _csv(tmp_path, "a.csv", header, [(ts, 1, "a") for ts in range(0, 300, 3)])
+    b = _csv(tmp_path, "b.csv", header, [(ts, 1, "b") for ts in range(1, 300, 2)])
+    direct = [(r["timeStamp"], r["label"]) for r in merge_jmeter_csv([a, b])]
+    assert direct == [(r["timeStamp"], r["label"]) for r in merge_jmeter_csv([a, b], prefetch=(1, 2))]
+    assert [int(ts) for ts, _ in direct] == sorted(int(ts) for ts, _ in direct)
+
+
+def test_merge_column_order_differs(tmp_path):
+    a = _csv(tmp_path, "a.csv", ["timeStamp", "elapsed", "label"], [(1, 10, "a")])
+    b = _csv(tmp_path, "b.csv", ["label", "timeStamp", "elapsed"], [("b", 0, 20)])
+    rows = list(merge_jmeter_csv([a, b]))
+    assert [(r["label"], r["elapsed"]) for r in rows] == [("b", "20"), ("a", "10")]
+
+
+def test_merge_mismatched_headers(tmp_path, caplog):
+    a = _csv(tmp_path, "a.csv", ["timeStamp", "elapsed", "label"], [(1, 10, "a")])
+    b = _csv(tmp_path, "b.csv", ["timeStamp", "elapsed", "label", "Latency"], [(2, 20, "b", 3)])
+    with caplog.at_level(logging.WARNING):
+        rows = list(merge_jmeter_csv([a, b]))
+    assert "Latency" in caplog.text
+    assert "Latency" not in rows[0] and rows[1]["Latency"] == "3"
+
+    c = _csv(tmp_path, "c.csv", ["elapsed", "label"], [(10, "c")])
+    with pytest.raises(ValueError, match="timeStamp"):
+        merge_jmeter_csv([a, c])
+
+
+def _prefetch_threads():
+    return [t for t in threading.enumerate() if t.name == "jtl-prefetch"]
+
+
+def test_prefetch_lines_split_across_blocks(tmp_path):
+    # blocs de 1 Ko : lignes et caractère multi-octets "é" à cheval sur la frontière
+    head = "x" * 1020
+    text = head + "é\n" + "ab\r\n" * 600 + "fin sans saut de ligne"
+    path = tmp_path / "f.csv"
+    path.write_bytes(b"\xef\xbb\xbf" + text.encode("utf-8"))
+    assert path.read_bytes()[1024:1026] == "é".encode("utf-8")[1:] + b"\n"
+
+    lines = list(iter_prefetched_lines(str(path), block_kb=1, depth=2))
+    assert "".join(lines) == text
+    assert lines[0] == head + "é\n"
+    assert lines[1] == "ab\r\n"
+    assert lines[-1] == "fin sans saut de ligne"
+    assert not _prefetch_threads()
+
+
+def test_prefetch_empty_file(tmp_path):
+    path = tmp_path / "vide.csv"
+    path.write_bytes(b"")
+    assert list(iter_prefetched_lines(str(path), block_kb=1)) == []
+
+
+def test_prefetch_early_close_stops_reader(tmp_path):
+    path = tmp_path / "gros.csv"
+    path.write_text("ligne\n" * 20000, encoding="utf-8")
+    gen = iter_prefetched_lines(str(path), block_kb=1, depth=2)
+    assert next(gen) == "ligne\n"
+    gen.close()
+    assert not _prefetch_threads()
+
+    gen = iter_prefetched_lines(str(path), block_kb=1, depth=2)
+    next(gen)
+    with pytest.raises(KeyError):
+        gen.throw(KeyError("parseur"))
+    assert not _prefetch_threads()
+
+
+def test_prefetch_read_error_propagates(tmp_path, monkeypatch):
+    class Failing(io.RawIOBase):
+        def readinto(self, buf):
+            raise OSError("partage réseau perdu")
+
+    monkeypatch.setattr(jmeter_io, "open", lambda *a, **k: Failing(), raising=False)
+    with pytest.raises(OSError, match="partage"):
+        list(iter_prefetched_lines(str(tmp_path / "x.csv"), block_kb=1))
+    assert not _prefetch_threads()
@@ -0,0 +1,28 @@
+import json
+
+from label_rules import OTHER_LABEL, LabelMapper, load_label_rules
+
+
+def test_label_order_prefix_needs_a_delimiter():
+    mapper = LabelMapper()
+    assert mapper("Policy") == "Policy"
+    assert mapper("Policy-0") == "Policy"
+    assert mapper("Policy/42") == "Policy"
+    assert mapper("Policy Renewal") == "Policy Renewal"
+    assert mapper("PolicyRenewal") == "PolicyRenewal"
+
+
+def test_rules_first_then_cap(tmp_path):
+    path = tmp_path / "labels.json"
+    path.write_text(json.dumps([
+        {"regex": r"^GET /api/(\w+)/\d+$", "label": r"GET \1"},
+        {"glob": "*/purchase/*", "label": "Purchase"},
+    ]), encoding="utf-8")
+    mapper = LabelMapper(load_label_rules(str(path)), max_labels=2)
+
+    assert mapper("GET /api/users/1") == "GET users"
+    assert mapper("GET /api/users/2") == "GET users"
+    assert mapper("/shop/purchase/3") == "Purchase"
+    assert mapper("Cancel") == OTHER_LABEL
+    assert mapper.targets == {"GET users", "Purchase"}
+    assert mapper.overflow == 1
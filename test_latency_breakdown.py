@@ -0,0 +1,32 @@
+from latency_breakdown import LatencyBreakdownCollector
+
+
+def _row(latency, connect=0, idle=0):
+    # colonnes lues par le collecteur (vide : composante absente)
+    return {"Latency": str(latency), "Connect": str(connect), "IdleTime": str(idle)}
+
+
+def test_breakdown_components_and_percentiles():
+    collector = LatencyBreakdownCollector(percentiles=(50, 95))
+    for i in range(1, 41):
+        collector.add("A", i, 100 + i, True, _row(60 + i, connect=10, idle=2))
+    collector.add("A", 50, 10, True, _row(""))
+
+    [row] = collector.results()
+    assert row["Samples"] == 40
+    assert row["Connect Avg (ms)"] == 10.0
+    assert row["Server Avg (ms)"] == 70.5
+    assert row["Download Avg (ms)"] == 40.0
+    assert row["Idle Avg (ms)"] == 2.0
+    # valeurs < 128 : buckets de largeur 1
+    assert (row["Server P50 (ms)"], row["Server P95 (ms)"]) == (70, 88)
+    assert row["Download P95 (ms)"] == 40
+
+
+def test_breakdown_memory_is_bounded():
+    collector = LatencyBreakdownCollector()
+    for i in range(20000):
+        collector.add("A", i, 500 + i % 1000, True, _row(400, connect=5))
+    hist = collector.labels["A"]["download"]
+    assert hist.total == 20000
+    assert len(hist.counts) < 400
@@ -0,0 +1,69 @@
+import pytest
+
+from live_ingest import LiveAggregator, parse_line
+
+
+def _point(transaction, ts_s, statut="all", **fields):
+    values = ",".join(f"{k}={v}" for k, v in fields.items())
+    return f"jmeter,application=app,transaction={transaction},statut={statut} {values} {ts_s * 10**9}"
+
+
+def test_parse_line_fields_and_tags():
+    line = ('jmeter,application=app,transaction=Purchase,statut=all '
+            'count=12i,avg=230.5,ok=t,msg="a b" 1700000000000000000')
+    measurement, tags, fields, ts_ns = parse_line(line)
+    assert measurement == "jmeter"
+    assert tags == {"application": "app", "transaction": "Purchase", "statut": "all"}
+    assert fields == {"count": 12, "avg": 230.5, "ok": True, "msg": "a b"}
+    assert isinstance(fields["count"], int)
+    assert ts_ns == 1700000000000000000
+
+
+def test_parse_line_escaping():
+    line = r'my\ meas,transaction=Login\ page\,v2,app\=x=a\ b text="dit \"ok\", fin",n=3u'
+    measurement, tags, fields, ts_ns = parse_line(line)
+    assert measurement == "my meas"
+    assert tags == {"transaction": "Login page,v2", "app=x": "a b"}
+    assert fields == {"text": 'dit "ok", fin', "n": 3}
+    assert ts_ns is None
+
+
+def test_parse_line_invalid():
+    with pytest.raises(ValueError):
+        parse_line("jmeter,transaction=x")
+    with pytest.raises(ValueError):
+        parse_line("jmeter count=abc")
+
+
+def test_aggregator_merges_intervals():
+    agg = LiveAggregator()
+    payload = "\n".join([
+        "events,application=app text=\"Test started\" 1700000000000000000",
+        _point("Login", 1700000001, count="10i", countError="1i", avg=100.0, min=50.0, max=200.0,
+               rb="1000i", sb="100i"),
+        _point("Login", 1700000002, count="30i", countError="0i", avg=200.0, min=80.0, max=400.0,
+               rb="3000i", sb="300i"),
+        _point("Login", 1700000002, statut="ok", count="30i", avg=200.0),
+        _point("all", 1700000002, count="40i", avg=175.0),
+        "jmeter,application=app,transaction=internal maxAT=8i 1700000002000000000",
+        "ligne invalide",
+        "events,application=app text=\"Test ended\" 1700000060000000000",
+    ]).encode("utf-8")
+    agg.submit(payload)
+    agg.submit(None)
+    agg.run()
+
+    assert agg.invalid == 1
+    assert agg.users() == 8
+    assert agg.time_range() == (1700000000000, 1700000060000)
+    login = agg.labels["Login"]
+    assert login["count"] == 40 and login["errors"] == 1
+    assert login["mean"] == pytest.approx(175.0)
+    assert (login["min"], login["max"]) == (50.0, 400.0)
+    assert login["bytes_sum"] == 4000 and login["sent_bytes_sum"] == 400
+
+    recap = agg.recap()
+    assert [r["Label"] for r in recap] == ["Login", "TOTAL"]
+    assert recap[0]["Samples"] == 40
+    assert recap[0]["Throughput (/min)"] == "40.0/min"
+    assert all(r["Std Dev (ms)"] == "" for r in recap)
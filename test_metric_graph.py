@@ -0,0 +1,75 @@
+import pytest
+
+from metrics import compute_recap, new_stats, add_sample, merge_stats, stats_to_row
+from metric_graph import plan_metrics, ALL_COLUMNS, PERCENTILE_COLUMNS
+
+
+def _rows():
+    # deux labels : le max global (20) vient du second, le min global (1) du premier
+    samples = [
+        ("Login", 1000, 1, "true", 100, 10),
+        ("Login", 1500, 10, "false", 120, 12),
+        ("Search", 2000, 5, "true", 300, 30),
+        ("Search", 4000, 20, "true", 310, 31),
+        ("Search", 6000, 7, "false", 290, 29),
+    ]
+    return [{"label": l, "timeStamp": str(ts), "elapsed": str(e), "success": s,
+             "bytes": str(b), "sentBytes": str(sb)} for l, ts, e, s, b, sb in samples]
+
+
+@pytest.mark.parametrize("column", ALL_COLUMNS)
+def test_single_column_plan_matches_full_recap(column):
+    full = compute_recap(_rows())
+    reduced = compute_recap(_rows(), plan=plan_metrics((column,)))
+    assert [r["Label"] for r in reduced] == [r["Label"] for r in full]
+    for r_full, r_reduced in zip(full, reduced):
+        assert set(r_reduced) == {"Label", column}
+        assert r_reduced[column] == r_full[column]
+
+
+def test_full_plan_matches_stats_to_row():
+    assert compute_recap(_rows(), plan=plan_metrics()) == compute_recap(_rows())
+
+
+def test_total_max_with_max_only_plan():
+    total = compute_recap(_rows(), plan=plan_metrics(("Max (ms)",)))[-1]
+    assert total == {"Label": "TOTAL", "Max (ms)": 20}
+
+
+def test_merge_stats_partial_bounds():
+    a, b = new_stats(), new_stats()
+    add_sample(a, 0, 5, True, 0, 0)
+    add_sample(b, 0, 9, True, 0, 0)
+    # seule la borne min a été tenue côté b
+    b["max"] = None
+    merge_stats(a, b)
+    assert (a["min"], a["max"]) == (5, 5)
+
+
+def test_merge_stats_matches_single_pass():
+    values = [3, 8, 1, 12, 7, 7]
+    whole, left, right = new_stats(), new_stats(), new_stats()
+    for i, v in enumerate(values):
+        add_sample(whole, i, v, True, 0, 0)
+        add_sample(left if i < 2 else right, i, v, True, 0, 0)
+    merged = merge_stats(left, right)
+    assert stats_to_row("x", merged) == stats_to_row("x", whole)
+
+
+def test_percentile_columns_and_unknown_column():
+    plan = plan_metrics(tuple(PERCENTILE_COLUMNS) + ("Samples",))
+    assert plan["percentiles"] == (90, 95, 99)
+    assert plan["columns"] == ["Samples"]
+    with pytest.raises(ValueError):
+        plan_metrics(("Nope",))
+
+
+def test_reduced_add_updates_only_planned_accumulators():
+    plan = plan_metrics(("Max (ms)",))
+    stats = new_stats()
+    plan["add"](stats, 1000, 12.0, False, 500, 50)
+    plan["add"](stats, 2000, 30.0, True, 500, 50)
+    assert (stats["count"], stats["max"]) == (2, 30.0)
+    assert stats["min"] is None and stats["first_ts"] is None
+    assert (stats["mean"], stats["m2"], stats["errors"], stats["bytes_sum"]) == (0.0, 0.0, 0, 0)
+    assert plan_metrics(("Max (ms)",))["add"] is plan["add"]
@@ -0,0 +1,27 @@
+import random
+
+import pytest
+
+from metrics import select_pair, percentile, parse_throughput
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_select_pair_matches_sorted(seed):
+    rng = random.Random(seed)
+    values = [rng.randint(0, 50) for _ in range(rng.randint(1, 400))]
+    ordered = sorted(values)
+    for k in range(len(values)):
+        expected_hi = ordered[k + 1] if k + 1 < len(values) else ordered[k]
+        assert select_pair(values, k) == (ordered[k], expected_hi)
+
+
+def test_percentile_interpolates():
+    assert percentile([10, 20, 30, 40], 50) == 25
+    assert percentile([5], 99) == 5
+    assert percentile([], 90) is None
+
+
+def test_parse_throughput():
+    assert parse_throughput("123.4/min") == 123.4
+    assert parse_throughput(7) == 7.0
+    assert parse_throughput("n/a") == 0.0
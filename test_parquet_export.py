@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from parquet_export import ParquetSampleCollector, sample_schema, write_recap_tables
+from pipeline import close_collectors
+
+
+def _row(i):
+    return {"label": f"GET /item/{i}", "responseCode": "200", "threadName": "TG 1-1",
+            "allThreads": str(i % 3), "Latency": "" if i == 0 else str(10 + i), "Connect": "2",
+            "bytes": "1000", "sentBytes": "300"}
+
+
+def _feed(collector, n):
+    for i in range(n):
+        collector.add("Item", 1700000000000 + i, 100 + i, i % 4 != 0, _row(i))
+
+
+def test_samples_round_trip_with_row_groups(tmp_path):
+    collector = ParquetSampleCollector(str(tmp_path), 4, row_group_size=3)
+    _feed(collector, 7)
+    collector.close()
+
+    path = tmp_path / "samples" / "users=4" / "part-0.parquet"
+    assert collector.path == str(path)
+    parquet = pq.ParquetFile(path)
+    assert parquet.schema_arrow == sample_schema()
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read().to_pydict()
+    assert table["elapsed"] == [100 + i for i in range(7)]
+    assert table["label"] == ["Item"] * 7
+    assert table["rawLabel"][1] == "GET /item/1"
+    assert table["latency"][:2] == [None, 11]
+    assert table["success"][:2] == [False, True]
+
+    # partition Hive relue comme colonne
+    dataset = pq.read_table(tmp_path / "samples", partitioning="hive")
+    assert set(dataset.column("users").to_pylist()) == {4}
+
+
+def test_close_collectors_finalizes_partial_file(tmp_path):
+    collector = ParquetSampleCollector(str(tmp_path), 1, row_group_size=100)
+    _feed(collector, 5)
+    close_collectors({"exec_range": None, "parquet": collector})
+    assert pq.read_table(collector.path).num_rows == 5
+
+
+def test_recap_tables_mixed_types(tmp_path):
+    scenarios = {
+        "1 users": [{"Label": "A", "Samples": 10, "Average (ms)": 120, "Throughput (/min)": "60.0/min",
+                     "Knee (users)": ""},
+                    {"Label": "TOTAL", "Samples": 10, "Average (ms)": 120, "Throughput (/min)": "60.0/min",
+                     "Knee (users)": 12.5}],
+    }
+    write_recap_tables(str(tmp_path), scenarios, {"A": {1: 120}}, {"A": {1: 0.5}})
+
+    recap = pq.read_table(tmp_path / "recap.parquet").to_pydict()
+    assert recap["Scenario"] == ["1 users", "1 users"]
+    assert recap["Knee (users)"] == [None, 12.5]
+    assert recap["Throughput (/min)"] == ["60.0/min", "60.0/min"]
+    matrix = pq.read_table(tmp_path / "matrix.parquet").to_pydict()
+    assert matrix == {"Label": ["A"], "Users": [1], "Response Time (ms)": [120], "Error %": [0.5]}
+    assert sorted(os.listdir(tmp_path)) == ["matrix.parquet", "recap.parquet"]
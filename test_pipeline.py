@@ -0,0 +1,8 @@
+from pipeline import preview_ignored
+
+
+def test_preview_lists_ignored_collectors_and_windows():
+    parts = {"exec_range": object(), "sla": object(), "errors": object()}
+    options = {"time_window_start": None, "time_window_end": "14:10"}
+    assert preview_ignored(options, parts, window=object()) == ["sla", "errors", "steady_state", "time_window"]
+    assert preview_ignored({"time_window_start": None, "time_window_end": None}, {"exec_range": 1}) == []
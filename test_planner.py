@@ -0,0 +1,57 @@
+import pytest
+
+import config_loader
+from exact_percentiles import PEAK_VALUE_SIZE, ExactPercentileCollector
+from planner import available_memory_bytes, plan_scenario
+import planner
+
+
+@pytest.fixture
+def options():
+    # options par défaut (aucune variable d'environnement)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(config_loader.os, "getenv", lambda name, default=None: default)
+        return config_loader.load_options()
+
+
+def _paths(tmp_path):
+    path = tmp_path / "IDP API-results-1-users.csv"
+    lines = ["timeStamp,elapsed,label,success"]
+    lines += [f"{1700000000000 + i * 10},{100 + i % 50},A,true" for i in range(5000)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return [str(path)]
+
+
+def test_exact_when_peak_fits(tmp_path, options, monkeypatch):
+    monkeypatch.setattr(planner, "available_memory_bytes", lambda: 1024 ** 3)
+    plan = plan_scenario(_paths(tmp_path), options, {"exact": ExactPercentileCollector()})
+    assert plan["mode"] == "exact"
+
+
+def test_spill_when_peak_exceeds_budget(tmp_path, options, monkeypatch):
+    paths = _paths(tmp_path)
+    # la place des valeurs brutes (4 octets) mais pas celle des copies de tri
+    monkeypatch.setattr(planner, "available_memory_bytes", lambda: 5000 * 8 * 2)
+    plan = plan_scenario(paths, options, {"exact": ExactPercentileCollector()})
+    assert plan["est_rows"] * PEAK_VALUE_SIZE > plan["memory_budget_bytes"]
+    assert plan["mode"] == "spill"
+
+
+def test_sequential_collector_blocks_parallel(tmp_path, options, monkeypatch):
+    options["execution_mode"] = "parallel"
+    plan = plan_scenario(_paths(tmp_path), options, {"exec_range": None, "heatmap": None})
+    assert plan["mode"] == "streaming"
+
+
+def test_forced_parallel_keeps_exact_percentiles(tmp_path, options):
+    from metrics import ExecutionRangeCollector
+    options["execution_mode"] = "parallel"
+    parts = {"exec_range": ExecutionRangeCollector(), "exact": ExactPercentileCollector()}
+    plan = plan_scenario(_paths(tmp_path), options, parts)
+    assert plan["mode"] == "spill"
+    assert "parallel impossible avec exact : spill" in plan["reasons"]
+
+
+def test_available_memory_uses_memavailable(monkeypatch):
+    monkeypatch.setattr(planner, "_meminfo_available", lambda: 123 * 1024)
+    assert available_memory_bytes() == 123 * 1024
@@ -0,0 +1,49 @@
+import pytest
+
+from resources import correlate_resources, join_intervals
+
+
+def series_of(**labels):
+    """label -> [(ts_ms, count, avg_ms)] au format TimeSeriesCollector.series."""
+    return {label: [(ts, c, avg, 0) for ts, c, avg in pts] for label, pts in labels.items()}
+
+
+def test_join_intervals_assigns_buckets_to_the_closing_point():
+    points = [(0, 10.0), (10000, 50.0), (20000, 80.0), (30000, 20.0)]
+    series = series_of(
+        A=[(5000, 10, 100.0), (10000, 4, 50.0), (15000, 6, 200.0)],
+        B=[(25000, 2, 10.0)],
+    )
+    intervals = join_intervals(points, series, 0, 30000)
+    assert intervals == [
+        (10000, 50.0, {"A": [14, 1200.0]}),
+        (10000, 80.0, {"A": [6, 1200.0]}),
+        (10000, 20.0, {"B": [2, 20.0]}),
+    ]
+
+
+def test_join_intervals_respects_window():
+    points = [(0, 1.0), (10000, 2.0), (20000, 3.0), (30000, 4.0)]
+    series = series_of(A=[(5000, 1, 1.0), (15000, 1, 1.0), (25000, 1, 1.0)])
+    intervals = join_intervals(points, series, 10000, 20000)
+    assert [(d, v) for d, v, _ in intervals] == [(10000, 3.0)]
+
+
+def test_stall_intervals_count_in_usage():
+    points = [(0, 0.0), (10000, 20.0), (20000, 95.0), (30000, 25.0), (40000, 20.0)]
+    series = series_of(A=[(5000, 10, 100.0), (25000, 10, 100.0), (35000, 10, 100.0)])
+    usage, demand = correlate_resources({"cpu": points}, series, 0, 40000, cpu_metric="cpu")
+    row = usage[0]
+    assert row["Intervals"] == 4
+    assert row["Max"] == 95.0
+    assert row["Corr. Throughput"] < -0.9
+    # le CPU de l'arrêt n'est imputé à aucune requête
+    assert demand[-1]["CPU-ms"] == pytest.approx((20 + 25 + 20) / 100.0 * 10000)
+
+
+def test_cpu_share_without_elapsed_is_by_request_count():
+    points = [(0, 0.0), (10000, 50.0)]
+    series = series_of(A=[(5000, 3, 0.0)], B=[(5000, 1, 0.0)])
+    _, demand = correlate_resources({"cpu": points}, series, 0, 10000, cpu_metric="cpu")
+    by_label = {row["Label"]: row["CPU-ms"] for row in demand}
+    assert by_label == {"A": 3750.0, "B": 1250.0, "TOTAL": 5000.0}
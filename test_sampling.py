@@ -0,0 +1,41 @@
+import csv
+import random
+
+from sampling import sample_jmeter_csv
+
+
+def _write_csv(tmp_path, rows):
+    """
+    rows : (timeStamp, label, responseMessage) ; le message fait varier la longueur des lignes.
+    """
+    path = tmp_path / "IDP API-results-1-users.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timeStamp", "elapsed", "label", "responseMessage", "success"])
+        for ts, label, message in rows:
+            writer.writerow([ts, 10, label, message, "true"])
+    return str(path)
+
+
+def test_sample_is_not_length_biased(tmp_path):
+    # lignes courtes (A) et longues (B) alternées, dernière ligne très longue :
+    # l'ancien tirage « ligne suivante » favorisait A et la première ligne
+    rows = []
+    for i in range(500):
+        rows.append((1000 + i, "A", "OK"))
+        rows.append((1000 + i, "B", "x" * 400))
+    rows.append((9999, "C", "y" * 4000))
+    path = _write_csv(tmp_path, rows)
+
+    sample, info = sample_jmeter_csv(path, 4000, random.Random(1))
+
+    labels = [r["label"] for r in sample]
+    assert 0.45 < labels.count("A") / len(labels) < 0.55
+    assert labels.count("C") < 20
+    assert abs(info["est_rows"] - 1001) < 50
+    assert (info["first_ts"], info["last_ts"]) == (1000, 9999)
+
+
+def test_empty_file(tmp_path):
+    sample, info = sample_jmeter_csv(_write_csv(tmp_path, []), 10, random.Random(0))
+    assert sample == [] and info["est_rows"] == 0
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from sla import SlaCollector, evaluate_sla, load_sla_definitions
+
+
+def write_sla(tmp_path, definitions):
+    path = tmp_path / "sla.json"
+    path.write_text(json.dumps(definitions), encoding="utf-8")
+    return str(path)
+
+
+def test_apdex_counts_and_evaluation():
+    collector = SlaCollector({"*": {"apdex_t_ms": 100}, "A": {"min_apdex": 0.8, "p95_ms": 300}})
+    # A : 6 satisfaits, 2 tolérés (<= 400), 1 frustré, 1 erreur
+    for elapsed in (10, 50, 100, 100, 20, 30, 101, 400, 401):
+        collector.add("A", 0, elapsed, True, None)
+    collector.add("A", 0, 10, False, None)
+    collector.add("B", 0, 10, True, None)
+
+    apdex = collector.apdex()
+    assert apdex["A"] == pytest.approx((6 + 2 / 2.0) / 10)
+    assert apdex["B"] == 1.0
+    assert apdex["TOTAL"] == pytest.approx((7 + 1) / 11)
+
+    recap = [
+        {"Label": "A", "Average (ms)": 120, "Error %": 10.0, "Throughput (/min)": "60.0/min", "95% Line (ms)": 350},
+        {"Label": "TOTAL", "Average (ms)": 110, "Error %": 9.1, "Throughput (/min)": "66.0/min"},
+    ]
+    statuses = evaluate_sla(recap, collector)
+    assert statuses == {"A": "FAIL"}
+    assert recap[0]["SLA Details"] == "p95 350 > 300; apdex 0.7 < 0.8"
+    assert "SLA" not in recap[1]
+
+
+def test_min_apdex_requires_threshold(tmp_path):
+    with pytest.raises(ValueError, match="min_apdex"):
+        load_sla_definitions(write_sla(tmp_path, {"A": {"min_apdex": 0.9}}))
+    with pytest.raises(ValueError, match="'\\*'"):
+        load_sla_definitions(write_sla(tmp_path, {"*": {"min_apdex": 0.9}, "A": {"apdex_t_ms": 200}}))
+
+    ok = {"*": {"apdex_t_ms": 500}, "A": {"min_apdex": 0.9}, "TOTAL": {"min_apdex": 0.8}}
+    assert load_sla_definitions(write_sla(tmp_path, ok)) == ok
+    ok = {"A": {"apdex_t_ms": 500}, "TOTAL": {"min_apdex": 0.8}}
+    assert load_sla_definitions(write_sla(tmp_path, ok)) == ok
@@ -0,0 +1,46 @@
+from metrics import compute_recap, ExecutionRangeCollector
+from steady_state import SteadyStateDetector
+from exact_percentiles import ExactPercentileCollector
+
+T0 = 1700000000000
+
+
+def _ramp_rows():
+    # 0-30 s : montée à 1 thread, 1000 ms ; 30-90 s : plateau à 4 threads, 100 ms ; 90-100 s : descente
+    rows = []
+    for s in range(100):
+        threads = 4 if 30 <= s < 90 else 1
+        elapsed = 100 if 30 <= s < 90 else 1000
+        for i in range(threads):
+            rows.append({"timeStamp": str(T0 + s * 1000 + i * 10), "elapsed": str(elapsed), "label": "A",
+                         "success": "true", "allThreads": str(threads)})
+    return rows
+
+
+def test_threads_plateau_window():
+    window = SteadyStateDetector(bucket_s=10)
+    recap = compute_recap(_ramp_rows(), window=window)
+    assert window.window == {"start_ms": T0 + 30000, "end_ms": T0 + 90000, "method": "plateau de threads"}
+    assert recap[0]["Average (ms)"] == 100
+
+
+def test_collectors_see_only_the_window():
+    window = SteadyStateDetector(bucket_s=10)
+    exact = ExactPercentileCollector()
+    exec_range = ExecutionRangeCollector()
+    recap = compute_recap(_ramp_rows(), collectors=[exact, exec_range], window=window)
+    exact.apply_to_recap(recap)
+    # aucun échantillon de montée / descente (1000 ms) dans les percentiles
+    assert recap[0]["99% Line (ms)"] == 100
+    # la date d'exécution reste celle du run complet
+    assert exec_range.start_ms == T0
+    assert exec_range.end_ms == T0 + 99000
+
+
+def test_explicit_trim_does_not_leak_trimmed_seconds():
+    window = SteadyStateDetector(bucket_s=10, trim_start_s=15, trim_end_s=15)
+    window.buckets = {idx: [1, 1, 1] for idx in range(10)}
+    win = window.resolve()
+    # 15 s rognées au début : la tranche 10-20 s est partiellement rognée, exclue
+    assert win["start_ms"] == 20000
+    assert win["end_ms"] == 80000
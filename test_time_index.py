@@ -0,0 +1,44 @@
+from time_index import build_index, iter_time_window, merge_time_window, resolve_time_window
+
+
+def _jtl(tmp_path, name, timestamps):
+    path = tmp_path / name
+    lines = ["timeStamp,elapsed,label,success"] + [f"{ts},10,{name}-{i},true" for i, ts in enumerate(timestamps)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _ts(rows):
+    return [int(r["timeStamp"]) for r in rows]
+
+
+def test_window_start_inclusive_end_exclusive(tmp_path):
+    path = _jtl(tmp_path, "a.csv", range(1000, 1100))
+    # step_kb minuscule : plusieurs points de contrôle, le seek est exercé
+    rows = list(iter_time_window(path, 1040, 1060, step_kb=0.2))
+    assert _ts(rows) == list(range(1040, 1060))
+    assert len(build_index(path, step_kb=0.2)["checkpoints"]) > 3
+
+
+def test_out_of_order_within_slack_kept(tmp_path):
+    timestamps = list(range(1000, 1050)) + [1080, 1055, 1090, 1058] + list(range(1100, 1150))
+    path = _jtl(tmp_path, "a.csv", timestamps)
+    assert build_index(path)["disorder_ms"] == 1090 - 1058
+    assert _ts(iter_time_window(path, 1050, 1060, step_kb=0.2)) == [1055, 1058]
+
+
+def test_window_outside_data_is_empty(tmp_path):
+    path = _jtl(tmp_path, "a.csv", range(1000, 1100))
+    assert list(iter_time_window(path, 0, 1000, step_kb=0.2)) == []
+    assert list(iter_time_window(path, 1100, 2000, step_kb=0.2)) == []
+
+
+def test_resolve_and_merge_across_injectors(tmp_path):
+    a = _jtl(tmp_path, "a.csv", range(1000, 1100, 2))
+    b = _jtl(tmp_path, "b.csv", range(1001, 1200, 2))
+    # bornes absentes : début du premier fichier, fin du dernier incluse
+    assert resolve_time_window([a, b], None, None) == (1000, 1200)
+    assert resolve_time_window([a, b], "1050", None) == (1050, 1200)
+    start_ms, end_ms = resolve_time_window([a, b], None, None)
+    assert _ts(merge_time_window([a, b], start_ms, end_ms)) == list(range(1000, 1100)) + list(range(1101, 1200, 2))
+    assert _ts(merge_time_window([a, b], 1095, 1104)) == [1095, 1096, 1097, 1098, 1099, 1101, 1103]
@@ -0,0 +1,39 @@
+from html_export import _scenario_charts
+from resources import join_intervals
+from timeseries import TimeSeriesCollector, lttb
+
+
+def test_series_emits_empty_buckets():
+    collector = TimeSeriesCollector(bucket_s=1)
+    for ts, label, elapsed, success in [(0, "A", 100, True), (500, "A", 300, False),
+                                        (3200, "A", 50, True), (4100, "B", 10, True)]:
+        collector.add(label, ts, elapsed, success, None)
+    series = collector.series()
+
+    assert series["A"] == [(0, 2, 200.0, 1), (1000, 0, None, 0), (2000, 0, None, 0), (3000, 1, 50.0, 0)]
+    assert series["B"] == [(4000, 1, 10.0, 0)]
+    assert [p[1] for p in series["TOTAL"]] == [2, 0, 0, 1, 1]
+
+    # arrêt visible au débit, absent du graphe de latence
+    html = _scenario_charts(series, 1, 100)
+    assert "Temps de réponse moyen" in html and "Débit (req/s)" in html
+    intervals = join_intervals([(0, 1.0), (2000, 2.0), (4000, 3.0)], series, 0, 4000)
+    assert [sum(e[0] for e in pl.values()) for _, _, pl in intervals] == [0, 2]
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    points = [(x, 10.0) for x in range(1000)]
+    points[421] = (421, 500.0)
+    points[777] = (777, -200.0)
+    sampled = lttb(points, 50)
+
+    assert len(sampled) == 50
+    assert sampled[0] == points[0] and sampled[-1] == points[-1]
+    assert (421, 500.0) in sampled and (777, -200.0) in sampled
+    assert [p[0] for p in sampled] == sorted(p[0] for p in sampled)
+
+
+def test_lttb_small_inputs_unchanged():
+    points = [(0, 1.0), (1, 2.0), (2, 3.0)]
+    assert lttb(points, 10) == points
+    assert lttb(points, 2) == points
@@ -0,0 +1,58 @@
+import os
+import stat
+from zipfile import ZipFile
+
+import pytest
+
+import word_template
+from word_template import load_compiled_template, render_document_xml
+
+DOCUMENT = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+    '<w:p><w:r><w:t>{TITLE}</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>{TABLE}</w:t></w:r></w:p>'
+    '</w:body></w:document>'
+)
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "template.docx"
+    with ZipFile(path, "w") as z:
+        z.writestr("[Content_Types].xml", "<Types/>")
+        z.writestr("word/document.xml", DOCUMENT)
+    return str(path)
+
+
+def test_cache_round_trip_is_json(template, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    compiled = load_compiled_template(template, cache_dir)
+    files = os.listdir(cache_dir)
+    assert len(files) == 1 and files[0].endswith(".tpl.json")
+    if hasattr(os, "getuid"):
+        assert stat.S_IMODE(os.stat(cache_dir).st_mode) == 0o700
+
+    monkeypatch.setattr(word_template, "_memory_cache", {})
+    monkeypatch.setattr(word_template, "compile_template", lambda path: pytest.fail("cache ignoré"))
+    cached = load_compiled_template(template, cache_dir)
+    assert cached == compiled
+
+    xml, done = render_document_xml(cached, {"{TITLE}": "Recap"}, {"{TABLE}": "<w:tbl/>"})
+    assert done == {"{TITLE}", "{TABLE}"}
+    assert b"<w:t>Recap</w:t>" in xml and b"<w:tbl/>" in xml
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="droits POSIX")
+def test_shared_cache_dir_is_ignored(template, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "shared"
+    cache_dir.mkdir()
+    os.chmod(cache_dir, 0o777)
+    monkeypatch.setattr(word_template, "_memory_cache", {})
+    load_compiled_template(template, str(cache_dir))
+    assert os.listdir(cache_dir) == []
+
+
+def test_default_cache_dir_is_per_user():
+    assert word_template.default_cache_dir() != os.path.join(
+        word_template.tempfile.gettempdir(), "jmeter_recap_template_cache")
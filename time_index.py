@@ -0,0 +1,215 @@
+import os
+import csv
+import json
+import heapq
+import logging
+from datetime import datetime
+
+from jmeter_io import _timestamp_key
+
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 1
+
+
+def _record_lines(f):
+    """
+    Enregistrements CSV d'un fichier binaire : (offset, octets). Une valeur
+    entre guillemets contenant des sauts de ligne reste dans un seul
+    enregistrement (nombre de guillemets impair -> ligne suivante ajoutée).
+    """
+    while True:
+        offset = f.tell()
+        line = f.readline()
+        if not line:
+            return
+        while line.count(b'"') % 2:
+            more = f.readline()
+            if not more:
+                break
+            line += more
+        yield offset, line
+
+
+def _parse_record(line, header):
+    values = next(csv.reader([line.decode("utf-8", errors="replace")]), None)
+    if not values or len(values) != len(header):
+        return None
+    return dict(zip(header, values))
+
+
+def _record_ts(line, ts_col):
+    """
+    timeStamp d'un enregistrement ; chemin rapide si c'est la 1re colonne
+    (cas du format CSV JMeter par défaut).
+    """
+    try:
+        if ts_col == 0:
+            return int(line[:line.index(b",")])
+        values = next(csv.reader([line.decode("utf-8", errors="replace")]))
+        return int(values[ts_col])
+    except (ValueError, IndexError, StopIteration):
+        return None
+
+
+def build_index(path, step_kb=256):
+    """
+    Index creux d'un CSV JMeter, en une passe : tous les `step_kb` Ko, un
+    point de contrôle [offset, max des timeStamp avant l'offset].
+    `disorder_ms` : plus grand retard d'une ligne sur le max des lignes
+    précédentes (fenêtre de désordre W mesurée, exacte pour ce fichier).
+    """
+    step = max(int(step_kb * 1024), 1)
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        header = next(csv.reader([header_line.decode("utf-8-sig")]))
+        ts_col = header.index("timeStamp")
+        header_end = f.tell()
+
+        checkpoints = [[header_end, None]]
+        running_max = None
+        first_ts = None
+        disorder = 0
+        next_checkpoint = header_end + step
+        for offset, line in _record_lines(f):
+            if offset >= next_checkpoint:
+                checkpoints.append([offset, running_max])
+                next_checkpoint = offset + step
+            ts = _record_ts(line, ts_col)
+            if ts is None:
+                continue
+            if first_ts is None or ts < first_ts:
+                first_ts = ts
+            if running_max is None or ts > running_max:
+                running_max = ts
+            elif running_max - ts > disorder:
+                disorder = running_max - ts
+
+    stat = os.stat(path)
+    return {
+        "version": INDEX_VERSION,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "header": header,
+        "first_ts": first_ts,
+        "last_ts": running_max,
+        "disorder_ms": disorder,
+        "checkpoints": checkpoints,
+    }
+
+
+def load_or_build_index(path, step_kb=256):
+    """
+    Index du fichier (<csv>.idx.json à côté du CSV), reconstruit si absent
+    ou périmé (taille / date de modification). Si le dossier n'est pas
+    accessible en écriture, l'index reste en mémoire.
+    """
+    index_path = path + INDEX_SUFFIX
+    stat = os.stat(path)
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION and index.get("size") == stat.st_size \
+                and index.get("mtime") == stat.st_mtime:
+            return index
+    except (OSError, ValueError):
+        pass
+
+    logging.info("Construction de l'index temporel : %s", index_path)
+    index = build_index(path, step_kb)
+    try:
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+    except OSError as e:
+        logging.warning("Index non enregistré (%s) : %s", index_path, e)
+    logging.info("  -> %d points de contrôle, désordre max %d ms",
+                 len(index["checkpoints"]), index["disorder_ms"])
+    return index
+
+
+def iter_time_window(path, start_ms, end_ms, step_kb=256):
+    """
+    Lignes (dict) du CSV dont le timeStamp est dans [start_ms, end_ms[,
+    sans lecture complète : seek au dernier point de contrôle dont le max
+    précédent est < start_ms (aucune ligne antérieure ne peut être dans la
+    fenêtre), puis arrêt dès que le max courant dépasse end_ms + W (toute
+    ligne suivante a un timeStamp >= max - W >= end_ms).
+    Le coût dépend de la longueur de la fenêtre, pas de la taille du fichier.
+    """
+    index = load_or_build_index(path, step_kb)
+    header = index["header"]
+    ts_col = header.index("timeStamp")
+    stop_after = end_ms + index["disorder_ms"]
+
+    offset = index["checkpoints"][0][0]
+    for cp_offset, max_before in index["checkpoints"]:
+        if max_before is not None and max_before >= start_ms:
+            break
+        offset = cp_offset
+
+    read = 0
+    kept = 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        running_max = None
+        for _, line in _record_lines(f):
+            read += 1
+            ts = _record_ts(line, ts_col)
+            if ts is None:
+                continue
+            if running_max is None or ts > running_max:
+                running_max = ts
+                if running_max > stop_after:
+                    break
+            if start_ms <= ts < end_ms:
+                row = _parse_record(line, header)
+                if row is not None:
+                    kept += 1
+                    yield row
+    logging.info("  -> fenêtre temporelle : %d lignes lues, %d retenues (%s)", read, kept, path)
+
+
+def merge_time_window(paths, start_ms, end_ms, step_kb=256):
+    """
+    Comme jmeter_io.merge_jmeter_csv, restreint à [start_ms, end_ms[ par fichier.
+    """
+    if len(paths) == 1:
+        return iter_time_window(paths[0], start_ms, end_ms, step_kb)
+    return heapq.merge(*(iter_time_window(p, start_ms, end_ms, step_kb) for p in paths),
+                       key=_timestamp_key)
+
+
+def parse_time_bound(value, reference_ms):
+    """
+    Borne de fenêtre -> timestamp ms. Formats acceptés :
+      1700000000000 (epoch ms), "2025-11-21 14:05[:SS]", "14:05[:SS]"
+    (heure seule : le jour de `reference_ms`, début du run, en heure locale).
+    """
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M"):
+        try:
+            return int(datetime.strptime(value, fmt).timestamp() * 1000)
+        except ValueError:
+            pass
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try:
+            t = datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+        day = datetime.fromtimestamp(reference_ms / 1000.0).date()
+        return int(datetime.combine(day, t).timestamp() * 1000)
+    raise ValueError(f"Borne de fenêtre temporelle invalide : {value}")
+
+
+def resolve_time_window(paths, start, end, step_kb=256):
+    """
+    (start_ms, end_ms) pour un groupe de fichiers ; une borne absente vaut le
+    début / la fin du run (lus dans les index).
+    """
+    indexes = [load_or_build_index(p, step_kb) for p in paths]
+    first = min(i["first_ts"] for i in indexes if i["first_ts"] is not None)
+    last = max(i["last_ts"] for i in indexes if i["last_ts"] is not None)
+    start_ms = parse_time_bound(start, first) if start else first
+    end_ms = parse_time_bound(end, first) if end else last + 1
+    return start_ms, end_ms
@@ -0,0 +1,106 @@
+from metrics import ordered_label_names
+
+
+class TimeSeriesCollector:
+    """
+    Collecteur pour compute_recap : série temporelle par label, par tranche de
+    `bucket_s` secondes : [nombre d'échantillons, somme elapsed, erreurs].
+    """
+
+    # run complet, montée / descente comprises (voir metrics.compute_recap)
+    whole_run = True
+
+    def __init__(self, bucket_s=1):
+        self.bucket_ms = max(int(bucket_s * 1000), 1)
+        self.labels = {}  # label -> {index tranche: [count, elapsed_sum, errors]}
+
+    def add(self, label, ts, elapsed, success, row):
+        per_bucket = self.labels.get(label)
+        if per_bucket is None:
+            per_bucket = self.labels[label] = {}
+        idx = ts // self.bucket_ms
+        entry = per_bucket.get(idx)
+        if entry is None:
+            entry = per_bucket[idx] = [0, 0.0, 0]
+        entry[0] += 1
+        entry[1] += elapsed
+        if not success:
+            entry[2] += 1
+
+    def _points(self, per_bucket, first, last):
+        """
+        Points des tranches first..last, tranches vides comprises
+        (0 échantillon, moyenne None) : un arrêt reste visible.
+        """
+        points = []
+        for idx in range(first, last + 1):
+            entry = per_bucket.get(idx)
+            if entry is None:
+                points.append((idx * self.bucket_ms, 0, None, 0))
+            else:
+                count, elapsed_sum, errors = entry
+                points.append((idx * self.bucket_ms, count, elapsed_sum / count, errors))
+        return points
+
+    def series(self):
+        """
+        label -> [(ts_ms, samples, avg_ms, errors)] trié par temps, une entrée
+        par tranche entre le premier et le dernier échantillon du label
+        (avg_ms None pour une tranche vide), plus "TOTAL" (toutes les
+        tranches fusionnées, sur tout le run).
+        """
+        out = {}
+        total = {}
+        for label in ordered_label_names(self.labels):
+            per_bucket = self.labels[label]
+            for idx, (count, elapsed_sum, errors) in per_bucket.items():
+                t = total.get(idx)
+                if t is None:
+                    t = total[idx] = [0, 0.0, 0]
+                t[0] += count
+                t[1] += elapsed_sum
+                t[2] += errors
+            out[label] = self._points(per_bucket, min(per_bucket), max(per_bucket))
+        out["TOTAL"] = self._points(total, min(total), max(total)) if total else []
+        return out
+
+
+def lttb(points, threshold):
+    """
+    Sous-échantillonnage Largest-Triangle-Three-Buckets (Steinarsson) :
+    garde `threshold` points en préservant la forme (pics, creux) de la série.
+    points : liste de (x, y) triée par x.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # moyenne de la tranche suivante (3e sommet du triangle)
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in span) / len(span)
+        avg_y = sum(p[1] for p in span) / len(span)
+
+        # point de la tranche courante qui maximise l'aire du triangle
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = points[a]
+        best_area = -1.0
+        best = start
+        for j in range(start, end):
+            px, py = points[j]
+            area = abs((ax - avg_x) * (py - ay) - (ax - px) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
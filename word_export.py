@@ -1,12 +1,46 @@
+import os
 import logging
 from zipfile import ZipFile
-import xml.etree.ElementTree as ET
 
-from metrics import compute_execution_range_string
-# mêmes namespaces que dans ton script monolithique
-W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
-NS = {"w": W_NS}
-ET.register_namespace("w", W_NS)
+from word_template import W_NS, load_compiled_template, render_document_xml
+from heatmap import merge_columns
+
+# clés du recap lues par le tableau Response time (déclarées à metric_graph)
+RECAP_COLUMNS = [
+    "Samples",
+    "Average (ms)",
+    "Min (ms)",
+    "Max (ms)",
+    "Std Dev (ms)",
+    "Error %",
+    "Throughput (/min)",
+    "Received KB/sec",
+    "Sent KB/sec",
+    "Avg Bytes",
+]
+
+# colonnes ajoutées au tableau seulement si le recap les contient
+OPTIONAL_COLUMNS = [
+    ("Average CI (95%)", "Average CI (ms)"),
+    ("90% Line", "90% Line (ms)"),
+    ("95% Line", "95% Line (ms)"),
+    ("99% Line", "99% Line (ms)"),
+    ("95% Line CI", "95% CI (ms)"),
+    ("Error % CI", "Error % CI"),
+    ("Apdex", "Apdex"),
+    ("SLA", "SLA"),
+]
+
+# fond de cellule pour les statuts SLA (équivalent de la mise en forme conditionnelle Excel)
+STATUS_FILLS = {
+    "PASS": "C6EFCE",
+    "FAIL": "FFC7CE",
+}
+
+# colonnes de temps max d'une heatmap dans Word (fusion des colonnes adjacentes)
+HEATMAP_WORD_COLUMNS = 16
+
+APPROX_NOTE = "Valeurs approximatives (mode preview sur échantillon, intervalles de confiance à 95 %)"
 
 
 def xml_escape(text: str) -> str:
@@ -21,26 +55,13 @@ def xml_escape(text: str) -> str:
     )
 
 
-def build_response_time_table_xml(recap):
+def build_table_xml(headers, rows, fills=None):
     """
-    Table JMeter-like :
-      Label, # Samples, Average, Min, Max, Std. Dev., Error %, Throughput,
-      Received KB/sec, Sent KB/sec, Avg. Bytes
+    <w:tbl> bordé, en-tête en gras, police 8 pt.
+    rows : liste de listes de cellules (converties en texte).
+    fills : listes parallèles à rows de couleurs de fond ("RRGGBB" ou None) ;
+    à défaut, les statuts PASS/FAIL sont colorés.
     """
-    headers = [
-        "Label",
-        "# Samples",
-        "Average",
-        "Min",
-        "Max",
-        "Std. Dev.",
-        "Error %",
-        "Throughput",
-        "Received KB/sec",
-        "Sent KB/sec",
-        "Avg. Bytes",
-    ]
-
     header_row_xml = "<w:tr>"
     for h in headers:
         header_row_xml += f"""
@@ -61,28 +82,19 @@ def build_response_time_table_xml(recap):
     header_row_xml += "</w:tr>"
 
     data_rows_xml = ""
-    for r in recap:
+    for row_idx, cells in enumerate(rows):
         data_rows_xml += "<w:tr>"
 
-        cells = [
-            r["Label"],
-            r["Samples"],
-            int(r["Average (ms)"]),
-            int(r["Min (ms)"]),
-            int(r["Max (ms)"]),
-            r["Std Dev (ms)"],
-            f"{r['Error %']:.2f}%",
-            r["Throughput (/min)"],
-            r["Received KB/sec"],
-            r["Sent KB/sec"],
-            r["Avg Bytes"],
-        ]
-
-        for val in cells:
+        for col_idx, val in enumerate(cells):
             text = xml_escape(val)
+            if fills is not None:
+                fill = fills[row_idx][col_idx]
+            else:
+                fill = STATUS_FILLS.get(text)
+            tc_pr = f'<w:tcPr><w:shd w:val="clear" w:color="auto" w:fill="{fill}"/></w:tcPr>' if fill else "<w:tcPr/>"
             data_rows_xml += f"""
             <w:tc>
-              <w:tcPr/>
+              {tc_pr}
               <w:p>
                 <w:r>
                   <w:rPr>
@@ -116,12 +128,230 @@ def build_response_time_table_xml(recap):
     return table_xml.strip()
 
 
+def build_response_time_table_xml(recap):
+    """
+    Table JMeter-like :
+      Label, # Samples, Average, Min, Max, Std. Dev., Error %, Throughput,
+      Received KB/sec, Sent KB/sec, Avg. Bytes
+    """
+    headers = [
+        "Label",
+        "# Samples",
+        "Average",
+        "Min",
+        "Max",
+        "Std. Dev.",
+        "Error %",
+        "Throughput",
+        "Received KB/sec",
+        "Sent KB/sec",
+        "Avg. Bytes",
+    ]
+    optional = [(h, key) for h, key in OPTIONAL_COLUMNS if any(key in r for r in recap)]
+    headers += [h for h, _ in optional]
+
+    rows = []
+    for r in recap:
+        cells = [
+            r["Label"],
+            r["Samples"],
+            int(r["Average (ms)"]),
+            int(r["Min (ms)"]),
+            int(r["Max (ms)"]),
+            r["Std Dev (ms)"],
+            f"{r['Error %']:.2f}%",
+            r["Throughput (/min)"],
+            r["Received KB/sec"],
+            r["Sent KB/sec"],
+            r["Avg Bytes"],
+        ]
+        cells += [r.get(key, "") for _, key in optional]
+        rows.append(cells)
+
+    return build_table_xml(headers, rows)
+
+
+def build_error_table_xml(error_rows):
+    """
+    Table top-K erreurs : Label, Code, Message, Failure, Count, %, First/Last Seen.
+    """
+    headers = ["Label", "Code", "Response Message", "Failure Message", "Count", "% Errors",
+               "First Seen", "Last Seen"]
+    rows = []
+    for r in error_rows:
+        rows.append([
+            r["Label"],
+            r["Response Code"],
+            r["Response Message"],
+            r["Failure Message"],
+            r["Count"],
+            f"{r['% of Label Errors']:.2f}%",
+            r["First Seen"],
+            r["Last Seen"],
+        ])
+    return build_table_xml(headers, rows)
+
+
+def build_capacity_table_xml(params):
+    """
+    Table capacité : paramètres USL, genou et débit max par label.
+    """
+    headers = ["Label", "λ (req/s)", "σ", "κ", "R²", "Knee (users)", "Max (req/s)", "Max (/min)"]
+    rows = []
+    for r in params:
+        rows.append([
+            r["Label"],
+            r["Lambda (req/s per user)"],
+            r["Sigma (contention)"],
+            r["Kappa (coherency)"],
+            r["R2"],
+            r["Knee (users)"],
+            r["Max Throughput (req/s)"],
+            r["Max Throughput (/min)"],
+        ])
+    return build_table_xml(headers, rows)
+
+
+def build_co_table_xml(co_rows):
+    """
+    Table coordinated omission : percentiles bruts et corrigés par label.
+    """
+    headers = ["Label", "Samples", "Back-filled", "Interval (ms)", "Raw Avg", "CO Avg",
+               "Raw P90", "CO P90", "Raw P95", "CO P95", "Raw P99", "CO P99", "Max"]
+    rows = []
+    for r in co_rows:
+        rows.append([
+            r["Label"],
+            r["Samples"],
+            r["Back-filled"],
+            r["Expected Interval (ms)"],
+            r["Raw Average (ms)"],
+            r["CO Average (ms)"],
+            r["Raw P90 (ms)"],
+            r["CO P90 (ms)"],
+            r["Raw P95 (ms)"],
+            r["CO P95 (ms)"],
+            r["Raw P99 (ms)"],
+            r["CO P99 (ms)"],
+            r["Max (ms)"],
+        ])
+    return build_table_xml(headers, rows)
+
+
+def build_resource_table_xml(resource_demand):
+    """
+    Table ressources serveur : par palier et par label, requêtes, temps de
+    réponse moyen, CPU-ms par requête ; CPU moyen sur la ligne TOTAL.
+    """
+    headers = ["Users", "Label", "Requests", "Average (ms)", "CPU %", "CPU-ms / request"]
+    rows = []
+    for users in sorted(resource_demand):
+        for r in resource_demand[users]:
+            rows.append([
+                users,
+                r["Label"],
+                r["Requests"],
+                r.get("Average (ms)", ""),
+                r.get("CPU %", ""),
+                r["CPU-ms / request"],
+            ])
+    return build_table_xml(headers, rows)
+
+
+def build_anomaly_table_xml(anomaly_rows):
+    """
+    Table anomalies : type, label, début / fin, valeur observée et référence.
+    """
+    headers = ["Label", "Type", "Start", "End", "Duration (s)", "Value", "Baseline", "Score"]
+    rows = []
+    for r in anomaly_rows:
+        rows.append([
+            r["Label"],
+            r["Type"],
+            r["Start"],
+            r["End"],
+            r["Duration (s)"],
+            r["Value"],
+            r["Baseline"],
+            r["Score"],
+        ])
+    if not rows:
+        rows.append(["Aucune anomalie détectée"] + [""] * (len(headers) - 1))
+    return build_table_xml(headers, rows)
+
+
+def heatmap_fill(count, max_count):
+    """
+    Couleur blanc -> jaune -> rouge (comme l'échelle 3 couleurs Excel)
+    selon count / max_count ; None pour une case vide.
+    """
+    if not count or not max_count:
+        return None
+    ratio = count / max_count
+    if ratio <= 0.5:
+        # blanc (FFFFFF) -> jaune (FFEB84)
+        t = ratio * 2
+        return f"FF{int(255 - (255 - 0xEB) * t):02X}{int(255 - (255 - 0x84) * t):02X}"
+    # jaune (FFEB84) -> rouge (F8696B)
+    t = (ratio - 0.5) * 2
+    return f"{int(0xFF - (0xFF - 0xF8) * t):02X}{int(0xEB - (0xEB - 0x69) * t):02X}{int(0x84 - (0x84 - 0x6B) * t):02X}"
+
+
+def build_heatmap_table_xml(heatmap, label="TOTAL"):
+    """
+    Table heatmap latence x temps d'un label : une ligne par tranche de
+    latence, une colonne par tranche de temps, cases colorées selon le nombre
+    d'échantillons.
+    """
+    heatmap = merge_columns(heatmap, HEATMAP_WORD_COLUMNS)
+    matrix = heatmap["labels"][label]
+    max_count = max((max(line) for line in matrix), default=0)
+
+    headers = [f"{label} (ms)"] + heatmap["columns"]
+    rows = []
+    fills = []
+    for name, line in zip(heatmap["rows"], matrix):
+        rows.append([name] + [count or "" for count in line])
+        fills.append([None] + [heatmap_fill(count, max_count) for count in line])
+    return build_table_xml(headers, rows, fills)
+
+
+def build_note_paragraph_xml(text):
+    """
+    Paragraphe d'avertissement (gras, rouge) placé avant un tableau.
+    """
+    return f"""
+    <w:p xmlns:w="{W_NS}">
+      <w:r>
+        <w:rPr>
+          <w:b/>
+          <w:color w:val="C00000"/>
+          <w:sz w:val="18"/>
+          <w:szCs w:val="18"/>
+        </w:rPr>
+        <w:t>{xml_escape(text)}</w:t>
+      </w:r>
+    </w:p>
+    """.strip()
+
+
 def generate_word_report(template_path, output_path,
-                         scenarios_users, scenario_recaps, scenario_rows):
+                         scenarios_users, scenario_recaps, scenario_exec_ranges,
+                         scenario_windows=None, error_breakdowns=None,
+                         capacity=None, co_breakdowns=None, heatmaps=None,
+                         resource_demand=None, anomalies=None, template_cache_dir=None):
     """
-    Modifie le template Word (DOCX comme ZIP) :
+    Remplit le template Word (DOCX comme ZIP) à partir de son modèle compilé
+    (word_template, mis en cache par hash du template) :
       - remplit les dates d'exécution : {EXEC_DATE_1}, {EXEC_DATE_2}, ...
+      - remplit les fenêtres stables : {STEADY_WINDOW_1}, ... (si calculées)
       - remplace le paragraphe contenant {RT_TABLE_n} par un <w:tbl> construit.
+      - idem pour {ERROR_TABLE_n} (top-K erreurs, si l'analyse est active).
+      - {CAPACITY_TABLE} : paramètres USL / débit max (si l'analyse est active).
+      - {CO_TABLE_n} : latences brutes / corrigées de la coordinated omission.
+      - {HEATMAP_TABLE_n} : heatmaps latence x temps, une table par label.
+      - {RESOURCE_TABLE} : CPU-ms par requête et CPU moyen par palier.
+      - {ANOMALY_TABLE_n} : anomalies détectées (pics, blocages, changements de niveau).
     """
     if not template_path:
         logging.warning("DOC_TEMPLATE non défini, génération Word ignorée.")
@@ -133,35 +363,24 @@ def generate_word_report(template_path, output_path,
 
     logging.info("Ouverture du template Word (ZIP) : %s", template_path)
 
-    with ZipFile(template_path, "r") as z:
-        content = {name: z.read(name) for name in z.namelist()}
-
-    if "word/document.xml" not in content:
-        logging.error("word/document.xml introuvable dans le template.")
+    try:
+        compiled = load_compiled_template(template_path, template_cache_dir)
+    except ValueError as e:
+        logging.error("%s", e)
         return
 
-    xml_bytes = content["word/document.xml"]
-    root = ET.fromstring(xml_bytes)
-
-    parent_map = {child: parent for parent in root.iter() for child in parent}
+    texts = {}   # placeholder -> texte
+    blocks = {}  # placeholder -> XML remplaçant le paragraphe
+    labels = {}  # placeholder -> libellé pour les logs
 
     # 1) Dates d'exécution
-    exec_strings = []
-    for users in sorted(scenarios_users):
-        rows = scenario_rows.get(users, [])
-        exec_strings.append(compute_execution_range_string(rows))
-
-    for i, date_str in enumerate(exec_strings, start=1):
-        placeholder = f"{{EXEC_DATE_{i}}}"
-        found = False
-        for t in root.findall(".//w:t", NS):
-            if t.text == placeholder:
-                t.text = date_str
-                found = True
-        if found:
-            logging.info("Remplacement de %s par '%s'", placeholder, date_str)
-        else:
-            logging.info("Placeholder %s non trouvé dans le document.", placeholder)
+    for i, users in enumerate(sorted(scenarios_users), start=1):
+        texts[f"{{EXEC_DATE_{i}}}"] = xml_escape(scenario_exec_ranges.get(users, ""))
+
+    if scenario_windows:
+        for i, users in enumerate(sorted(scenarios_users), start=1):
+            if users in scenario_windows:
+                texts[f"{{STEADY_WINDOW_{i}}}"] = xml_escape(scenario_windows[users])
 
     # 2) Tableaux Response time
     for idx, users in enumerate(sorted(scenarios_users), start=1):
@@ -170,38 +389,75 @@ def generate_word_report(template_path, output_path,
             continue
 
         placeholder = f"{{RT_TABLE_{idx}}}"
-        table_xml = build_response_time_table_xml(recap)
-        table_el = ET.fromstring(table_xml)
-
-        replaced = False
-        for p in root.findall(".//w:p", NS):
-            has_placeholder = False
-            for t in p.findall(".//w:t", NS):
-                if t.text == placeholder:
-                    has_placeholder = True
-                    break
-            if not has_placeholder:
+        fragments = [build_response_time_table_xml(recap)]
+        if any(r.get("Approximate") for r in recap):
+            fragments.insert(0, build_note_paragraph_xml(APPROX_NOTE))
+        blocks[placeholder] = "".join(fragments)
+        labels[placeholder] = f"Tableau Response time (users={users})"
+
+    # 3) Tableaux top-K erreurs (optionnels)
+    if error_breakdowns:
+        for idx, users in enumerate(sorted(scenarios_users), start=1):
+            error_rows = error_breakdowns.get(users)
+            if error_rows is None:
                 continue
+            placeholder = f"{{ERROR_TABLE_{idx}}}"
+            blocks[placeholder] = build_error_table_xml(error_rows)
+            labels[placeholder] = f"Tableau Erreurs (users={users})"
 
-            parent = parent_map.get(p)
-            if parent is None:
+    # 4) Capacité (optionnelle)
+    if capacity:
+        blocks["{CAPACITY_TABLE}"] = build_capacity_table_xml(capacity[0])
+        labels["{CAPACITY_TABLE}"] = "Tableau Capacité"
+
+    # 5) Coordinated omission (optionnelle)
+    if co_breakdowns:
+        for idx, users in enumerate(sorted(scenarios_users), start=1):
+            co_rows = co_breakdowns.get(users)
+            if co_rows is None:
+                continue
+            placeholder = f"{{CO_TABLE_{idx}}}"
+            blocks[placeholder] = build_co_table_xml(co_rows)
+            labels[placeholder] = f"Tableau Coordinated Omission (users={users})"
+
+    # 6) Heatmaps latence x temps (optionnelles)
+    if heatmaps:
+        for idx, users in enumerate(sorted(scenarios_users), start=1):
+            heatmap = heatmaps.get(users)
+            if not heatmap:
                 continue
+            placeholder = f"{{HEATMAP_TABLE_{idx}}}"
+            # paragraphe vide entre deux tables pour qu'elles ne fusionnent pas
+            blocks[placeholder] = f'<w:p xmlns:w="{W_NS}"/>'.join(
+                build_heatmap_table_xml(heatmap, label) for label in heatmap["labels"])
+            labels[placeholder] = f"Heatmaps latence (users={users})"
 
-            idx_in_parent = list(parent).index(p)
-            parent.remove(p)
-            parent.insert(idx_in_parent, table_el)
-            replaced = True
-            logging.info("Tableau Response time inséré à la place de %s (users=%d)", placeholder, users)
-            break
+    # 7) Ressources serveur (optionnelles)
+    if resource_demand:
+        blocks["{RESOURCE_TABLE}"] = build_resource_table_xml(resource_demand)
+        labels["{RESOURCE_TABLE}"] = "Tableau Ressources serveur"
 
-        if not replaced:
-            logging.info("Placeholder %s non trouvé pour users=%d.", placeholder, users)
+    # 8) Anomalies (optionnelles)
+    if anomalies:
+        for idx, users in enumerate(sorted(scenarios_users), start=1):
+            anomaly_rows = anomalies.get(users)
+            if anomaly_rows is None:
+                continue
+            placeholder = f"{{ANOMALY_TABLE_{idx}}}"
+            blocks[placeholder] = build_anomaly_table_xml(anomaly_rows)
+            labels[placeholder] = f"Tableau Anomalies (users={users})"
 
-    new_xml_bytes = ET.tostring(root, encoding="utf-8", xml_declaration=True)
+    new_xml_bytes, done = render_document_xml(compiled, texts, blocks)
+
+    for placeholder in list(texts) + list(blocks):
+        if placeholder in done:
+            logging.info("Remplacement de %s : %s", placeholder, labels.get(placeholder, "texte"))
+        else:
+            logging.info("Placeholder %s non trouvé dans le document.", placeholder)
 
     with ZipFile(output_path, "w") as z:
-        for name, data in content.items():
-            if name == "word/document.xml":
+        for name, data in compiled["parts"].items():
+            if data is None:
                 z.writestr(name, new_xml_bytes)
             else:
                 z.writestr(name, data)
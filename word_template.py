@@ -0,0 +1,245 @@
+import os
+import re
+import json
+import base64
+import getpass
+import hashlib
+import logging
+import tempfile
+from zipfile import ZipFile
+import xml.etree.ElementTree as ET
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+NS = {"w": W_NS}
+ET.register_namespace("w", W_NS)
+
+# version du format compilé : à incrémenter si la structure change
+COMPILED_VERSION = 2
+
+PLACEHOLDER_RE = re.compile(r"^\{[A-Z][A-Z0-9_]*\}$")
+
+# sentinelles (zone Unicode privée) posées sur les <w:t> placeholders
+SLOT_START = "\ue000"
+SLOT_END = "\ue001"
+SENTINEL_RE = re.compile(SLOT_START + r"(\d+)" + SLOT_END)
+
+XML_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
+
+# modèles compilés déjà chargés dans ce processus : hash -> modèle
+_memory_cache = {}
+
+
+def default_cache_dir():
+    """
+    Cache propre à l'utilisateur : le répertoire temporaire est partagé,
+    un autre compte ne doit pas pouvoir y déposer un modèle compilé.
+    """
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = str(os.getuid()) if hasattr(os, "getuid") else "default"
+    return os.path.join(tempfile.gettempdir(), f"jmeter_recap_template_cache-{user}")
+
+
+def _private_cache_dir(cache_dir):
+    """
+    Crée le dossier de cache en 0700 et vérifie qu'il appartient à
+    l'utilisateur courant (POSIX). False si le cache ne doit pas être utilisé.
+    """
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid"):
+        st = os.stat(cache_dir)
+        if st.st_uid != os.getuid() or st.st_mode & 0o077:
+            logging.warning("Cache template ignoré (propriétaire ou droits incorrects) : %s", cache_dir)
+            return False
+    return True
+
+
+def _dump_compiled(compiled):
+    """
+    Modèle compilé -> JSON (entrées ZIP en base64) : pas de pickle, la
+    lecture du cache ne peut pas exécuter de code.
+    """
+    data = dict(compiled)
+    data["parts"] = [[name, None if raw is None else base64.b64encode(raw).decode("ascii")]
+                     for name, raw in compiled["parts"].items()]
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _load_compiled(text):
+    data = json.loads(text)
+    data["parts"] = {name: None if raw is None else base64.b64decode(raw)
+                     for name, raw in data["parts"]}
+    for slot in data["slots"]:
+        slot["text"] = tuple(slot["text"])
+        if slot["para"] is not None:
+            slot["para"] = tuple(slot["para"])
+    return data
+
+
+def template_hash(template_path):
+    h = hashlib.sha256()
+    with open(template_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _paragraph_span(xml, pos):
+    """
+    Bornes [début, fin) du <w:p> le plus interne contenant la position `pos`.
+    """
+    start = pos
+    while True:
+        start = xml.rfind("<w:p", 0, start)
+        if start < 0:
+            return None
+        if xml[start + 4] in " >":
+            break
+    end = xml.find("</w:p>", pos)
+    if end < 0:
+        return None
+    return start, end + len("</w:p>")
+
+
+def compile_template(template_path):
+    """
+    Compile un template DOCX :
+      - parts  : contenu brut des entrées ZIP (inchangées au rendu),
+                 None pour word/document.xml ;
+      - xml    : word/document.xml re-sérialisé une fois pour toutes ;
+      - slots  : pour chaque placeholder {NOM}, position du texte dans le <w:t>
+                 et du paragraphe <w:p> englobant.
+    Le rendu n'est plus qu'un collage de fragments dans `xml`.
+    """
+    logging.info("Compilation du template Word : %s", template_path)
+
+    with ZipFile(template_path, "r") as z:
+        parts = {name: z.read(name) for name in z.namelist()}
+
+    if "word/document.xml" not in parts:
+        raise ValueError("word/document.xml introuvable dans le template.")
+
+    root = ET.fromstring(parts["word/document.xml"])
+
+    names = []
+    for t in root.findall(".//w:t", NS):
+        if t.text and PLACEHOLDER_RE.match(t.text):
+            names.append(t.text)
+            t.text = f"{SLOT_START}{len(names) - 1}{SLOT_END}"
+
+    marked = XML_DECLARATION + ET.tostring(root, encoding="unicode")
+
+    # on remet le texte des placeholders en notant leurs positions finales
+    out = []
+    slots = []
+    last = 0
+    length = 0
+    for m in SENTINEL_RE.finditer(marked):
+        chunk = marked[last:m.start()]
+        out.append(chunk)
+        length += len(chunk)
+        name = names[int(m.group(1))]
+        slots.append({"name": name, "text": (length, length + len(name))})
+        out.append(name)
+        length += len(name)
+        last = m.end()
+    out.append(marked[last:])
+    xml = "".join(out)
+
+    for slot in slots:
+        slot["para"] = _paragraph_span(xml, slot["text"][0])
+
+    # l'ordre des entrées ZIP est conservé, document.xml est régénéré au rendu
+    parts["word/document.xml"] = None
+    logging.info("  -> %d placeholders compilés", len(slots))
+    return {
+        "version": COMPILED_VERSION,
+        "parts": parts,
+        "xml": xml,
+        "slots": slots,
+    }
+
+
+def load_compiled_template(template_path, cache_dir=None):
+    """
+    Modèle compilé du template, mis en cache sur disque sous le hash SHA-256
+    du fichier (et en mémoire pour le processus courant).
+    """
+    key = template_hash(template_path)
+    compiled = _memory_cache.get(key)
+    if compiled is not None:
+        return compiled
+
+    cache_dir = cache_dir or default_cache_dir()
+    cache_path = os.path.join(cache_dir, f"{key}.tpl.json")
+    try:
+        use_cache = _private_cache_dir(cache_dir)
+    except OSError as e:
+        logging.warning("Cache template indisponible %s : %s", cache_dir, e)
+        use_cache = False
+
+    if use_cache and os.path.isfile(cache_path):
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                compiled = _load_compiled(f.read())
+            if compiled.get("version") != COMPILED_VERSION:
+                compiled = None
+            else:
+                logging.info("Template compilé chargé depuis le cache : %s", cache_path)
+        except Exception as e:
+            logging.warning("Cache template illisible (%s), recompilation : %s", e, cache_path)
+            compiled = None
+
+    if compiled is None:
+        compiled = compile_template(template_path)
+        if use_cache:
+            _write_cache(cache_path, compiled)
+
+    _memory_cache[key] = compiled
+    return compiled
+
+
+def _write_cache(cache_path, compiled):
+    try:
+        tmp_path = cache_path + f".{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(_dump_compiled(compiled))
+        os.replace(tmp_path, cache_path)
+        logging.info("Template compilé mis en cache : %s", cache_path)
+    except OSError as e:
+        logging.warning("Impossible d'écrire le cache template %s : %s", cache_path, e)
+
+
+def render_document_xml(compiled, texts, blocks):
+    """
+    Produit word/document.xml à partir du modèle compilé :
+      texts  : placeholder -> texte déjà échappé (toutes les occurrences)
+      blocks : placeholder -> XML remplaçant le paragraphe (1re occurrence)
+    Retourne (bytes, placeholders remplacés).
+    """
+    xml = compiled["xml"]
+    edits = []
+    used_blocks = set()
+    for slot in compiled["slots"]:
+        name = slot["name"]
+        if name in blocks and name not in used_blocks and slot["para"] is not None:
+            used_blocks.add(name)
+            edits.append((slot["para"][0], slot["para"][1], blocks[name], name))
+        elif name in texts:
+            edits.append((slot["text"][0], slot["text"][1], texts[name], name))
+
+    edits.sort()
+    out = []
+    pos = 0
+    done = set()
+    for start, end, fragment, name in edits:
+        if start < pos:
+            # déjà couvert par un paragraphe remplacé
+            continue
+        out.append(xml[pos:start])
+        out.append(fragment)
+        pos = end
+        done.add(name)
+    out.append(xml[pos:])
+    return "".join(out).encode("utf-8"), done